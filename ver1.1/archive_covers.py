@@ -0,0 +1,112 @@
+import os
+import zipfile
+
+from archive_index import ArchiveError
+from metrics import metrics
+
+try:
+    import py7zr
+    import py7zr.io
+except ImportError:
+    py7zr = None
+
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp')
+MIN_COVER_SIZE = 4 * 1024
+MAX_COVER_SIZE = 20 * 1024 * 1024
+
+# 파일 이름(또는 상위 폴더 이름)에 포함되면 표지일 가능성이 높은 단어와 가중치
+COVER_KEYWORDS = [
+    ('cover', 40),
+    ('表紙', 40),
+    ('jacket', 35),
+    ('package', 30),
+    ('title', 30),
+    ('タイトル', 30),
+    ('thumb', 15),
+    ('main', 10),
+    ('icon', -20)
+]
+
+# 게임 엔진의 캐릭터/타일 등 표지가 아닌 이미지 폴더
+EXCLUDED_DIRS = {
+    'characters', 'faces', 'tilesets', 'system', 'animations', 'battlebacks1', 'battlebacks2',
+    'enemies', 'sv_actors', 'sv_enemies', 'parallaxes', 'fonts', 'battlers', 'autotiles',
+    'fogs', 'panoramas', 'transitions', 'windowskins', 'icons'
+}
+
+def cover_score(member, size):
+    # 표지 후보가 아니면 None, 후보이면 클수록 표지일 가능성이 높음
+    parts = member.replace('\\', '/').lower().split('/')
+    stem, ext = os.path.splitext(parts[-1])
+    if ext not in IMAGE_EXTENSIONS:
+        return None
+    if any(part in EXCLUDED_DIRS for part in parts[:-1]):
+        return None
+    if size is not None and not MIN_COVER_SIZE <= size <= MAX_COVER_SIZE:
+        return None
+
+    score = 0
+    for keyword, weight in COVER_KEYWORDS:
+        if keyword in stem:
+            score += weight
+        elif any(keyword in part for part in parts[:-1]):
+            # RPG 만들기 계열의 img/titles1 같은 폴더
+            score += weight // 2
+    score -= 5 * (len(parts) - 1)  # 얕은 위치 우선
+    if size:
+        score += min(20, size // (50 * 1024))  # 큰 이미지 우선
+    return score
+
+def pick_cover(info, min_score=-10):
+    # 압축 파일 색인 정보에서 표지로 보이는 멤버 이름을 고름
+    if not info or info['encrypted']:
+        return None
+    members = info['members']
+    sizes = info.get('member_sizes') or [None] * len(members)
+    best = None
+    for member, size in zip(members, sizes):
+        score = cover_score(member, size)
+        if score is not None and score >= min_score and (best is None or score > best[0]):
+            best = (score, member)
+    return best[1] if best else None
+
+def read_member(archive_path, member, limit=MAX_COVER_SIZE):
+    # 압축을 풀지 않고 멤버 하나만 메모리로 읽음
+    ext = os.path.splitext(archive_path)[1].lower()
+    with metrics.timer("archive_cover.read"):
+        if ext == '.zip':
+            with zipfile.ZipFile(archive_path) as archive:
+                with archive.open(member) as f:
+                    data = f.read(limit + 1)
+        elif ext == '.7z' and py7zr is not None:
+            factory = py7zr.io.BytesIOFactory(limit + 1)
+            with py7zr.SevenZipFile(archive_path) as archive:
+                archive.extract(targets=[member], factory=factory)
+            product = factory.products.get(member)
+            if product is None:
+                raise ArchiveError(f"멤버를 찾을 수 없습니다: {member}")
+            data = product.read()
+        elif ext == '.rar' and rarfile is not None:
+            with rarfile.RarFile(archive_path) as archive:
+                with archive.open(member) as f:
+                    data = f.read(limit + 1)
+        else:
+            raise ArchiveError(f"지원하지 않는 압축 형식입니다: {ext}")
+    if len(data) > limit:
+        raise ArchiveError("표지 이미지가 너무 큽니다.")
+    metrics.increment("archive_cover.bytes", len(data))
+    return data
+
+def find_cover(archive_index, path, name):
+    # 색인된 압축 파일 항목의 표지 멤버를 찾아 (압축 파일 경로, 멤버 이름)을 반환
+    if archive_index is None:
+        return None
+    member = pick_cover(archive_index.archives.get(name))
+    if member is None:
+        return None
+    return os.path.join(path, name), member
@@ -0,0 +1,603 @@
+import bisect
+import json
+import lzma
+import os
+import re
+import sqlite3
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import CACHE_DIR
+from metrics import metrics
+
+ARCHIVE_EXTENSIONS = ('.zip', '.rar', '.7z')
+
+class ArchiveError(Exception):
+    pass
+
+class CountingFile:
+    # 실제로 읽은 바이트 수를 기록하기 위한 파일 래퍼
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        return self.f.seek(offset, whence)
+
+    def tell(self):
+        return self.f.tell()
+
+    def seekable(self):
+        return True
+
+    def read_exact(self, size):
+        data = self.read(size)
+        if len(data) != size:
+            raise ArchiveError("예상보다 파일이 짧습니다.")
+        return data
+
+def make_result(members, encrypted, header_encrypted=False):
+    sizes = [size for _, size in members]
+    return {
+        'member_count': len(members) if not header_encrypted else None,
+        'total_size': sum(sizes) if None not in sizes and not header_encrypted else None,
+        'encrypted': encrypted,
+        'header_encrypted': header_encrypted,
+        'members': [name for name, _ in members],
+        'member_sizes': [size for _, size in members]
+    }
+
+# ZIP: 끝의 중앙 디렉터리만 읽음 (zipfile은 데이터 영역을 읽지 않음)
+
+def inspect_zip(f):
+    try:
+        with zipfile.ZipFile(f) as archive:
+            infos = archive.infolist()
+    except zipfile.BadZipFile as e:
+        raise ArchiveError(str(e))
+    members = [(info.filename, info.file_size) for info in infos if not info.is_dir()]
+    encrypted = any(info.flag_bits & 0x1 for info in infos)
+    return make_result(members, encrypted)
+
+# 7z: 시그니처 헤더가 가리키는 끝부분의 헤더만 읽음
+
+SEVENZIP_SIGNATURE = b'7z\xbc\xaf\x27\x1c'
+SEVENZIP_AES = b'\x06\xf1\x07\x01'
+SEVENZIP_LZMA = b'\x03\x01\x01'
+SEVENZIP_LZMA2 = b'\x21'
+
+class SevenZipReader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def byte(self):
+        if self.pos >= len(self.data):
+            raise ArchiveError("7z 헤더가 손상되었습니다.")
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def bytes(self, size):
+        if self.pos + size > len(self.data):
+            raise ArchiveError("7z 헤더가 손상되었습니다.")
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def number(self):
+        first = self.byte()
+        mask = 0x80
+        value = 0
+        for i in range(8):
+            if first & mask == 0:
+                return value | ((first & (mask - 1)) << (8 * i))
+            value |= self.byte() << (8 * i)
+            mask >>= 1
+        return value
+
+    def uint32(self):
+        return struct.unpack('<I', self.bytes(4))[0]
+
+    def bits(self, count):
+        result = []
+        value = mask = 0
+        for _ in range(count):
+            if mask == 0:
+                value = self.byte()
+                mask = 0x80
+            result.append(bool(value & mask))
+            mask >>= 1
+        return result
+
+    def defined_bits(self, count):
+        all_defined = self.byte()
+        return [True] * count if all_defined else self.bits(count)
+
+    def digests(self, count):
+        defined = self.defined_bits(count)
+        for is_defined in defined:
+            if is_defined:
+                self.uint32()
+        return defined
+
+def read_7z_pack_info(reader):
+    pack_pos = reader.number()
+    num_streams = reader.number()
+    sizes = []
+    while True:
+        prop = reader.number()
+        if prop == 0x00:
+            break
+        if prop == 0x09:
+            sizes = [reader.number() for _ in range(num_streams)]
+        elif prop == 0x0A:
+            reader.digests(num_streams)
+    return {'pos': pack_pos, 'sizes': sizes}
+
+def read_7z_folder(reader):
+    coders = []
+    total_out = 0
+    total_in = 0
+    for _ in range(reader.number()):
+        flag = reader.byte()
+        coder_id = reader.bytes(flag & 0x0F)
+        num_in = num_out = 1
+        if flag & 0x10:
+            num_in = reader.number()
+            num_out = reader.number()
+        props = reader.bytes(reader.number()) if flag & 0x20 else b''
+        coders.append({'id': coder_id, 'props': props})
+        total_in += num_in
+        total_out += num_out
+    bound_out = set()
+    for _ in range(total_out - 1):
+        reader.number()
+        bound_out.add(reader.number())
+    num_packed = total_in - (total_out - 1)
+    if num_packed > 1:
+        for _ in range(num_packed):
+            reader.number()
+    return {'coders': coders, 'total_out': total_out, 'bound_out': bound_out}
+
+def read_7z_coders_info(reader):
+    if reader.number() != 0x0B:
+        raise ArchiveError("7z 폴더 정보가 없습니다.")
+    num_folders = reader.number()
+    if reader.byte() != 0:
+        raise ArchiveError("외부 폴더 정보는 지원하지 않습니다.")
+    folders = [read_7z_folder(reader) for _ in range(num_folders)]
+    if reader.number() != 0x0C:
+        raise ArchiveError("7z 압축 해제 크기 정보가 없습니다.")
+    for folder in folders:
+        sizes = [reader.number() for _ in range(folder['total_out'])]
+        # 다른 코더에 연결되지 않은 출력이 폴더의 최종 출력
+        main_out = [i for i in range(folder['total_out']) if i not in folder['bound_out']]
+        folder['unpack_size'] = sizes[main_out[0]] if main_out else sizes[-1]
+        folder['crc_defined'] = False
+    while True:
+        prop = reader.number()
+        if prop == 0x00:
+            break
+        if prop == 0x0A:
+            for folder, defined in zip(folders, reader.digests(num_folders)):
+                folder['crc_defined'] = defined
+    return folders
+
+def read_7z_substreams_info(reader, folders):
+    counts = [1] * len(folders)
+    sizes = None
+    prop = reader.number()
+    if prop == 0x0D:
+        counts = [reader.number() for _ in folders]
+        prop = reader.number()
+    if prop == 0x09:
+        sizes = []
+        for folder, count in zip(folders, counts):
+            if count == 0:
+                continue
+            partial = [reader.number() for _ in range(count - 1)]
+            sizes.extend(partial)
+            sizes.append(folder['unpack_size'] - sum(partial))
+        prop = reader.number()
+    if sizes is None:
+        sizes = []
+        for folder, count in zip(folders, counts):
+            if count == 1:
+                sizes.append(folder['unpack_size'])
+    while prop != 0x00:
+        if prop == 0x0A:
+            # 폴더 CRC로 이미 확인되는 단일 스트림을 제외한 스트림의 CRC
+            unknown = sum(count for folder, count in zip(folders, counts)
+                          if not (count == 1 and folder['crc_defined']))
+            reader.digests(unknown)
+        prop = reader.number()
+    return counts, sizes
+
+def read_7z_streams_info(reader):
+    info = {'pack': None, 'folders': [], 'counts': [], 'sizes': []}
+    while True:
+        prop = reader.number()
+        if prop == 0x00:
+            break
+        if prop == 0x06:
+            info['pack'] = read_7z_pack_info(reader)
+        elif prop == 0x07:
+            info['folders'] = read_7z_coders_info(reader)
+            info['counts'] = [1] * len(info['folders'])
+            info['sizes'] = [folder['unpack_size'] for folder in info['folders']]
+        elif prop == 0x08:
+            info['counts'], info['sizes'] = read_7z_substreams_info(reader, info['folders'])
+        else:
+            raise ArchiveError(f"알 수 없는 7z 속성: {prop}")
+    return info
+
+def read_7z_files_info(reader):
+    num_files = reader.number()
+    empty_stream = [False] * num_files
+    empty_file = []
+    names = [''] * num_files
+    while True:
+        prop = reader.number()
+        if prop == 0x00:
+            break
+        size = reader.number()
+        end = reader.pos + size
+        if prop == 0x0E:
+            empty_stream = reader.bits(num_files)
+        elif prop == 0x0F:
+            empty_file = reader.bits(sum(empty_stream))
+        elif prop == 0x11:
+            if reader.byte() != 0:
+                raise ArchiveError("외부 이름 정보는 지원하지 않습니다.")
+            names = reader.bytes(end - reader.pos).decode('utf-16-le').split('\0')[:num_files]
+        reader.pos = end
+    # 빈 스트림 중 빈 파일이 아닌 것은 폴더
+    empty_files = iter(empty_file)
+    is_dir = [is_empty and not next(empty_files, False) for is_empty in empty_stream]
+    return names, empty_stream, is_dir
+
+def decode_7z_header(f, info):
+    folder = info['folders'][0]
+    coder = folder['coders'][0]
+    if any(c['id'] == SEVENZIP_AES for c in folder['coders']):
+        return None
+    f.seek(32 + info['pack']['pos'])
+    packed = f.read_exact(info['pack']['sizes'][0])
+    if coder['id'] == SEVENZIP_LZMA:
+        props = coder['props']
+        d = props[0]
+        filters = [{'id': lzma.FILTER_LZMA1, 'dict_size': struct.unpack('<I', props[1:5])[0],
+                    'lc': d % 9, 'lp': (d // 9) % 5, 'pb': d // 45}]
+    elif coder['id'] == SEVENZIP_LZMA2:
+        p = coder['props'][0]
+        dict_size = 0xFFFFFFFF if p == 40 else (2 | (p & 1)) << (p // 2 + 11)
+        filters = [{'id': lzma.FILTER_LZMA2, 'dict_size': dict_size}]
+    elif coder['id'] == b'\x00':
+        return packed
+    else:
+        raise ArchiveError("지원하지 않는 7z 헤더 압축 방식입니다.")
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
+    return decompressor.decompress(packed, max_length=folder['unpack_size'])
+
+def inspect_7z(f):
+    start = f.read_exact(32)
+    if start[:6] != SEVENZIP_SIGNATURE:
+        raise ArchiveError("7z 파일이 아닙니다.")
+    next_offset, next_size = struct.unpack('<QQ', start[12:28])
+    if next_size == 0:
+        return make_result([], False)
+    f.seek(32 + next_offset)
+    header = f.read_exact(next_size)
+
+    reader = SevenZipReader(header)
+    prop = reader.number()
+    if prop == 0x17:
+        header = decode_7z_header(f, read_7z_streams_info(reader))
+        if header is None:
+            # 헤더까지 암호화된 경우 파일 목록을 알 수 없음
+            return make_result([], True, header_encrypted=True)
+        reader = SevenZipReader(header)
+        prop = reader.number()
+    if prop != 0x01:
+        raise ArchiveError("7z 헤더가 손상되었습니다.")
+
+    streams = {'folders': [], 'counts': [], 'sizes': []}
+    names, empty_stream, is_dir = [], [], []
+    while True:
+        prop = reader.number()
+        if prop == 0x00:
+            break
+        if prop == 0x02:
+            while reader.number() != 0x00:
+                reader.bytes(reader.number())
+        elif prop in (0x03, 0x04):
+            info = read_7z_streams_info(reader)
+            if prop == 0x04:
+                streams = info
+        elif prop == 0x05:
+            names, empty_stream, is_dir = read_7z_files_info(reader)
+        else:
+            raise ArchiveError(f"알 수 없는 7z 속성: {prop}")
+
+    # 내용이 있는 파일을 폴더 순서대로 배정하여 크기와 암호화 여부를 구함
+    stream_folders = []
+    for folder, count in zip(streams['folders'], streams['counts']):
+        encrypted = any(c['id'] == SEVENZIP_AES for c in folder['coders'])
+        stream_folders.extend([encrypted] * count)
+
+    members = []
+    encrypted = False
+    stream_index = 0
+    for name, is_empty, is_folder in zip(names, empty_stream, is_dir):
+        if is_folder:
+            continue
+        if is_empty:
+            members.append((name, 0))
+            continue
+        if stream_index < len(streams['sizes']):
+            members.append((name, streams['sizes'][stream_index]))
+            encrypted = encrypted or stream_folders[stream_index]
+        else:
+            members.append((name, None))
+        stream_index += 1
+    return make_result(members, encrypted)
+
+# RAR: 각 파일 헤더만 읽고 압축 데이터는 건너뜀
+
+RAR4_SIGNATURE = b'Rar!\x1a\x07\x00'
+RAR5_SIGNATURE = b'Rar!\x1a\x07\x01\x00'
+
+def read_vint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ArchiveError("RAR 헤더가 손상되었습니다.")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+def read_rar5_vint(f):
+    data = b''
+    while True:
+        byte = f.read_exact(1)
+        data += byte
+        if not byte[0] & 0x80 or len(data) >= 10:
+            return read_vint(data, 0)[0], len(data)
+
+def inspect_rar5(f):
+    members = []
+    encrypted = False
+    offset = len(RAR5_SIGNATURE)
+    file_size = f.seek(0, os.SEEK_END)
+    while offset < file_size:
+        f.seek(offset + 4)  # CRC32
+        header_size, size_len = read_rar5_vint(f)
+        header = f.read_exact(header_size)
+        header_type, pos = read_vint(header, 0)
+        flags, pos = read_vint(header, pos)
+        extra_size = data_size = 0
+        if flags & 0x01:
+            extra_size, pos = read_vint(header, pos)
+        if flags & 0x02:
+            data_size, pos = read_vint(header, pos)
+
+        if header_type == 4:
+            # 아카이브 전체 헤더 암호화
+            return make_result([], True, header_encrypted=True)
+        if header_type == 5:
+            break
+        if header_type == 2:
+            file_flags, pos = read_vint(header, pos)
+            unpacked_size, pos = read_vint(header, pos)
+            _, pos = read_vint(header, pos)  # 속성
+            if file_flags & 0x02:
+                pos += 4
+            if file_flags & 0x04:
+                pos += 4
+            _, pos = read_vint(header, pos)  # 압축 정보
+            _, pos = read_vint(header, pos)  # 호스트 OS
+            name_length, pos = read_vint(header, pos)
+            name = header[pos:pos + name_length].decode('utf-8', 'replace')
+
+            # 추가 영역은 헤더의 끝부분에 위치
+            pos = len(header) - extra_size
+            while pos < len(header):
+                record_size, record_pos = read_vint(header, pos)
+                record_type, _ = read_vint(header, record_pos)
+                if record_type == 0x01:
+                    encrypted = True
+                pos = record_pos + record_size
+
+            if not file_flags & 0x01:
+                members.append((name, unpacked_size))
+
+        offset += 4 + size_len + header_size + data_size
+    return make_result(members, encrypted)
+
+def inspect_rar4(f):
+    members = []
+    encrypted = False
+    offset = len(RAR4_SIGNATURE)
+    file_size = f.seek(0, os.SEEK_END)
+    # 남은 바이트가 헤더보다 짧으면 잘린 파일이므로 read_exact에서 오류가 남
+    while offset < file_size:
+        f.seek(offset)
+        _, header_type, flags, header_size = struct.unpack('<HBHH', f.read_exact(7))
+        if header_size < 7:
+            raise ArchiveError("RAR 헤더가 손상되었습니다.")
+        header = f.read_exact(header_size - 7)
+        add_size = 0
+        if flags & 0x8000 and len(header) >= 4:
+            add_size = struct.unpack('<I', header[:4])[0]
+
+        if header_type == 0x73 and flags & 0x80:
+            return make_result([], True, header_encrypted=True)
+        if header_type == 0x7B:
+            break
+        if header_type == 0x74:
+            pack_size, unpacked_size = struct.unpack('<II', header[0:8])
+            name_size = struct.unpack('<H', header[19:21])[0]
+            pos = 25
+            if flags & 0x100:
+                high_pack, high_unpacked = struct.unpack('<II', header[25:33])
+                pack_size |= high_pack << 32
+                unpacked_size |= high_unpacked << 32
+                pos = 33
+            add_size = pack_size
+            raw_name = header[pos:pos + name_size]
+            if flags & 0x200 and b'\0' in raw_name:
+                raw_name = raw_name.split(b'\0', 1)[0]
+            name = raw_name.decode('utf-8', 'replace')
+            if flags & 0x04:
+                encrypted = True
+            if flags & 0xE0 != 0xE0:
+                members.append((name, unpacked_size))
+
+        offset += header_size + add_size
+    return make_result(members, encrypted)
+
+def inspect_rar(f):
+    signature = f.read(8)
+    if signature == RAR5_SIGNATURE:
+        return inspect_rar5(f)
+    if signature[:7] == RAR4_SIGNATURE:
+        return inspect_rar4(f)
+    raise ArchiveError("RAR 파일이 아닙니다.")
+
+INSPECTORS = {
+    '.zip': inspect_zip,
+    '.7z': inspect_7z,
+    '.rar': inspect_rar
+}
+
+def inspect_archive(path):
+    ext = os.path.splitext(path)[1].lower()
+    inspector = INSPECTORS.get(ext)
+    if inspector is None:
+        raise ArchiveError("지원하지 않는 압축 형식입니다.")
+    with open(path, 'rb') as raw:
+        f = CountingFile(raw)
+        with metrics.timer(f"archive_index.{ext[1:]}"):
+            result = inspector(f)
+    result['bytes_read'] = f.bytes_read
+    metrics.increment("archive_index.bytes_read", f.bytes_read)
+    return result
+
+def tokenize(text):
+    return [token for token in re.split(r'[\W_]+', text.lower()) if token]
+
+class ArchiveIndex:
+    def __init__(self, db_path=None, workers=8):
+        db_path = db_path or os.path.join(CACHE_DIR, 'archive_index.db')
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.workers = workers
+        self.archives = {}  # 항목 이름 -> 검사 결과
+        self.tokens = {}  # 토큰 -> 항목 이름 집합
+        self.sorted_tokens = None  # 접두어 검색용 정렬된 토큰 목록
+        self.errors = {}
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archives (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                info TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def build(self, path, item_stats, progress=None):
+        # item_stats: 스캔 결과 (이름 -> 크기/수정 시각). 캐시에 없는 압축 파일만 검사
+        targets = {name: stat for name, stat in item_stats.items()
+                   if not stat['is_dir'] and os.path.splitext(name)[1].lower() in ARCHIVE_EXTENSIONS}
+
+        conn = sqlite3.connect(self.db_path)
+        cached = {}
+        paths = [os.path.join(path, name) for name in targets]
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            rows = conn.execute(
+                f"SELECT path, size, mtime, info FROM archives WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk)
+            for archive_path, size, mtime, info in rows:
+                cached[archive_path] = (size, mtime, info)
+
+        pending = []
+        for name, stat in targets.items():
+            archive_path = os.path.join(path, name)
+            entry = cached.get(archive_path)
+            info = json.loads(entry[2]) if entry and entry[0] == stat['size'] and entry[1] == stat['mtime'] else None
+            # 멤버 크기가 없는 이전 형식의 기록은 다시 검사
+            if info is not None and 'member_sizes' in info:
+                self.add(name, info)
+            else:
+                pending.append((name, archive_path, stat))
+        metrics.increment("archive_index.cached", len(targets) - len(pending))
+
+        def inspect(entry):
+            name, archive_path, stat = entry
+            try:
+                return entry, inspect_archive(archive_path), None
+            except (OSError, ArchiveError, lzma.LZMAError, struct.error, UnicodeDecodeError) as e:
+                return entry, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for done, ((name, archive_path, stat), info, error) in enumerate(executor.map(inspect, pending), 1):
+                if info is None:
+                    self.errors[name] = error
+                else:
+                    self.add(name, info)
+                    conn.execute("INSERT OR REPLACE INTO archives (path, size, mtime, info) VALUES (?, ?, ?, ?)",
+                                 (archive_path, stat['size'], stat['mtime'], json.dumps(info, ensure_ascii=False)))
+                if progress:
+                    progress(done, len(pending))
+        conn.commit()
+        conn.close()
+        return self
+
+    def add(self, name, info):
+        self.archives[name] = info
+        self.sorted_tokens = None
+        for member in info['members']:
+            for token in tokenize(member):
+                self.tokens.setdefault(token, set()).add(name)
+
+    def search(self, query):
+        # 모든 검색어 토큰을 포함하는 멤버가 있는 항목을 찾은 뒤 멤버 이름으로 확인
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {}
+        if self.sorted_tokens is None:
+            self.sorted_tokens = sorted(self.tokens)
+
+        candidates = None
+        for token in query_tokens:
+            names = set()
+            i = bisect.bisect_left(self.sorted_tokens, token)
+            while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(token):
+                names |= self.tokens[self.sorted_tokens[i]]
+                i += 1
+            candidates = names if candidates is None else candidates & names
+            if not candidates:
+                return {}
+
+        results = {}
+        for name in candidates:
+            matched = [member for member in self.archives[name]['members']
+                       if all(any(t.startswith(token) for t in tokenize(member)) for token in query_tokens)]
+            if matched:
+                results[name] = matched
+        return results
@@ -0,0 +1,249 @@
+import json
+import os
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from constants import CACHE_DIR
+from metrics import metrics
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
+
+# 손상으로 판단하는 예외. 그 밖의 예외는 프로그램 오류일 수 있으므로 'error'로 보고
+CORRUPT_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError)
+if py7zr is not None:
+    CORRUPT_ERRORS += (py7zr.exceptions.Bad7zFile, py7zr.exceptions.CrcError,
+                       py7zr.exceptions.DecompressionError)
+if rarfile is not None:
+    CORRUPT_ERRORS += (rarfile.BadRarFile, rarfile.NotRarFile, rarfile.RarCRCError)
+
+READ_CHUNK = 1024 * 1024
+
+# 장치 종류별 동시 검사 수. 회전식 디스크는 탐색이 겹치면 느려지므로 하나씩 처리
+ROTATIONAL_LIMIT = 1
+SOLID_STATE_LIMIT = 4
+UNKNOWN_DEVICE_LIMIT = 2
+
+STATUS_TEXT = {
+    'ok': "정상",
+    'corrupt': "손상",
+    'encrypted': "암호화",
+    'unsupported': "검사 불가",
+    'error': "오류"
+}
+
+def verify_zip(path):
+    checked = 0
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if info.flag_bits & 0x1:
+                return 'encrypted', info.filename, checked
+            # 끝까지 읽으면 zipfile이 CRC를 확인하고 불일치 시 BadZipFile을 발생시킴
+            with archive.open(info) as member:
+                while member.read(READ_CHUNK):
+                    pass
+            checked += 1
+    return 'ok', None, checked
+
+def verify_7z(path):
+    if py7zr is None:
+        return 'unsupported', "py7zr가 설치되어 있지 않습니다.", 0
+    try:
+        with py7zr.SevenZipFile(path) as archive:
+            if archive.needs_password():
+                return 'encrypted', None, 0
+            count = len(archive.getnames())
+            bad_member = archive.testzip()
+            if bad_member is not None:
+                return 'corrupt', bad_member, 0
+    except py7zr.exceptions.PasswordRequired:
+        # 헤더까지 암호화된 경우 여는 시점에 발생
+        return 'encrypted', None, 0
+    return 'ok', None, count
+
+def verify_rar(path):
+    if rarfile is None:
+        return 'unsupported', "rarfile이 설치되어 있지 않습니다.", 0
+    try:
+        with rarfile.RarFile(path) as archive:
+            if archive.needs_password():
+                return 'encrypted', None, 0
+            archive.testrar()
+            count = len(archive.namelist())
+    except rarfile.PasswordRequired:
+        return 'encrypted', None, 0
+    except rarfile.RarCannotExec:
+        return 'unsupported', "unrar 실행 파일을 찾을 수 없습니다.", 0
+    return 'ok', None, count
+
+VERIFIERS = {
+    '.zip': verify_zip,
+    '.7z': verify_7z,
+    '.rar': verify_rar
+}
+
+def verify_archive(path):
+    # 작업자 프로세스에서 실행되므로 결과는 직렬화 가능한 dict로 반환
+    ext = os.path.splitext(path)[1].lower()
+    verifier = VERIFIERS.get(ext)
+    start = time.perf_counter()
+    if verifier is None:
+        status, message, checked = 'unsupported', None, 0
+    else:
+        try:
+            status, message, checked = verifier(path)
+        except CORRUPT_ERRORS as e:
+            status, message, checked = 'corrupt', f"{type(e).__name__}: {e}", 0
+        except OSError as e:
+            status, message, checked = 'error', str(e), 0
+        except Exception as e:
+            status, message, checked = 'error', f"{type(e).__name__}: {e}", 0
+    return {
+        'status': status,
+        'message': message,
+        'checked': checked,
+        'elapsed': time.perf_counter() - start
+    }
+
+def is_rotational(device):
+    try:
+        block = os.path.realpath(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}")
+    except (AttributeError, OSError, ValueError):
+        return None
+    # 파티션이면 상위 디스크의 정보를 사용
+    for candidate in (block, os.path.dirname(block)):
+        try:
+            with open(os.path.join(candidate, 'queue', 'rotational')) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return None
+
+def device_limit(device):
+    rotational = is_rotational(device)
+    if rotational is None:
+        return UNKNOWN_DEVICE_LIMIT
+    return ROTATIONAL_LIMIT if rotational else SOLID_STATE_LIMIT
+
+RETRY_STATUSES = ('error', 'unsupported')
+
+class VerifyManifest:
+    def __init__(self, manifest_path=None):
+        self.manifest_path = manifest_path or os.path.join(CACHE_DIR, 'verify_manifest.json')
+        self.entries = {}
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, path, size, mtime):
+        entry = self.entries.get(path)
+        # 오류로 끝났거나 라이브러리/도구가 없어 검사하지 못한 항목은 결과가 아니므로 다음에 다시 검사
+        if entry and entry['status'] not in RETRY_STATUSES and entry['size'] == size and entry['mtime'] == mtime:
+            return entry
+        return None
+
+    def put(self, path, size, mtime, result):
+        self.entries[path] = {
+            'size': size,
+            'mtime': mtime,
+            'status': result['status'],
+            'message': result['message'],
+            'checked': result['checked'],
+            'verified_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        }
+
+    def save(self):
+        # 중간에 종료되어도 이전 기록이 깨지지 않도록 임시 파일에 쓴 뒤 교체
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+def verify_archives(path, item_stats, manifest=None, workers=None, progress=None, save_interval=5.0):
+    # 새로 추가되었거나 변경된 압축 파일만 검사하고 결과를 이름 -> 결과로 반환
+    manifest = manifest or VerifyManifest()
+    results = {}
+    queues = {}  # 장치 -> 대기 작업
+    limits = {}
+    total = 0
+
+    for name, stat in item_stats.items():
+        if stat['is_dir'] or os.path.splitext(name)[1].lower() not in VERIFIERS:
+            continue
+        archive_path = os.path.abspath(os.path.join(path, name))
+        entry = manifest.get(archive_path, stat['size'], stat['mtime'])
+        if entry is not None:
+            results[name] = entry
+            continue
+        try:
+            device = os.stat(archive_path).st_dev
+        except OSError:
+            continue
+        if device not in queues:
+            queues[device] = deque()
+            limits[device] = device_limit(device)
+        queues[device].append((name, archive_path, stat))
+        total += 1
+    metrics.increment("archive_verify.cached", len(results))
+
+    workers = workers or os.cpu_count() or 1
+    active = {device: 0 for device in queues}
+    running = {}
+    done_count = 0
+    last_save = time.monotonic()
+
+    def fill(executor):
+        # 장치를 돌아가며 장치별 제한 안에서 작업을 제출
+        submitted = True
+        while submitted and len(running) < workers:
+            submitted = False
+            for device, jobs in queues.items():
+                if jobs and active[device] < limits[device] and len(running) < workers:
+                    name, archive_path, stat = jobs.popleft()
+                    future = executor.submit(verify_archive, archive_path)
+                    running[future] = (name, archive_path, stat, device)
+                    active[device] += 1
+                    submitted = True
+
+    if total:
+        with metrics.timer("archive_verify"):
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                fill(executor)
+                while running:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name, archive_path, stat, device = running.pop(future)
+                        active[device] -= 1
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            # 작업자 프로세스가 비정상 종료된 경우
+                            result = {'status': 'error', 'message': str(e), 'checked': 0, 'elapsed': 0.0}
+                        manifest.put(archive_path, stat['size'], stat['mtime'], result)
+                        results[name] = manifest.entries[archive_path]
+                        metrics.add_time("archive_verify.item", result['elapsed'])
+                        done_count += 1
+                        if progress:
+                            progress(done_count, total)
+                    if time.monotonic() - last_save > save_interval:
+                        manifest.save()
+                        last_save = time.monotonic()
+                    fill(executor)
+        metrics.increment("archive_verify.verified", total)
+    manifest.save()
+    return results
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from constants import VALID_GENRES, DEFAULT_EXTENSIONS
+from utils import validate_name, get_items_in_path, classify_items
+
+BENCHMARK_VERSION = 1
+
+ARCHIVE_EXTENSIONS = ['.zip', '.rar', '.7z']
+SORT_COLUMNS = ["Item", "Status", "Platform", "Genre", "ID"]
+
+WORDS = ['Dungeon', 'Princess', 'Quest', 'Night', 'Memory', 'Summer', 'Labyrinth',
+         'Witch', 'Academy', 'Island', 'Story', 'Legend', 'Shadow', 'Garden', 'Star']
+
+def default_root():
+    # tmpfs가 있으면 디스크 캐시 영향을 줄이기 위해 우선 사용
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+def parse_platform_weights(text):
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+def make_unique_id(platform_name, number):
+    if platform_name == 'DLsite':
+        return f"RJ{number:08d}"
+    if platform_name == 'VNdb':
+        return f"v{number}"
+    if platform_name == 'Fanza':
+        return f"d_{number:06d}"
+    return str(number)
+
+def make_title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+def make_valid_name(rng, platform_name, unique_id):
+    creator = f"Circle{rng.randint(1, 500)}"
+    genre = rng.choice(sorted(VALID_GENRES))
+    return f"[{creator}]-[{unique_id}] {make_title(rng)} ({genre})_{platform_name}"
+
+def make_invalid_name(rng):
+    kind = rng.randint(0, 2)
+    if kind == 0:
+        return make_title(rng)
+    if kind == 1:
+        # 장르가 유효하지 않은 이름
+        return f"[Circle{rng.randint(1, 500)}]-[RJ{rng.randint(1, 10**6):08d}] {make_title(rng)} (XXX)_DLsite"
+    return f"{make_title(rng)}_{rng.randint(1, 10**6)}"
+
+def generate_names(config):
+    rng = random.Random(config['seed'])
+    platforms = list(config['platforms'])
+    weights = [config['platforms'][p] for p in platforms]
+
+    valid_count = int(config['size'] * config['valid_ratio'])
+    # 중복은 이미 만든 고유 ID에서 고르므로 고유한 항목이 하나 이상 있어야 함
+    duplicate_count = min(int(valid_count * config['duplicate_ratio']), max(valid_count - 1, 0))
+    invalid_count = config['size'] - valid_count
+
+    names = []
+    used_ids = []
+    next_number = 1
+    for _ in range(valid_count - duplicate_count):
+        platform_name = rng.choices(platforms, weights)[0]
+        unique_id = make_unique_id(platform_name, next_number)
+        next_number += 1
+        used_ids.append((platform_name, unique_id))
+        names.append(make_valid_name(rng, platform_name, unique_id))
+
+    for _ in range(duplicate_count):
+        platform_name, unique_id = rng.choice(used_ids)
+        names.append(make_valid_name(rng, platform_name, unique_id))
+
+    for _ in range(invalid_count):
+        names.append(make_invalid_name(rng))
+
+    rng.shuffle(names)
+
+    # 파일/폴더 구분 및 이름 중복 제거
+    entries = []
+    seen = set()
+    for i, name in enumerate(names):
+        is_folder = rng.random() < config['folder_ratio']
+        full_name = name if is_folder else name + rng.choice(ARCHIVE_EXTENSIONS)
+        if full_name in seen:
+            full_name = f"{name} ({i})" if is_folder else f"{name} ({i}){rng.choice(ARCHIVE_EXTENSIONS)}"
+        seen.add(full_name)
+        entries.append((full_name, is_folder))
+    return entries
+
+def generate_library(root, config):
+    library = tempfile.mkdtemp(prefix='giana-bench-', dir=root)
+    for name, is_folder in generate_names(config):
+        path = os.path.join(library, name)
+        if is_folder:
+            os.mkdir(path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(b'\0' * config['file_bytes'])
+    return library
+
+def measure(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+def summarize(timings, count):
+    median = statistics.median(timings)
+    return {
+        'count': count,
+        'repeat': len(timings),
+        'min': min(timings),
+        'median': median,
+        'mean': statistics.mean(timings),
+        'max': max(timings),
+        'items_per_sec': count / median if median else None
+    }
+
+def build_rows(items):
+    # 결과 트리에 들어가는 값과 동일한 행 구성
+    valid, invalid, duplicate = classify_items(items)
+    duplicate = set(duplicate)
+    rows = []
+    for item, info in valid:
+        status = "중복" if item in duplicate else "유효"
+        rows.append((item, status, info['platform'], info['genre'], info['unique_id']))
+    for item in invalid:
+        rows.append((item, "유효하지 않음", "-", "-", "-"))
+    return rows
+
+def sort_all_columns(rows):
+    for index in range(len(SORT_COLUMNS)):
+        for reverse in (False, True):
+            sorted(((row[index], i) for i, row in enumerate(rows)), reverse=reverse)
+
+def rename_round_trip(library, names):
+    # 이름을 바꿨다가 되돌려 매 반복이 같은 상태에서 시작하도록 함
+    for name in names:
+        os.rename(os.path.join(library, name), os.path.join(library, name + '.renamed'))
+    for name in names:
+        os.rename(os.path.join(library, name + '.renamed'), os.path.join(library, name))
+
+def run_benchmarks(library, config):
+    repeat = config['repeat']
+    results = {}
+
+    timings, items = measure(lambda: get_items_in_path(library, DEFAULT_EXTENSIONS), repeat)
+    results['get_items_in_path'] = summarize(timings, len(items))
+
+    timings, _ = measure(lambda: [validate_name(item) for item in items], repeat)
+    results['validate_name'] = summarize(timings, len(items))
+
+    timings, classified = measure(lambda: classify_items(items), repeat)
+    results['classify_items'] = summarize(timings, len(items))
+
+    rows = build_rows(items)
+    timings, _ = measure(lambda: sort_all_columns(rows), repeat)
+    results['sort'] = summarize(timings, len(rows) * len(SORT_COLUMNS) * 2)
+
+    rename_names = random.Random(config['seed']).sample(items, min(config['rename_count'], len(items)))
+    timings, _ = measure(lambda: rename_round_trip(library, rename_names), repeat)
+    results['rename'] = summarize(timings, len(rename_names) * 2)
+
+    valid, invalid, duplicate = classified
+    library_stats = {
+        'items': len(items),
+        'valid': len(valid),
+        'invalid': len(invalid),
+        'duplicate': len(duplicate)
+    }
+    return results, library_stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검증/분류/정렬/이름 변경 성능 측정")
+    parser.add_argument('--size', type=int, default=10000, help="생성할 항목 수")
+    parser.add_argument('--valid-ratio', type=float, default=0.7, help="유효한 이름 비율")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1, help="유효 항목 중 고유 ID 중복 비율")
+    parser.add_argument('--folder-ratio', type=float, default=0.3, help="폴더 비율 (나머지는 압축 파일)")
+    parser.add_argument('--platforms', default='DLsite=5,VNdb=1,Getchu=1,Fanza=1,Steam=1',
+                        help="플랫폼별 가중치 (예: DLsite=5,Steam=1)")
+    parser.add_argument('--file-bytes', type=int, default=0, help="생성 파일 크기(바이트)")
+    parser.add_argument('--rename-count', type=int, default=1000, help="이름 변경 측정 항목 수")
+    parser.add_argument('--repeat', type=int, default=5, help="측정 반복 횟수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--root', default=default_root(), help="테스트 라이브러리 생성 위치 (기본: tmpfs)")
+    parser.add_argument('--keep', action='store_true', help="측정 후 테스트 라이브러리를 삭제하지 않음")
+    parser.add_argument('--output', help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    config = {
+        'size': args.size,
+        'valid_ratio': args.valid_ratio,
+        'duplicate_ratio': args.duplicate_ratio,
+        'folder_ratio': args.folder_ratio,
+        'platforms': parse_platform_weights(args.platforms),
+        'file_bytes': args.file_bytes,
+        'rename_count': args.rename_count,
+        'repeat': args.repeat,
+        'seed': args.seed
+    }
+
+    library = generate_library(args.root, config)
+    try:
+        results, library_stats = run_benchmarks(library, config)
+    finally:
+        if not args.keep:
+            shutil.rmtree(library, ignore_errors=True)
+
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'root': args.root,
+        'config': config,
+        'library': library_stats,
+        'results': results
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,39 @@
-import re
 import os
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog, messagebox
-import requests
-from bs4 import BeautifulSoup
 import time
+import multiprocessing
+import queue
+import threading
 from PIL import Image, ImageTk
 import io
-
-VALID_GENRES = {'RPG', 'ACT', 'SIM', 'ADV', 'VOD', 'SHT', 'NOV', 'ANO'}
-DEFAULT_EXTENSIONS = ['.zip', '.rar', '.7z', '']
-
-def validate_name(name):
-    patterns = [
-        (r'^\[(.+?)\]-\[([RV]J\d+)\] (.+?) \(([A-Z]+)\)_DLsite.*$', 'DLsite'),
-        (r'^\[(.+?)\]-\[(v\d+)\] (.+?) \(([A-Z]+)\)_VNdb.*$', 'VNdb'),
-        (r'^\[(.+?)\]-\[(\d+)\] (.+?) \(([A-Z]+)\)_Getchu.*$', 'Getchu'),
-        (r'^\[(.+?)\]-\[(.+?)\] (.+?) \(([A-Z]+)\)_Fanza.*$', 'Fanza'),
-        (r'^\[(.+?)\]-\[(.+?)\] (.+?) \(([A-Z]+)\)_Steam.*$', 'Steam')
-    ]
-
-    for pattern, platform in patterns:
-        match = re.match(pattern, name)
-        if match:
-            creator, unique_id, game_title, genre = match.groups()
-
-            if genre not in VALID_GENRES:
-                return False, None
-
-            if platform == 'DLsite' and not unique_id.startswith(('RJ', 'VJ')):
-                return False, None
-
-            if platform == 'VNdb' and not unique_id.startswith('v'):
-                return False, None
-
-            if platform == 'Getchu' and not unique_id.isdigit():
-                return False, None
-
-            return True, {
-                "creator": creator,
-                "unique_id": unique_id,
-                "game_title": game_title,
-                "genre": genre,
-                "platform": platform
-            }
-
-    return False, None
-
-def get_items_in_path(path, extensions):
-    items = []
-    for item in os.listdir(path):
-        if os.path.isfile(os.path.join(path, item)):
-            if os.path.splitext(item)[1].lower() in extensions or '' in extensions:
-                items.append(item)
-        elif os.path.isdir(os.path.join(path, item)) and '' in extensions:
-            items.append(item)
-    return items
-
-def classify_items(items):
-    valid_items = []
-    invalid_items = []
-    unique_ids = {}
-    
-    for item in items:
-        is_valid, item_info = validate_name(item)
-        if is_valid:
-            unique_id = item_info['unique_id']
-            if unique_id in unique_ids:
-                unique_ids[unique_id].append(item)
-            else:
-                unique_ids[unique_id] = [item]
-            valid_items.append((item, item_info))
-        else:
-            invalid_items.append(item)
-    
-    duplicate_items = [item for items in unique_ids.values() if len(items) > 1 for item in items]
-    
-    return valid_items, invalid_items, duplicate_items
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import VALID_GENRES, DEFAULT_EXTENSIONS
+from utils import validate_name, scan_items, classify_items_parallel, format_name
+from content_dupes import find_content_duplicates
+from near_duplicates import find_near_duplicates
+from archive_index import ArchiveIndex
+from archive_verify import VerifyManifest, verify_archives, STATUS_TEXT
+from metadata_providers import get_provider, get_session
+from lookup_scheduler import lookup_scheduler
+from metadata_cache import MetadataCache
+from update_checker import check_updates
+from thumb_store import open_store, release_store, make_thumbnail, decode_thumbnail
+from archive_covers import find_cover, read_member
+from disk_usage import GROUP_FIELDS, compute_disk_usage, format_size
+from tag_index import TagIndex
+from crawl_jobs import CrawlJobStore, run_job
+from consistency_check import check_consistency, write_csv
+from sidecar import MODE_TEXT, SidecarWriter, import_folder, load_folder, rename_sidecars
+from dupe_resolver import DEFAULT_RULES, RULES, choose_keeper, move_duplicates, plan_resolution
+from pipeline import STAGE_TEXT as PIPELINE_STAGE_TEXT, STATUS_TEXT as PLAN_STATUS_TEXT, IngestPipeline, format_stats
+from snapshots import CHANGE_TEXT, describe, diff_snapshot_files, list_snapshots, read_meta, save_snapshot
+from http_replay import configure_from_env
+from service import ServiceError, connect_from_env
+from metrics import metrics
 
 class ModernUI:
     @staticmethod
@@ -248,8 +204,84 @@ class ModernDraggableHeaderTreeview(ttk.Treeview):
         if self.ghost_window:
             self.ghost_window.destroy()
 
+def fetch_image(image_url):
+    with metrics.timer("http.fetch"):
+        response = get_session().get(image_url, timeout=15)
+    metrics.increment("http.bytes", len(response.content))
+    response.raise_for_status()
+    return response.content
+
+def save_image(path, name, member, data):
+    # 압축 파일에서 꺼낸 표지를 download_image와 같은 폴더에 저장
+    try:
+        download_dir = os.path.join(path, "downloaded_images")
+        os.makedirs(download_dir, exist_ok=True)
+        file_path = os.path.join(download_dir, os.path.splitext(name)[0] + "_cover" + os.path.splitext(member)[1].lower())
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        messagebox.showinfo("완료", f"이미지가 다음 경로에 저장되었습니다:\n{file_path}")
+    except OSError as e:
+        messagebox.showerror("오류", f"이미지 저장 중 오류 발생:\n{str(e)}")
+
+class ImagePreviewWindow(tk.Toplevel):
+    # load_data는 원본 이미지 바이트를 반환. 웹 이미지와 압축 파일 속 표지가 같은 창을 사용
+    def __init__(self, parent, title, load_data, on_download=None):
+        super().__init__(parent)
+        self.title(title)
+        
+        # 창 크기 및 위치 설정
+        window_width = 800
+        window_height = 600
+        screen_width = self.winfo_screenwidth()
+        screen_height = self.winfo_screenheight()
+        center_x = int(screen_width/2 - window_width/2)
+        center_y = int(screen_height/2 - window_height/2)
+        self.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
+        
+        # 프레임 생성
+        frame = ttk.Frame(self, style='modern.TFrame')
+        frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # 이미지 다운로드 및 표시
+        try:
+            data = load_data()
+            
+            with metrics.timer("image.decode"):
+                # PIL Image로 변환
+                image_data = Image.open(io.BytesIO(data))
+                
+                # 창 크기에 맞게 이미지 리사이즈
+                display_size = (700, 500)  # 여백 고려
+                image_data.thumbnail(display_size, Image.Resampling.LANCZOS)
+                
+                photo = ImageTk.PhotoImage(image_data)
+            
+            # 이미지 라벨
+            image_label = ttk.Label(frame)
+            image_label.configure(image=photo)
+            image_label.image = photo  # 참조 유지
+            image_label.pack(pady=(0, 10))
+            
+            # 다운로드 버튼
+            if on_download is not None:
+                download_button = ttk.Button(
+                    frame,
+                    text="이미지 다운로드",
+                    style='modern.TButton',
+                    command=lambda: on_download(data)
+                )
+                download_button.pack()
+            
+        except Exception as e:
+            error_label = ttk.Label(
+                frame,
+                text=f"이미지 로드 중 오류 발생:\n{str(e)}",
+                style='modern.TLabel'
+            )
+            error_label.pack()
+
 class ModernRenameWindow(tk.Toplevel):
-    def __init__(self, parent, selected_items, path, callback):
+    def __init__(self, parent, selected_items, path, callback, name_infos=None, archive_index=None):
         super().__init__(parent)
         self.title("이름 변경 및 순서 변경")
         
@@ -270,6 +302,10 @@ class ModernRenameWindow(tk.Toplevel):
         self.colors = ModernUI.setup_styles()
         self.is_crawled = False
         self.image_urls = {}  # 이미지 URL을 저장할 딕셔너리 추가
+        self.archive_index = archive_index  # 웹 이미지가 없을 때 압축 파일 속 표지를 찾는 데 사용
+        self.crawl_names = {}  # crawl_tree 항목 -> 파일/폴더명
+        # 이름 -> (is_valid, info). 메인 창에서 분석한 결과를 이어받아 재사용
+        self.name_info_cache = dict(name_infos) if name_infos else {}
 
         self.valid_genres = sorted(list(VALID_GENRES))
         self.valid_platforms = ['DLsite', 'VNdb', 'Getchu', 'Fanza', 'Steam']
@@ -283,6 +319,25 @@ class ModernRenameWindow(tk.Toplevel):
             'platform': '플랫폼'
         }
         self.edit_entries = {}
+
+        # 미리보기 갱신 지연(ms) 및 증분 갱신용 상태
+        self.preview_delay = 150
+        self.preview_after_id = None
+        self.preview_rows = []  # (현재 이름, new_tree 항목, 표시 중인 값)
+        self.preview_key = None
+
+        # 웹 정보 조회 상태
+        self.crawl_rows = {}
+        self.crawl_order = []
+        self.crawl_after_id = None
+        self.crawl_priority_after_id = None
+        self.crawl_job = None
+        self.crawl_store = None  # 조회하는 동안 계속 사용하는 작업 기록/캐시 연결
+        self.crawl_cache = None
+        self.crawl_key_names = {}  # (플랫폼, 고유 ID) -> 파일/폴더명 (폴더에 저장할 때 사용)
+        self.sidecar_writer = None
+        self.sidecar_var = tk.BooleanVar(value=False)
+        self.sidecar_mode_var = tk.StringVar(value=MODE_TEXT['manifest'])
         
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -290,133 +345,7 @@ class ModernRenameWindow(tk.Toplevel):
         self.create_widgets()
 
     def fetch_product_info(self, product_id):
-        base_url = "https://www.dlsite.com/maniax/work/=/product_id/"
-        locale = "/?locale=ko_KR"
-        url = f"{base_url}{product_id}{locale}"
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            return None
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        def get_tag_text(tag, default='N/A'):
-            return tag.get_text(strip=True) if tag else default
-        
-        # 메인 이미지 URL 가져오기 (수정된 부분)
-        try:
-            # 방법 1: 작품 이미지 메타 태그
-            img_tag = soup.find('meta', {'property': 'og:image'})
-            if img_tag and 'content' in img_tag.attrs:
-                image_url = img_tag['content']
-            else:
-                # 방법 2: 메인 이미지 태그
-                img_tag = soup.find('img', {'class': 'slider_item'}) or \
-                         soup.find('img', {'id': 'work_main_img'}) or \
-                         soup.find('img', {'class': 'product-slider-data'}) or \
-                         soup.find('div', {'class': 'product-slider-data'})
-                
-                if img_tag:
-                    image_url = img_tag.get('src') or img_tag.get('data-src')
-                else:
-                    image_url = None
-            
-            # URL이 상대 경로인 경우 절대 경로로 변환
-            if image_url and not image_url.startswith('http'):
-                image_url = 'https:' + image_url
-        except:
-            image_url = None
-
-        print(f"Found image URL: {image_url}")  # 디버깅용 출력
-
-        # 게임 제목
-        title_tag = soup.find('h1', itemprop='name', id='work_name')
-        title = get_tag_text(title_tag)
-        
-        # 서클명
-        try:
-            circle_tag = soup.find('span', itemprop='brand', class_='maker_name').find('a')
-            circle_name = get_tag_text(circle_tag)
-        except:
-            circle_name = 'N/A'
-
-        # 장르
-        genre_tags = soup.find('th', string='장르')
-        if genre_tags:
-            genre_tags = genre_tags.find_next_sibling('td').find_all('a')
-        genres = [get_tag_text(genre) for genre in genre_tags] if genre_tags else []
-
-        # 판매일
-        sales_date_tag = soup.find('th', string='판매일')
-        if sales_date_tag:
-            sales_date_tag = sales_date_tag.find_next_sibling('td').find('a')
-        sales_date = get_tag_text(sales_date_tag)
-
-        # 파일 용량
-        file_size_tag = soup.find('th', string='파일 용량')
-        if file_size_tag:
-            file_size_tag = file_size_tag.find_next_sibling('td').find('div', class_='main_genre')
-        file_size = get_tag_text(file_size_tag)
-        
-        # 파일 용량 변환
-        try:
-            size_str = re.sub(r'[^\d.]', '', file_size)
-            size_num = float(size_str)
-            if 'MB' in file_size:
-                file_size = size_num
-            elif 'GB' in file_size:
-                file_size = size_num * 1024
-            else:
-                file_size = 'Unknown'
-        except:
-            file_size = 'Unknown'
-
-        # 버전 정보
-        btn_ver_up_tag = soup.find('div', class_='btn_ver_up')
-
-        # 일치도 계산
-        confidence = 0
-        if title != 'N/A':
-            confidence += 40
-        if circle_name != 'N/A':
-            confidence += 30
-        if genres:
-            confidence += 30
-            
-        # DLsite의 장르를 프로그램의 장르로 매핑
-        genre_mapping = {
-            'アドベンチャー': 'ADV',
-            'ロールプレイング': 'RPG',
-            'シミュレーション': 'SIM',
-            'アクション': 'ACT',
-            '音声作品': 'VOD',
-            'シューティング': 'SHT',
-            'ノベル': 'NOV',
-            'その他ゲーム': 'ANO'
-        }
-        
-        mapped_genres = []
-        for genre in genres:
-            if genre in genre_mapping:
-                mapped_genres.append(genre_mapping[genre])
-        
-        primary_genre = mapped_genres[0] if mapped_genres else 'ANO'
-
-        return {
-            'Platform': 'DLsite',
-            'Title': title,
-            'Creator': circle_name,
-            'ID': product_id,
-            'Genre': primary_genre,
-            'ReleaseDate': sales_date,
-            'FileSize': f"{file_size:,.0f}MB" if isinstance(file_size, (int, float)) else file_size,
-            'Version': '업데이트 있음' if btn_ver_up_tag else '최신 버전',
-            'Tags': ", ".join(genres),
-            'Confidence': f"{confidence}%",
-            'ImageURL': image_url
-        }
+        return get_provider('DLsite').fetch(product_id)
 
     def download_image(self, url, product_id):
         if not url:
@@ -424,7 +353,9 @@ class ModernRenameWindow(tk.Toplevel):
             return None
             
         try:
-            response = requests.get(url)
+            with metrics.timer("http.fetch"):
+                response = get_session().get(url, timeout=15)
+            metrics.increment("http.bytes", len(response.content))
             response.raise_for_status()
             
             # 다운로드 폴더 생성
@@ -446,60 +377,19 @@ class ModernRenameWindow(tk.Toplevel):
         if not image_url:
             messagebox.showwarning("경고", "이미지를 찾을 수 없습니다.")
             return
-            
-        # 이미지 프리뷰 창 생성
-        preview_window = tk.Toplevel(self)
-        preview_window.title(f"이미지 프리뷰 - {product_id}")
-        
-        # 창 크기 및 위치 설정
-        window_width = 800
-        window_height = 600
-        screen_width = self.winfo_screenwidth()
-        screen_height = self.winfo_screenheight()
-        center_x = int(screen_width/2 - window_width/2)
-        center_y = int(screen_height/2 - window_height/2)
-        preview_window.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
-        
-        # 프레임 생성
-        frame = ttk.Frame(preview_window, style='modern.TFrame')
-        frame.pack(fill="both", expand=True, padx=20, pady=20)
-        
-        # 이미지 다운로드 및 표시
-        try:
-            response = requests.get(image_url)
-            response.raise_for_status()
-            
-            # PIL Image로 변환
-            image_data = Image.open(io.BytesIO(response.content))
-            
-            # 창 크기에 맞게 이미지 리사이즈
-            display_size = (700, 500)  # 여백 고려
-            image_data.thumbnail(display_size, Image.Resampling.LANCZOS)
-            
-            photo = ImageTk.PhotoImage(image_data)
-            
-            # 이미지 라벨
-            image_label = ttk.Label(frame)
-            image_label.configure(image=photo)
-            image_label.image = photo  # 참조 유지
-            image_label.pack(pady=(0, 10))
-            
-            # 다운로드 버튼
-            download_button = ttk.Button(
-                frame,
-                text="이미지 다운로드",
-                style='modern.TButton',
-                command=lambda: self.download_image(image_url, product_id)
-            )
-            download_button.pack()
-            
-        except Exception as e:
-            error_label = ttk.Label(
-                frame,
-                text=f"이미지 로드 중 오류 발생:\n{str(e)}",
-                style='modern.TLabel'
-            )
-            error_label.pack()
+
+        ImagePreviewWindow(self, f"이미지 프리뷰 - {product_id}", lambda: fetch_image(image_url),
+                           lambda data: self.download_image(image_url, product_id))
+
+    def show_archive_cover(self, name):
+        cover = find_cover(self.archive_index, self.path, name)
+        if cover is None:
+            messagebox.showwarning("경고", "이미지를 찾을 수 없습니다.")
+            return
+        archive_path, member = cover
+        ImagePreviewWindow(self, f"이미지 프리뷰 - {name} ({member})",
+                           lambda: read_member(archive_path, member),
+                           lambda data: save_image(self.path, name, member, data))
 
     def create_widgets(self):
         main_frame = ttk.Frame(self, style='modern.TFrame')
@@ -591,63 +481,110 @@ class ModernRenameWindow(tk.Toplevel):
                                    values=self.valid_genres,
                                    font=('Malgun Gothic', 9),
                                    state="readonly")
-                entry.bind('<<ComboboxSelected>>', lambda e: self.update_preview_list())
+                entry.bind('<<ComboboxSelected>>', lambda e: self.schedule_preview_update())
             elif part == 'platform':
                 entry = ttk.Combobox(row_frame, 
                                    values=self.valid_platforms,
                                    font=('Malgun Gothic', 9),
                                    state="readonly")
-                entry.bind('<<ComboboxSelected>>', lambda e: self.update_preview_list())
+                entry.bind('<<ComboboxSelected>>', lambda e: self.schedule_preview_update())
             else:
                 entry = tk.Entry(row_frame, font=('Malgun Gothic', 9))
                 entry.configure(background='white')
-                entry.bind('<KeyRelease>', lambda e: self.update_preview_list())
+                entry.bind('<KeyRelease>', lambda e: self.schedule_preview_update())
             
             entry.grid(row=0, column=1, sticky="ew")
             self.edit_entries[part] = entry
             
             row_frame.grid_columnconfigure(1, weight=1)
             
+    def schedule_preview_update(self):
+        # 연속 입력 시 마지막 입력 후에만 미리보기를 갱신
+        if self.preview_after_id is not None:
+            self.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.after(self.preview_delay, self.update_preview_list)
+
+    def get_name_info(self, name):
+        if name not in self.name_info_cache:
+            self.name_info_cache[name] = validate_name(name)
+        return self.name_info_cache[name]
+
+    def invalidate_name_info(self, old_name):
+        self.name_info_cache.pop(old_name, None)
+
+    def get_display_values(self, info, overrides):
+        display_info = info.copy()
+        display_info.update(overrides)
+        return (
+            display_info['creator'],
+            display_info['unique_id'],
+            display_info['game_title'],
+            display_info['genre'],
+            display_info['platform']
+        )
+
     def update_preview_list(self):
-        self.current_tree.delete(*self.current_tree.get_children())
-        self.new_tree.delete(*self.new_tree.get_children())
-        
-        selected_items = self.item_tree.selection()
-        
-        for item in selected_items:
-            old_name = self.item_tree.item(item)['values'][0]
-            is_valid, info = validate_name(old_name)
-            
-            if is_valid:
-                self.current_tree.insert("", "end", values=(
-                    info['creator'],
-                    info['unique_id'],
-                    info['game_title'],
-                    info['genre'],
-                    info['platform']
-                ))
+        if self.preview_after_id is not None:
+            self.after_cancel(self.preview_after_id)
+            self.preview_after_id = None
 
-                display_info = info.copy()
-                if len(selected_items) > 1:
-                    for part in self.name_parts:
-                        current_value = self.edit_entries[part].get()
-                        if current_value and current_value != "(다중 선택)":
-                            display_info[part] = current_value
-                else:
-                    for part in self.name_parts:
-                        display_info[part] = self.edit_entries[part].get()
-                
-                self.new_tree.insert("", "end", values=(
-                    display_info['creator'],
-                    display_info['unique_id'],
-                    display_info['game_title'],
-                    display_info['genre'],
-                    display_info['platform']
-                ))
+        selected_items = self.item_tree.selection()
+        names = [self.item_tree.item(item)['values'][0] for item in selected_items]
+
+        # 편집 값은 항목마다 읽지 않고 한 번만 읽음
+        overrides = {}
+        for part in self.name_parts:
+            current_value = self.edit_entries[part].get()
+            if len(selected_items) > 1:
+                if current_value and current_value != "(다중 선택)":
+                    overrides[part] = current_value
             else:
-                empty_values = ("-", "-", "-", "-", "-")
-                self.current_tree.insert("", "end", values=empty_values)
-                self.new_tree.insert("", "end", values=empty_values)
+                overrides[part] = current_value
+
+        empty_values = ("-", "-", "-", "-", "-")
+        preview_key = tuple(zip(selected_items, names))
+
+        if preview_key != self.preview_key:
+            # 선택 항목이나 이름이 바뀐 경우에만 전체 목록을 다시 구성
+            self.current_tree.delete(*self.current_tree.get_children())
+            self.new_tree.delete(*self.new_tree.get_children())
+            self.preview_rows = []
+
+            for item, old_name in zip(selected_items, names):
+                is_valid, info = self.get_name_info(old_name)
+                if is_valid:
+                    current_values = self.get_display_values(info, {})
+                    new_values = self.get_display_values(info, overrides)
+                else:
+                    current_values = new_values = empty_values
+                self.current_tree.insert("", "end", values=current_values)
+                new_row = self.new_tree.insert("", "end", values=new_values)
+                self.preview_rows.append((old_name, new_row, new_values))
+
+            self.preview_key = preview_key
+            return
+
+        # 편집 값만 바뀐 경우 변경된 새 이름 셀만 갱신
+        for i, (old_name, new_row, old_values) in enumerate(self.preview_rows):
+            is_valid, info = self.get_name_info(old_name)
+            if not is_valid:
+                continue
+            new_values = self.get_display_values(info, overrides)
+            if new_values != old_values:
+                self.new_tree.item(new_row, values=new_values)
+                self.preview_rows[i] = (old_name, new_row, new_values)
+
+    def destroy(self):
+        # 창을 닫으면 아직 보내지 않은 조회는 취소
+        lookup_scheduler.cancel(self)
+        self.close_sidecar_writer()
+        for attr in ('preview_after_id', 'crawl_after_id', 'crawl_priority_after_id'):
+            after_id = getattr(self, attr)
+            if after_id is not None:
+                self.after_cancel(after_id)
+                setattr(self, attr, None)
+        self.close_crawl_storage()
+        super().destroy()
 
     def create_preview_list(self, parent):
         preview_frame = ttk.LabelFrame(parent, text="미리보기", style='modern.TLabelframe')
@@ -744,6 +681,7 @@ class ModernRenameWindow(tk.Toplevel):
         crawling_container.grid_columnconfigure(0, weight=1)
 
         crawl_y_scroll = ttk.Scrollbar(crawling_container, orient="vertical")
+        self.crawl_y_scroll = crawl_y_scroll
         crawl_x_scroll = ttk.Scrollbar(crawling_container, orient="horizontal")
 
         self.crawl_tree = ModernDraggableHeaderTreeview(
@@ -751,7 +689,7 @@ class ModernRenameWindow(tk.Toplevel):
             columns=("Platform", "Title", "Creator", "ID", "Genre", "ReleaseDate", "FileSize", "Version", "Tags", "Confidence", "Image"),
             show="headings",
             style='modern.Treeview',
-            yscrollcommand=crawl_y_scroll.set,
+            yscrollcommand=self.on_crawl_scroll,
             xscrollcommand=crawl_x_scroll.set
         )
 
@@ -801,6 +739,16 @@ class ModernRenameWindow(tk.Toplevel):
                   style='modern.TButton',
                   command=self.crawl_info).grid(row=0, column=1, sticky="w")
 
+        # 조회 결과를 라이브러리 폴더에도 저장하여 다른 컴퓨터로 옮겨도 다시 조회하지 않도록 함
+        ttk.Checkbutton(button_frame,
+                        text="폴더에 웹 정보 저장",
+                        variable=self.sidecar_var).grid(row=0, column=2, sticky="w", padx=(20, 5))
+        ttk.Combobox(button_frame,
+                     textvariable=self.sidecar_mode_var,
+                     values=list(MODE_TEXT.values()),
+                     state="readonly",
+                     width=12).grid(row=0, column=3, sticky="w")
+
     def on_tree_double_click(self, event):
         selection = self.crawl_tree.selection()
         if not selection:
@@ -815,13 +763,21 @@ class ModernRenameWindow(tk.Toplevel):
         if image_url:
             self.show_image_preview(image_url, item_id)
         else:
-            messagebox.showwarning("경고", "이미지를 찾을 수 없습니다.")
+            # 웹 이미지가 없으면 압축 파일 속 표지를 표시
+            self.show_archive_cover(self.crawl_names.get(item))
 
     def crawl_info(self):
         selected_items = self.item_tree.selection()
         if not selected_items:
             messagebox.showwarning("경고", "크롤링할 항목을 선택해주세요.")
             return
+
+        # 진행 중인 조회가 있으면 중단하고 다시 시작
+        if self.crawl_after_id is not None:
+            self.after_cancel(self.crawl_after_id)
+            self.crawl_after_id = None
+            if self.crawl_progress[0].winfo_exists():
+                self.crawl_progress[0].destroy()
         
         # 진행 상황을 보여주는 프로그레스 창 생성
         progress_window = tk.Toplevel(self)
@@ -854,62 +810,194 @@ class ModernRenameWindow(tk.Toplevel):
         progress_bar.pack(pady=10)
         
         # 크롤링 결과 트리 초기화
+        lookup_scheduler.cancel(self)  # 이전 조회 중 남은 것은 취소
         self.crawl_tree.delete(*self.crawl_tree.get_children())
         
         total_items = len(selected_items)
         progress_bar['maximum'] = total_items
-        
-        def process_items():
-            self.is_crawled = False  # 크롤링 시작 시 False로 설정
-            for i, item in enumerate(selected_items, 1):
-                old_name = self.item_tree.item(item)['values'][0]
-                is_valid, info = validate_name(old_name)
-                
-                # 진행 상황 업데이트
-                progress_label['text'] = f"크롤링 진행 중... ({i}/{total_items})"
-                progress_bar['value'] = i
-                
-                if is_valid and info['platform'] == 'DLsite':
-                    crawled_info = self.fetch_product_info(info['unique_id'])
-                    if crawled_info:
-                        tree_item = self.crawl_tree.insert("", "end", values=(
-                            crawled_info['Platform'],
-                            crawled_info['Title'],
-                            crawled_info['Creator'],
-                            crawled_info['ID'],
-                            crawled_info['Genre'],
-                            crawled_info['ReleaseDate'],
-                            crawled_info['FileSize'],
-                            crawled_info['Version'],
-                            crawled_info['Tags'],
-                            crawled_info['Confidence'],
-                            "보기" if crawled_info['ImageURL'] else "없음"
-                        ))
-                        # 이미지 URL을 딕셔너리에 저장
-                        self.image_urls[tree_item] = crawled_info['ImageURL']
-                    else:
-                        self.crawl_tree.insert("", "end", values=(
-                            'DLsite', '조회 실패', '-', info['unique_id'], '-', '-', '-', '-', '-', '0%', '-'
-                        ))
-                else:
-                    self.crawl_tree.insert("", "end", values=(
-                        'DLsite', '유효하지 않은 이름', '-', '-', '-', '-', '-', '-', '-', '0%', '-'
-                    ))
-                
-                # 각 아이템 처리 후 1초 대기
-                time.sleep(1)
-                
-                # GUI 업데이트
-                self.update()
-            
-            # 크롤링 완료 후
-            self.is_crawled = True  # 크롤링 완료 표시
+        self.crawl_progress = (progress_window, progress_label, progress_bar)
+        self.is_crawled = False  # 크롤링 시작 시 False로 설정
+
+        # 선택 순서대로 행을 먼저 만들고, 같은 ID가 여러 행에 있으면 한 번만 조회
+        self.crawl_rows = {}  # (플랫폼, 고유 ID) -> [crawl_tree 항목]
+        self.crawl_order = []  # 행 순서대로의 키 (유효하지 않은 이름은 None)
+        self.crawl_names = {}
+        self.crawl_key_names = {}
+        for item in selected_items:
+            old_name = self.item_tree.item(item)['values'][0]
+            is_valid, info = self.get_name_info(old_name)
+
+            if is_valid and get_provider(info['platform']):
+                tree_item = self.crawl_tree.insert("", "end", values=(
+                    info['platform'], '조회 중', '-', info['unique_id'], '-', '-', '-', '-', '-', '-', '-'
+                ))
+                key = (info['platform'], info['unique_id'])
+                self.crawl_rows.setdefault(key, []).append(tree_item)
+                self.crawl_order.append(key)
+                self.crawl_key_names.setdefault(key, old_name)
+            else:
+                tree_item = self.crawl_tree.insert("", "end", values=(
+                    '-', '유효하지 않은 이름', '-', '-', '-', '-', '-', '-', '-', '0%', '-'
+                ))
+                self.crawl_order.append(None)
+            self.crawl_names[tree_item] = old_name
+        self.crawl_done = total_items - sum(len(rows) for rows in self.crawl_rows.values())
+
+        # 폴더에 저장된 웹 정보가 있는 항목은 다시 조회하지 않음
+        self.close_sidecar_writer()
+        if self.sidecar_var.get():
+            mode = next(mode for mode, text in MODE_TEXT.items() if text == self.sidecar_mode_var.get())
+            self.sidecar_writer = SidecarWriter(self.path, mode)
+            for key, entry in load_folder(self.path).items():
+                for tree_item in self.crawl_rows.pop(key, []):
+                    self.fill_crawl_row(tree_item, key[0], key[1], entry['info'])
+                    self.crawl_done += 1
+
+        # 같은 항목을 조회하다 중단된 작업이 있으면 이어서 실행. 끝난 항목은 저장된 결과를 사용
+        self.close_crawl_storage()
+        self.crawl_store = CrawlJobStore()
+        self.crawl_cache = MetadataCache()
+        self.crawl_job, resumed = self.crawl_store.find_or_create("이름 변경 창", list(self.crawl_rows))
+        done_keys = self.crawl_store.keys(self.crawl_job, 'done') if resumed else []
+        for platform in {key[0] for key in done_keys}:
+            rows = self.crawl_cache.load(platform, [key[1] for key in done_keys if key[0] == platform])
+            for unique_id, row in rows.items():
+                if row['info'] and (platform, unique_id) in self.crawl_rows:
+                    for tree_item in self.crawl_rows.pop((platform, unique_id)):
+                        self.fill_crawl_row(tree_item, platform, unique_id, row['info'])
+                        self.crawl_done += 1
+
+        # 결과 탭을 먼저 보여주고 화면에 보이는 행부터 조회
+        self.preview_notebook.select(2)
+        self.crawl_tree.update_idletasks()
+        self.crawl_results = queue.Queue()
+        priorities = self.get_crawl_priorities()
+        for key in self.crawl_rows:
+            lookup_scheduler.submit(key[0], key[1], self,
+                                    lambda key, info, results=self.crawl_results: results.put((key, info)),
+                                    priorities.get(key, 0))
+        self.poll_crawl_results()
+
+    def get_crawl_priorities(self):
+        # 보이는 행은 0, 나머지는 화면에서 떨어진 행 수를 우선순위로 사용
+        first, last = self.crawl_tree.yview()
+        count = len(self.crawl_order)
+        top = int(first * count)
+        bottom = max(top + 1, int(last * count + 0.5))
+        priorities = {}
+        for index, key in enumerate(self.crawl_order):
+            if key is None or key not in self.crawl_rows:
+                continue
+            if index < top:
+                distance = top - index
+            elif index >= bottom:
+                distance = index - bottom + 1
+            else:
+                distance = 0
+            priorities[key] = min(priorities.get(key, distance), distance)
+        return priorities
+
+    def on_crawl_scroll(self, first, last):
+        self.crawl_y_scroll.set(first, last)
+        if self.crawl_rows and self.crawl_priority_after_id is None:
+            self.crawl_priority_after_id = self.after(200, self.update_crawl_priorities)
+
+    def update_crawl_priorities(self):
+        self.crawl_priority_after_id = None
+        if self.crawl_rows:
+            lookup_scheduler.set_priorities(self, self.get_crawl_priorities())
+
+    def poll_crawl_results(self):
+        self.crawl_after_id = None
+        crawled = []
+        results = []
+        try:
+            while True:
+                key, crawled_info = self.crawl_results.get_nowait()
+                for tree_item in self.crawl_rows.pop(key, []):
+                    self.fill_crawl_row(tree_item, key[0], key[1], crawled_info)
+                    self.crawl_done += 1
+                if crawled_info:
+                    crawled.append((key, crawled_info))
+                    if self.sidecar_writer is not None:
+                        self.add_sidecar(key, crawled_info)
+                results.append((key, bool(crawled_info)))
+        except queue.Empty:
+            pass
+        if crawled:
+            # 태그 검색과 표지 모아보기에서 다시 사용하도록 저장
+            for key, crawled_info in crawled:
+                self.crawl_cache.put_info(key[0], key[1], crawled_info, time.time())
+            self.crawl_cache.commit()
+        # 결과를 저장한 뒤에 작업 상태를 기록. 중단되면 다음에 남은 항목만 조회
+        if results:
+            self.crawl_store.mark_many(self.crawl_job, results)
+        if not self.crawl_rows:
+            self.crawl_store.finish_if_done(self.crawl_job)
+
+        progress_window, progress_label, progress_bar = self.crawl_progress
+        total_items = len(self.crawl_order)
+        if progress_window.winfo_exists():
+            progress_label['text'] = f"크롤링 진행 중... ({self.crawl_done}/{total_items})"
+            progress_bar['value'] = self.crawl_done
+
+        if self.crawl_rows:
+            self.crawl_after_id = self.after(100, self.poll_crawl_results)
+            return
+
+        # 크롤링 완료 후
+        self.is_crawled = True  # 크롤링 완료 표시
+        self.close_sidecar_writer()
+        self.close_crawl_storage()
+        if progress_window.winfo_exists():
             progress_window.destroy()
-            self.preview_notebook.select(2)  # 크롤링 결과 탭으로 전환
-            messagebox.showinfo("완료", "크롤링이 완료되었습니다.")
-        
-        # 별도 스레드에서 실행하지 않고 메인 스레드에서 처리
-        self.after(100, process_items)
+        messagebox.showinfo("완료", "크롤링이 완료되었습니다.")
+
+    def close_crawl_storage(self):
+        if self.crawl_cache is not None:
+            self.crawl_cache.close()
+            self.crawl_cache = None
+        if self.crawl_store is not None:
+            self.crawl_store.close()
+            self.crawl_store = None
+
+    def add_sidecar(self, key, crawled_info):
+        try:
+            self.sidecar_writer.add(self.crawl_key_names[key], crawled_info)
+        except OSError as e:
+            # 읽기 전용 공유 폴더 등. 이번 조회에서는 더 저장하지 않음
+            self.sidecar_writer = None
+            messagebox.showwarning("경고", f"폴더에 웹 정보를 저장하지 못했습니다:\n{str(e)}", parent=self)
+
+    def close_sidecar_writer(self):
+        writer, self.sidecar_writer = self.sidecar_writer, None
+        if writer is not None:
+            try:
+                writer.close()
+            except OSError as e:
+                messagebox.showwarning("경고", f"폴더에 웹 정보를 저장하지 못했습니다:\n{str(e)}", parent=self)
+
+    def fill_crawl_row(self, tree_item, platform, unique_id, crawled_info):
+        if crawled_info:
+            self.crawl_tree.item(tree_item, values=(
+                crawled_info['Platform'],
+                crawled_info['Title'],
+                crawled_info['Creator'],
+                crawled_info['ID'],
+                crawled_info['Genre'],
+                crawled_info['ReleaseDate'],
+                crawled_info['FileSize'],
+                crawled_info['Version'],
+                crawled_info['Tags'],
+                crawled_info['Confidence'],
+                "보기" if crawled_info['ImageURL'] else "없음"
+            ))
+            # 이미지 URL을 딕셔너리에 저장
+            self.image_urls[tree_item] = crawled_info['ImageURL']
+        else:
+            self.crawl_tree.item(tree_item, values=(
+                platform, '조회 실패', '-', unique_id, '-', '-', '-', '-', '-', '0%', '-'
+            ))
 
     def on_item_select(self, event):
         selected_items = self.item_tree.selection()
@@ -924,7 +1012,7 @@ class ModernRenameWindow(tk.Toplevel):
         elif len(selected_items) == 1:
             # 단일 선택 시 
             item = self.item_tree.item(selected_items[0])['values'][0]
-            is_valid, info = validate_name(item)
+            is_valid, info = self.get_name_info(item)
             if is_valid:
                 for part in self.name_parts:
                     if part in ['genre', 'platform']:
@@ -943,7 +1031,7 @@ class ModernRenameWindow(tk.Toplevel):
         self.update_preview_list()
 
     def get_new_name(self, old_name):
-        is_valid, info = validate_name(old_name)
+        is_valid, info = self.get_name_info(old_name)
         if is_valid:
             if len(self.item_tree.selection()) == 1:
                 new_info = {part: self.edit_entries[part].get() for part in self.name_parts}
@@ -954,8 +1042,7 @@ class ModernRenameWindow(tk.Toplevel):
                     if current_value and current_value != "(다중 선택)":
                         new_info[part] = current_value
 
-            ordered_parts = [new_info[part] for part in self.name_parts]
-            return f"[{ordered_parts[0]}]-[{ordered_parts[1]}] {ordered_parts[2]} ({ordered_parts[3]})_{ordered_parts[4]}"
+            return format_name(new_info)
         return old_name
 
     def apply_changes(self):
@@ -970,6 +1057,7 @@ class ModernRenameWindow(tk.Toplevel):
             new_name = self.get_new_name(old_name)
             if old_name != new_name:
                 if self.perform_rename(old_name, new_name):
+                    self.invalidate_name_info(old_name)
                     self.item_tree.item(item, values=(new_name,))
                     renamed_count += 1
 
@@ -988,15 +1076,1199 @@ class ModernRenameWindow(tk.Toplevel):
 
        try:
            os.rename(old_path, new_path)
-           return True
        except Exception as e:
            messagebox.showerror("오류", f"{old_name} 변경 중 오류 발생:\n{str(e)}")
            return False
+       try:
+           rename_sidecars(self.path, old_name, os.path.basename(new_path))
+       except OSError:
+           pass  # 항목별 파일을 옮기지 못해도 폴더 목록 파일과 캐시의 정보는 ID로 찾을 수 있음
+       return True
+
+class DiagnosticsWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("진단 정보")
+        self.geometry("900x600")
+        self.minsize(700, 400)
+        self.configure(bg='#ECF0F1')
+
+        self.colors = ModernUI.setup_styles()
+        self.refresh_interval = 1000
+        self.refresh_after_id = None
+        self.detailed_var = tk.BooleanVar(value=metrics.detailed)
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, style='modern.TFrame')
+        main_frame.grid(row=0, column=0, sticky="nsew", padx=20, pady=20)
+        main_frame.grid_rowconfigure(0, weight=1)
+        main_frame.grid_columnconfigure(0, weight=1)
+
+        notebook = ttk.Notebook(main_frame, style='modern.TNotebook')
+        notebook.grid(row=0, column=0, sticky="nsew")
+
+        # 측정값 탭
+        metrics_tab = ttk.Frame(notebook, style='modern.TFrame')
+        notebook.add(metrics_tab, text="측정값")
+        metrics_tab.grid_rowconfigure(0, weight=1)
+        metrics_tab.grid_columnconfigure(0, weight=1)
+
+        y_scroll = ttk.Scrollbar(metrics_tab, orient="vertical")
+        self.metrics_tree = ttk.Treeview(
+            metrics_tab,
+            columns=("Name", "Count", "Total", "Avg", "Min", "Max"),
+            show="headings",
+            style='modern.Treeview',
+            yscrollcommand=y_scroll.set
+        )
+        y_scroll.config(command=self.metrics_tree.yview)
+
+        metric_columns = {
+            "Name": ("항목", 250),
+            "Count": ("횟수", 80),
+            "Total": ("합계(ms)", 100),
+            "Avg": ("평균(ms)", 100),
+            "Min": ("최소(ms)", 100),
+            "Max": ("최대(ms)", 100)
+        }
+        for col, (text, width) in metric_columns.items():
+            self.metrics_tree.heading(col, text=text)
+            self.metrics_tree.column(col, width=width, minwidth=50)
+
+        self.metrics_tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+
+        # 프로파일 탭
+        profile_tab = ttk.Frame(notebook, style='modern.TFrame')
+        notebook.add(profile_tab, text="프로파일")
+        profile_tab.grid_rowconfigure(0, weight=1)
+        profile_tab.grid_columnconfigure(0, weight=1)
+
+        self.profile_text = tk.Text(profile_tab, font=('Consolas', 9), wrap="none")
+        self.profile_text.grid(row=0, column=0, sticky="nsew")
+
+        button_frame = ttk.Frame(main_frame, style='modern.TFrame')
+        button_frame.grid(row=1, column=0, sticky="ew", pady=(10, 0))
+
+        ttk.Checkbutton(button_frame,
+                        text="세부 측정 (정규식 패턴별)",
+                        variable=self.detailed_var,
+                        style='modern.TCheckbutton',
+                        command=self.toggle_detailed).pack(side="left", padx=(0, 10))
+
+        self.profile_button = ttk.Button(button_frame,
+                                         text="프로파일링 시작",
+                                         style='modern.TButton',
+                                         command=self.toggle_profiling)
+        self.profile_button.pack(side="left", padx=(0, 10))
+
+        ttk.Button(button_frame,
+                   text="초기화",
+                   style='modern.TButton',
+                   command=self.reset_metrics).pack(side="left", padx=(0, 10))
+
+        ttk.Button(button_frame,
+                   text="파일로 저장",
+                   style='modern.TButton',
+                   command=self.dump_metrics).pack(side="left")
+
+        if metrics.is_profiling:
+            self.profile_button.configure(text="프로파일링 중지")
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        rows = []
+        for name, timer in sorted(snapshot['timers'].items()):
+            rows.append((f"timer:{name}", (
+                name,
+                timer['count'],
+                f"{timer['total'] * 1000:,.1f}",
+                f"{timer['avg'] * 1000:,.3f}",
+                f"{timer['min'] * 1000:,.3f}",
+                f"{timer['max'] * 1000:,.3f}"
+            )))
+        for name, value in sorted(snapshot['counters'].items()):
+            rows.append((f"counter:{name}", (name, f"{value:,}", "-", "-", "-", "-")))
+
+        # 스크롤 위치가 유지되도록 기존 행은 값만 갱신
+        for row_id, values in rows:
+            if self.metrics_tree.exists(row_id):
+                self.metrics_tree.item(row_id, values=values)
+            else:
+                self.metrics_tree.insert("", "end", iid=row_id, values=values)
+
+        self.refresh_after_id = self.after(self.refresh_interval, self.refresh)
+
+    def toggle_detailed(self):
+        metrics.detailed = self.detailed_var.get()
+
+    def toggle_profiling(self):
+        if metrics.is_profiling:
+            result = metrics.stop_profiling()
+            self.profile_button.configure(text="프로파일링 시작")
+            self.show_profile(result)
+        else:
+            metrics.start_profiling()
+            self.profile_button.configure(text="프로파일링 중지")
+
+    def show_profile(self, result):
+        self.profile_text.delete("1.0", tk.END)
+        if not result:
+            return
+        self.profile_text.insert(tk.END, result['cpu'])
+        self.profile_text.insert(tk.END,
+                                 f"\n메모리 사용량: 현재 {result['memory_current']:,} B, "
+                                 f"최대 {result['memory_peak']:,} B\n\n")
+        self.profile_text.insert(tk.END, "\n".join(result['memory_top']))
+
+    def reset_metrics(self):
+        metrics.reset()
+        self.metrics_tree.delete(*self.metrics_tree.get_children())
+        self.profile_text.delete("1.0", tk.END)
+
+    def dump_metrics(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            initialfile=f"diagnostics_{time.strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if not file_path:
+            return
+        try:
+            metrics.dump(file_path)
+            messagebox.showinfo("완료", f"진단 정보가 다음 경로에 저장되었습니다:\n{file_path}", parent=self)
+        except OSError as e:
+            messagebox.showerror("오류", f"진단 정보 저장 중 오류 발생:\n{str(e)}", parent=self)
+
+    def destroy(self):
+        if self.refresh_after_id is not None:
+            self.after_cancel(self.refresh_after_id)
+            self.refresh_after_id = None
+        super().destroy()
+
+class BackgroundTask:
+    # 작업 스레드의 진행 상황과 결과를 after 폴링으로 GUI 스레드에 전달
+    def __init__(self, parent, title, func, on_done, poll_interval=100, on_cancel=None):
+        self.parent = parent
+        self.func = func
+        self.on_done = on_done
+        self.on_cancel = on_cancel
+        self.cancelled = False
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue()
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+
+        window_width = 300
+        window_height = 100
+        screen_width = parent.winfo_screenwidth()
+        screen_height = parent.winfo_screenheight()
+        center_x = int(screen_width/2 - window_width/2)
+        center_y = int(screen_height/2 - window_height/2)
+        self.window.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
+
+        self.label = ttk.Label(self.window, text=f"{title}...", font=('Malgun Gothic', 9))
+        self.label.pack(pady=10)
+
+        self.progress_bar = ttk.Progressbar(self.window, mode='determinate', length=200)
+        self.progress_bar.pack(pady=10)
+
+        if on_cancel is not None:
+            # 창을 닫으면 작업에 중단을 요청하고, 작업이 끝난 지점까지의 결과를 받음
+            self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.parent.after(self.poll_interval, self.poll)
+
+    def cancel(self):
+        self.cancelled = True
+        self.on_cancel()
+        self.label['text'] = "중단하는 중..."
+
+    def run(self):
+        try:
+            self.queue.put(('done', self.func(self.report)))
+        except Exception as e:
+            self.queue.put(('error', e))
+
+    def report(self, text, done, total):
+        self.queue.put(('progress', (text, done, total)))
+
+    def poll(self):
+        try:
+            while True:
+                kind, value = self.queue.get_nowait()
+                if kind == 'progress':
+                    # 진행 창을 닫아도 작업은 계속되므로 결과는 받고 진행 표시만 건너뜀
+                    if self.cancelled or not self.window.winfo_exists():
+                        continue
+                    text, done, total = value
+                    self.label['text'] = f"{text} ({done}/{total})"
+                    self.progress_bar['maximum'] = max(total, 1)
+                    self.progress_bar['value'] = done
+                    continue
+                if self.window.winfo_exists():
+                    self.window.destroy()
+                if kind == 'done':
+                    self.on_done(value)
+                else:
+                    messagebox.showerror("오류", f"작업 중 오류 발생:\n{str(value)}")
+                return
+        except queue.Empty:
+            pass
+        self.parent.after(self.poll_interval, self.poll)
+
+class GroupedResultWindow(tk.Toplevel):
+    # groups: (그룹 이름, 값, 하위 항목 목록) 목록. 하위 항목은 이름 또는 (이름, 값)
+    def __init__(self, parent, title, value_title, groups):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("900x500")
+        self.configure(bg='#ECF0F1')
+
+        self.colors = ModernUI.setup_styles()
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        container = ttk.Frame(self, style='modern.TFrame')
+        container.grid(row=0, column=0, sticky="nsew", padx=20, pady=20)
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+
+        y_scroll = ttk.Scrollbar(container, orient="vertical")
+        self.group_tree = ttk.Treeview(
+            container,
+            columns=("Value",),
+            show="tree headings",
+            style='modern.Treeview',
+            yscrollcommand=y_scroll.set
+        )
+        y_scroll.config(command=self.group_tree.yview)
+
+        self.group_tree.heading("#0", text="파일/폴더명")
+        self.group_tree.heading("Value", text=value_title)
+        self.group_tree.column("#0", width=650, minwidth=200)
+        self.group_tree.column("Value", width=150, minwidth=80)
+
+        self.group_tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+
+        for text, value, children in groups:
+            group = self.group_tree.insert("", "end", text=text, values=(value,), open=True)
+            for child in children:
+                child_text, child_value = child if isinstance(child, tuple) else (child, "")
+                self.group_tree.insert(group, "end", text=child_text, values=(child_value,))
+
+class GalleryWindow(tk.Toplevel):
+    # 화면 근처의 타일만 그리고, 표지는 작업 스레드에서 받아 축소/디코딩
+    tile_width = 180
+    tile_height = 220
+    prefetch_rows = 2
+    max_photos = 400
+
+    def __init__(self, parent, names, name_infos, on_select=None, path=None, item_stats=None, archive_index=None):
+        super().__init__(parent)
+        self.title(f"표지 모아보기 ({len(names)}개)")
+
+        window_width = 1200
+        window_height = 800
+        screen_width = self.winfo_screenwidth()
+        screen_height = self.winfo_screenheight()
+        center_x = int(screen_width/2 - window_width/2)
+        center_y = int(screen_height/2 - window_height/2)
+        self.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
+        self.configure(bg='#ECF0F1')
+        self.colors = ModernUI.setup_styles()
+
+        self.names = names
+        self.on_select = on_select
+        self.path = path
+        self.item_stats = item_stats or {}
+        self.archive_index = archive_index
+        self.archive_sources = {}  # 압축 파일 표지 키 -> (압축 파일 경로, 멤버)
+        self.archive_checked = set()  # 압축 파일 표지를 찾아본 번호
+        self.keys = [self.cover_key(name_infos.get(name)) for name in names]
+        self.store = open_store()
+        self.metadata_cache = MetadataCache()
+        self.image_urls = self.load_image_urls()  # (플랫폼, 고유 ID) -> 이미지 URL. 조회했지만 없으면 None
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.results = queue.Queue()
+        self.jobs = {}  # 키 -> 표지 작업
+        self.lookups = set()  # 웹 정보 조회를 기다리는 키
+        self.missing = set()
+        self.photos = OrderedDict()  # 키 -> PhotoImage (최근 사용 순)
+        self.tiles = {}  # 번호 -> (테두리, 이미지, 상태 글자) canvas 항목
+        self.columns = 0
+        self.selected = None
+        self.refresh_after_id = None
+
+        self.create_widgets()
+        self.poll_after_id = self.after(50, self.poll_results)
+
+    def cover_key(self, name_info):
+        if not name_info or not name_info[0] or get_provider(name_info[1]['platform']) is None:
+            return None
+        info = name_info[1]
+        return (info['platform'], info['unique_id'])
+
+    def store_key(self, key):
+        if key[0] == 'archive':
+            return key[1]
+        return f"{key[0]}:{key[1]}"
+
+    def resolve_key(self, index):
+        # 웹 표지가 없거나 받을 수 없으면(오프라인 등) 압축 파일 속 표지로 대체
+        key = self.keys[index]
+        if (key is None or key in self.missing) and index not in self.archive_checked:
+            self.archive_checked.add(index)
+            name = self.names[index]
+            cover = find_cover(self.archive_index, self.path, name)
+            stat = self.item_stats.get(name)
+            if cover is not None and stat is not None:
+                archive_path, member = cover
+                key = ('archive', f"archive:{os.path.abspath(archive_path)}:{stat['size']}:{stat['mtime']}:{member}")
+                self.archive_sources[key] = cover
+                self.keys[index] = key
+        return key
+
+    def load_image_urls(self):
+        ids = {}
+        for key in set(self.keys):
+            if key is not None:
+                ids.setdefault(key[0], []).append(key[1])
+        image_urls = {}
+        for platform, unique_ids in ids.items():
+            for unique_id, row in self.metadata_cache.load(platform, unique_ids).items():
+                if row['info']:
+                    image_urls[(platform, unique_id)] = row['info'].get('ImageURL')
+        return image_urls
+
+    def create_widgets(self):
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(self, bg='white', highlightthickness=0, yscrollincrement=20)
+        self.y_scroll = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.y_scroll.grid(row=0, column=1, sticky="ns")
+
+        self.canvas.bind('<Configure>', lambda e: self.schedule_refresh())
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.canvas.bind('<Double-1>', self.on_double_click)
+        self.canvas.bind('<MouseWheel>', lambda e: self.canvas.yview_scroll(int(-e.delta / 40), 'units'))
+        self.canvas.bind('<Button-4>', lambda e: self.canvas.yview_scroll(-3, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.canvas.yview_scroll(3, 'units'))
+
+    def on_scroll(self, first, last):
+        self.y_scroll.set(first, last)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        if self.refresh_after_id is None:
+            self.refresh_after_id = self.after(30, self.refresh)
+
+    def refresh(self):
+        self.refresh_after_id = None
+        columns = max(1, self.canvas.winfo_width() // self.tile_width)
+        if columns != self.columns:
+            # 창 너비가 바뀌면 타일 위치가 달라지므로 다시 그림
+            self.columns = columns
+            self.canvas.delete('tile')
+            self.tiles.clear()
+            rows = (len(self.names) + columns - 1) // columns
+            self.canvas.configure(scrollregion=(0, 0, columns * self.tile_width, rows * self.tile_height))
+
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int(top // self.tile_height) - self.prefetch_rows)
+        last_row = int(bottom // self.tile_height) + self.prefetch_rows
+        start = first_row * columns
+        end = min(len(self.names), (last_row + 1) * columns)
+
+        for index in list(self.tiles):
+            if not start <= index < end:
+                self.canvas.delete(f"tile{index}")
+                del self.tiles[index]
+
+        needed = set()
+        for index in range(start, end):
+            key = self.resolve_key(index)
+            if index not in self.tiles:
+                self.draw_tile(index)
+            if key is not None:
+                needed.add(key)
+
+        # 화면에서 멀어진 표지 작업은 아직 시작하지 않았으면 취소
+        for key, future in list(self.jobs.items()):
+            if key not in needed and future.cancel():
+                del self.jobs[key]
+        for key in needed:
+            self.request_cover(key)
+        lookup_scheduler.set_priorities(self, {key: 0 if key in needed else 1 for key in self.lookups})
+
+    def draw_tile(self, index):
+        x = (index % self.columns) * self.tile_width
+        y = (index // self.columns) * self.tile_height
+        center_x = x + self.tile_width / 2
+        tags = ('tile', f"tile{index}")
+        key = self.keys[index]
+        photo = self.photos.get(key) if key is not None else None
+        if photo is not None:
+            self.photos.move_to_end(key)
+
+        rect = self.canvas.create_rectangle(
+            x + 5, y + 5, x + self.tile_width - 5, y + self.tile_height - 5,
+            outline=self.colors['accent'] if index == self.selected else '#BDC3C7',
+            width=2 if index == self.selected else 1,
+            fill='white', tags=tags)
+        image = self.canvas.create_image(center_x, y + 90, tags=tags)
+        if photo is not None:
+            self.canvas.itemconfigure(image, image=photo)
+        status = self.canvas.create_text(
+            center_x, y + 90, text="" if photo is not None else self.status_text(key),
+            fill='#7F8C8D', font=('Malgun Gothic', 9), tags=tags)
+
+        name = self.names[index]
+        if len(name) > 40:
+            name = name[:39] + "…"
+        self.canvas.create_text(
+            center_x, y + 190, text=name, width=self.tile_width - 16,
+            font=('Malgun Gothic', 8), fill=self.colors['text'], tags=tags)
+        self.tiles[index] = (rect, image, status)
+
+    def status_text(self, key):
+        if key is None:
+            return "유효하지 않은 이름"
+        if key in self.missing:
+            return "이미지 없음"
+        return "불러오는 중..."
+
+    def request_cover(self, key):
+        if key in self.photos or key in self.jobs or key in self.lookups or key in self.missing:
+            return
+        image_url = self.image_urls.get(key)
+        if key[0] == 'archive' or self.store_key(key) in self.store or image_url:
+            self.start_job(key, image_url)
+        elif key in self.image_urls or get_provider(key[0]) is None:
+            self.set_missing(key)
+        else:
+            # 이미지 주소를 모르면 화면에 보이는 것부터 웹 정보를 조회
+            self.lookups.add(key)
+            lookup_scheduler.submit(key[0], key[1], self,
+                                    lambda key, info: self.results.put(('info', key, info)))
+
+    def start_job(self, key, image_url):
+        future = self.executor.submit(self.load_cover, key, image_url)
+        self.jobs[key] = future
+        future.add_done_callback(lambda f: self.results.put(('cover', key, f)))
+
+    def load_cover(self, key, image_url):
+        # 작업 스레드에서 실행. 저장된 축소 이미지가 있으면 네트워크와 원본 디코딩을 건너뜀
+        store_key = self.store_key(key)
+        data = self.store.get(store_key)
+        if data is None:
+            if key[0] == 'archive':
+                # 압축 파일 전체를 풀지 않고 표지 멤버 하나만 읽음
+                original = read_member(*self.archive_sources[key])
+            elif image_url:
+                original = fetch_image(image_url)
+            else:
+                return None
+            data, width, height = make_thumbnail(original)
+            self.store.put(store_key, data, width, height)
+        return decode_thumbnail(data)
+
+    def poll_results(self):
+        cache_changed = False
+        try:
+            while True:
+                kind, key, value = self.results.get_nowait()
+                if kind == 'info':
+                    self.lookups.discard(key)
+                    if value:
+                        self.metadata_cache.put_info(key[0], key[1], value, time.time())
+                        cache_changed = True
+                    self.image_urls[key] = value['ImageURL'] if value else None
+                    self.request_cover(key)
+                    continue
+
+                if self.jobs.get(key) is value:
+                    del self.jobs[key]
+                if value.cancelled():
+                    continue
+                try:
+                    image = value.result()
+                except Exception:
+                    metrics.increment("gallery.errors")
+                    image = None
+                if image is None:
+                    self.set_missing(key)
+                    continue
+                # PhotoImage는 GUI 스레드에서 만들어야 함
+                self.photos[key] = ImageTk.PhotoImage(image)
+                while len(self.photos) > self.max_photos:
+                    self.photos.popitem(last=False)
+                self.update_tiles(key)
+        except queue.Empty:
+            pass
+        if cache_changed:
+            self.metadata_cache.commit()
+        self.poll_after_id = self.after(50, self.poll_results)
+
+    def update_tiles(self, key):
+        photo = self.photos.get(key)
+        for index, (rect, image, status) in self.tiles.items():
+            if self.keys[index] != key:
+                continue
+            if photo is not None:
+                self.canvas.itemconfigure(image, image=photo)
+                self.canvas.itemconfigure(status, text="")
+            else:
+                self.canvas.itemconfigure(status, text=self.status_text(key))
+
+    def set_missing(self, key):
+        self.missing.add(key)
+        self.update_tiles(key)
+        for index in list(self.tiles):
+            if self.keys[index] == key and self.resolve_key(index) != key:
+                self.canvas.itemconfigure(self.tiles[index][2], text=self.status_text(self.keys[index]))
+                self.request_cover(self.keys[index])
+
+    def on_click(self, event):
+        column = int(self.canvas.canvasx(event.x) // self.tile_width)
+        index = int(self.canvas.canvasy(event.y) // self.tile_height) * self.columns + column
+        if column >= self.columns or index not in self.tiles:
+            return
+        if self.selected in self.tiles:
+            self.canvas.itemconfigure(self.tiles[self.selected][0], outline='#BDC3C7', width=1)
+        self.selected = index
+        self.canvas.itemconfigure(self.tiles[index][0], outline=self.colors['accent'], width=2)
+        if self.on_select:
+            self.on_select(index)
+
+    def on_double_click(self, event):
+        # 원본 표지를 이미지 프리뷰 창으로 표시
+        self.on_click(event)
+        if self.selected is None:
+            return
+        key = self.keys[self.selected]
+        name = self.names[self.selected]
+        if key is not None and key[0] == 'archive':
+            archive_path, member = self.archive_sources[key]
+            ImagePreviewWindow(self, f"이미지 프리뷰 - {name} ({member})",
+                               lambda: read_member(archive_path, member),
+                               lambda data: save_image(self.path, name, member, data))
+        elif key is not None and self.image_urls.get(key):
+            image_url = self.image_urls[key]
+            ImagePreviewWindow(self, f"이미지 프리뷰 - {key[1]}", lambda: fetch_image(image_url))
+        else:
+            messagebox.showwarning("경고", "이미지를 찾을 수 없습니다.", parent=self)
+
+    def close_store(self, executor, store):
+        # 진행 중인 표지 작업이 끝난 뒤 저장소를 반환
+        executor.shutdown(wait=True)
+        release_store(store)
+
+    def destroy(self):
+        lookup_scheduler.cancel(self)
+        for after_id in (self.refresh_after_id, self.poll_after_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.refresh_after_id = self.poll_after_id = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.metadata_cache.close()
+        threading.Thread(target=self.close_store, args=(self.executor, self.store)).start()
+        super().destroy()
+
+class DiskUsageWindow(tk.Toplevel):
+    # 분류별 합계는 미리 계산되어 있으므로 표시할 때는 정렬과 상위 행 삽입만 수행
+    max_rows = 1000
+
+    def __init__(self, parent, result):
+        super().__init__(parent)
+        self.title("용량 분석")
+        self.geometry("900x600")
+        self.configure(bg='#ECF0F1')
+        self.colors = ModernUI.setup_styles()
+        self.total_size = result['total_size'] or 1
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        ttk.Label(self,
+                  text=f"전체 용량: {format_size(result['total_size'])} (항목 {result['item_count']:,}개)   "
+                       f"다시 읽은 폴더 {result['walked']:,}개, 캐시 사용 {result['reused']:,}개",
+                  font=('Malgun Gothic', 9),
+                  background=self.colors['background']).grid(row=0, column=0, sticky="w", padx=20, pady=(20, 10))
+
+        notebook = ttk.Notebook(self, style='modern.TNotebook')
+        notebook.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0, 20))
+
+        titles = {'creator': "제작자", 'platform': "플랫폼", 'genre': "장르"}
+        for field in GROUP_FIELDS:
+            rows = [(value, size, count) for value, (size, count) in result['groups'][field].items()]
+            self.create_tab(notebook, titles[field], titles[field], rows)
+
+        items = [(name, size, count) for name, (size, count) in result['item_sizes'].items()]
+        self.create_tab(notebook, "큰 항목", "파일/폴더명", items, count_title="파일 수")
+
+    def create_tab(self, notebook, title, value_title, rows, count_title="항목 수"):
+        tab = ttk.Frame(notebook, style='modern.TFrame')
+        notebook.add(tab, text=title)
+        tab.grid_rowconfigure(0, weight=1)
+        tab.grid_columnconfigure(0, weight=1)
+
+        y_scroll = ttk.Scrollbar(tab, orient="vertical")
+        tree = ttk.Treeview(tab, columns=("Value", "Count", "Size", "Ratio"), show="headings",
+                            style='modern.Treeview', yscrollcommand=y_scroll.set)
+        y_scroll.config(command=tree.yview)
+
+        for col, text, width in (("Value", value_title, 450), ("Count", count_title, 100),
+                                 ("Size", "용량", 120), ("Ratio", "비율", 80)):
+            tree.heading(col, text=text)
+            tree.column(col, width=width, minwidth=50, anchor="w" if col == "Value" else "e")
+        tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+
+        # 용량 순으로 상위 행만 넣고 나머지는 한 행으로 합침
+        rows.sort(key=lambda row: -row[1])
+        for value, size, count in rows[:self.max_rows]:
+            tree.insert("", "end", values=(value, f"{count:,}", format_size(size),
+                                           f"{size * 100 / self.total_size:.1f}%"))
+        rest = rows[self.max_rows:]
+        if rest:
+            size = sum(row[1] for row in rest)
+            tree.insert("", "end", values=(f"그 외 {len(rest):,}개", f"{sum(row[2] for row in rest):,}",
+                                           format_size(size), f"{size * 100 / self.total_size:.1f}%"))
+
+class TagSearchWindow(tk.Toplevel):
+    # 태그를 눌러 포함 -> 제외 -> 해제 순으로 바꾸고, 조건이 바뀔 때마다 결과와 태그별 개수를 다시 계산
+    max_rows = 1000
+    states = {'': '포함', '포함': '제외', '제외': ''}
+
+    def __init__(self, parent, index, on_select=None):
+        super().__init__(parent)
+        self.title("태그 검색")
+        self.geometry("1100x650")
+        self.configure(bg='#ECF0F1')
+        self.colors = ModernUI.setup_styles()
+        self.index = index
+        self.on_select = on_select
+        self.tag_states = {}  # 태그 -> '포함' 또는 '제외'
+        self.platform_var = tk.StringVar(value="전체")
+        self.genre_var = tk.StringVar(value="전체")
+        self.summary_var = tk.StringVar()
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_columnconfigure(1, weight=2)
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        filter_frame = ttk.Frame(self, style='modern.TFrame')
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew", padx=20, pady=(20, 10))
+
+        for label, var, facet in (("플랫폼", self.platform_var, 'platform'), ("장르", self.genre_var, 'genre')):
+            ttk.Label(filter_frame, text=label, font=('Malgun Gothic', 9),
+                      background=self.colors['background']).pack(side="left", padx=(0, 5))
+            combo = ttk.Combobox(filter_frame, textvariable=var, state="readonly", width=12,
+                                 values=["전체"] + sorted(self.index.bitmaps[facet]))
+            combo.pack(side="left", padx=(0, 15))
+            combo.bind('<<ComboboxSelected>>', lambda e: self.refresh())
+
+        ttk.Button(filter_frame, text="조건 초기화", style='modern.TButton',
+                   command=self.reset).pack(side="left")
+        ttk.Label(filter_frame, textvariable=self.summary_var, font=('Malgun Gothic', 9),
+                  background=self.colors['background']).pack(side="right")
+
+        self.tag_tree = self.create_tree(1, 0, (("State", "조건", 60), ("Tag", "태그", 220), ("Count", "항목 수", 80)))
+        self.tag_tree.bind('<ButtonRelease-1>', self.on_tag_click)
+        self.result_tree = self.create_tree(1, 1, (("Item", "파일/폴더명", 650),))
+        self.result_tree.bind('<Double-1>', self.on_result_double_click)
+
+    def create_tree(self, row, column, columns):
+        frame = ttk.Frame(self, style='modern.TFrame')
+        frame.grid(row=row, column=column, sticky="nsew", padx=(20 if column == 0 else 0, 20), pady=(0, 20))
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+        y_scroll = ttk.Scrollbar(frame, orient="vertical")
+        tree = ttk.Treeview(frame, columns=[col for col, _, _ in columns], show="headings",
+                            style='modern.Treeview', yscrollcommand=y_scroll.set)
+        y_scroll.config(command=tree.yview)
+        for col, text, width in columns:
+            tree.heading(col, text=text)
+            tree.column(col, width=width, minwidth=40, anchor="e" if col == "Count" else "w")
+        tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        return tree
+
+    def refresh(self):
+        include = [tag for tag, state in self.tag_states.items() if state == '포함']
+        exclude = [tag for tag, state in self.tag_states.items() if state == '제외']
+        filters = {facet: var.get() for facet, var in (('platform', self.platform_var), ('genre', self.genre_var))
+                   if var.get() != "전체"}
+        result = self.index.query(include, exclude, filters, limit=self.max_rows, facets=('tag',))
+
+        # 선택한 태그를 위에 두고 나머지는 결과 안의 항목 수 순서로 표시
+        tag_counts = result['facets']['tag']
+        tags = sorted(self.tag_states, key=lambda tag: (self.tag_states[tag] != '포함', tag))
+        tags += sorted((tag for tag in tag_counts if tag not in self.tag_states), key=lambda tag: (-tag_counts[tag], tag))
+        self.tag_tree.delete(*self.tag_tree.get_children())
+        for tag in tags:
+            self.tag_tree.insert("", "end", values=(self.tag_states.get(tag, ""), tag, f"{tag_counts.get(tag, 0):,}"))
+
+        self.result_tree.delete(*self.result_tree.get_children())
+        for name in result['names']:
+            self.result_tree.insert("", "end", values=(name,))
+        shown = f" (상위 {self.max_rows:,}개 표시)" if result['count'] > self.max_rows else ""
+        self.summary_var.set(f"결과 {result['count']:,}개{shown}, 태그 정보 있음 {result['tagged']:,}개")
+
+    def on_tag_click(self, event):
+        row = self.tag_tree.identify_row(event.y)
+        if not row:
+            return
+        tag = self.tag_tree.set(row, "Tag")
+        state = self.states[self.tag_states.get(tag, '')]
+        if state:
+            self.tag_states[tag] = state
+        else:
+            self.tag_states.pop(tag, None)
+        self.refresh()
+
+    def on_result_double_click(self, event):
+        row = self.result_tree.identify_row(event.y)
+        if row and self.on_select:
+            self.on_select(self.result_tree.set(row, "Item"))
+
+    def reset(self):
+        self.tag_states.clear()
+        self.platform_var.set("전체")
+        self.genre_var.set("전체")
+        self.refresh()
+
+class ConsistencyWindow(tk.Toplevel):
+    # 파일/폴더명과 웹 정보의 비교 결과. 제목을 누르면 해당 열로 정렬
+    max_rows = 5000
+
+    def __init__(self, parent, result, on_select=None):
+        super().__init__(parent)
+        self.title("웹 정보 대조")
+        self.geometry("1200x600")
+        self.configure(bg='#ECF0F1')
+        self.colors = ModernUI.setup_styles()
+        self.result = result
+        self.on_select = on_select
+        self.sort_key = None
+        self.sort_reverse = False
+        self.issues_only_var = tk.BooleanVar(value=True)
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        top_frame = ttk.Frame(self, style='modern.TFrame')
+        top_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        ttk.Label(top_frame,
+                  text=f"비교 {result['checked']:,}개, 불일치 {result['mismatched']:,}개, "
+                       f"웹 정보 없음 {result['not_crawled']:,}개",
+                  font=('Malgun Gothic', 9),
+                  background=self.colors['background']).pack(side="left")
+        ttk.Button(top_frame, text="CSV로 저장", style='modern.TButton',
+                   command=self.save_csv).pack(side="right")
+        ttk.Checkbutton(top_frame, text="문제 있는 항목만", variable=self.issues_only_var,
+                        command=self.refresh).pack(side="right", padx=(0, 10))
+
+        container = ttk.Frame(self, style='modern.TFrame')
+        container.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0, 20))
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+
+        y_scroll = ttk.Scrollbar(container, orient="vertical")
+        columns = (("name", "파일/폴더명", 380), ("score", "종합", 60), ("title", "제목", 60),
+                   ("creator", "제작자", 60), ("genre", "장르", 60), ("local_size", "로컬 용량", 90),
+                   ("remote_size", "웹 용량", 90), ("size_ratio", "용량 비율", 70), ("crawled_title", "웹 제목", 250),
+                   ("issues", "문제", 180))
+        self.result_tree = ttk.Treeview(container, columns=[column for column, _, _ in columns], show="headings",
+                                        style='modern.Treeview', yscrollcommand=y_scroll.set)
+        y_scroll.config(command=self.result_tree.yview)
+        for column, text, width in columns:
+            self.result_tree.heading(column, text=text, command=lambda column=column: self.sort_by(column))
+            self.result_tree.column(column, width=width, minwidth=40,
+                                    anchor="w" if column in ("name", "crawled_title", "issues") else "e")
+        self.result_tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        self.result_tree.bind('<Double-1>', self.on_double_click)
+
+        self.refresh()
+
+    def sort_by(self, column):
+        # 같은 열을 다시 누르면 반대 순서
+        self.sort_reverse = not self.sort_reverse if self.sort_key == column else False
+        self.sort_key = column
+        self.refresh()
+
+    def visible_rows(self):
+        rows = self.result['rows']
+        if self.issues_only_var.get():
+            rows = [row for row in rows if row['issues']]
+        if self.sort_key:
+            column = self.sort_key
+            if column == 'issues':
+                key = lambda row: len(row['issues'])
+            elif column in ('name', 'crawled_title'):
+                key = lambda row: row[column] or ''
+            else:
+                # 값이 없는 행은 항상 뒤로
+                present = [row for row in rows if row[column] is not None]
+                missing = [row for row in rows if row[column] is None]
+                present.sort(key=lambda row: row[column], reverse=self.sort_reverse)
+                return present + missing
+            rows = sorted(rows, key=key, reverse=self.sort_reverse)
+        return rows
+
+    def refresh(self):
+        self.result_tree.delete(*self.result_tree.get_children())
+
+        def percent(value):
+            return f"{value:.0%}" if value is not None else "-"
+
+        def size(value):
+            return format_size(value) if value is not None else "-"
+
+        rows = self.visible_rows()
+        for row in rows[:self.max_rows]:
+            self.result_tree.insert("", "end", values=(
+                row['name'], percent(row['score']), percent(row['title']), percent(row['creator']),
+                percent(row['genre']), size(row['local_size']), size(row['remote_size']),
+                percent(row['size_ratio']), row['crawled_title'] or '-', ", ".join(row['issues']) or '-'
+            ))
+        if len(rows) > self.max_rows:
+            self.result_tree.insert("", "end", values=(f"그 외 {len(rows) - self.max_rows:,}개 (CSV로 저장하여 확인)",
+                                                       *[''] * 9))
+
+    def on_double_click(self, event):
+        row = self.result_tree.identify_row(event.y)
+        if row and self.on_select:
+            self.on_select(self.result_tree.set(row, "name"))
+
+    def save_csv(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")],
+            initialfile="consistency.csv"
+        )
+        if not file_path:
+            return
+        try:
+            write_csv(self.visible_rows(), file_path)
+            messagebox.showinfo("완료", f"결과가 다음 경로에 저장되었습니다:\n{file_path}", parent=self)
+        except OSError as e:
+            messagebox.showerror("오류", f"저장 중 오류 발생:\n{str(e)}", parent=self)
+
+class CrawlJobsWindow(tk.Toplevel):
+    # 조회 작업 목록과 진행 상황. 명령줄(crawl_jobs.py run)에서 실행 중인 작업도 주기적으로 다시 읽어 표시
+    def __init__(self, parent, keys, name):
+        super().__init__(parent)
+        self.title("크롤링 작업")
+        self.geometry("900x450")
+        self.configure(bg='#ECF0F1')
+        self.colors = ModernUI.setup_styles()
+        self.keys = keys  # 현재 폴더의 조회할 수 있는 (플랫폼, 고유 ID) 목록
+        self.name = name
+        self.store = CrawlJobStore()
+        self.running = {}  # 작업 번호 -> 중단 요청 Event
+        self.refresh_interval = 2000
+        self.refresh_after_id = None
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        container = ttk.Frame(self, style='modern.TFrame')
+        container.grid(row=0, column=0, sticky="nsew", padx=20, pady=(20, 10))
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+
+        y_scroll = ttk.Scrollbar(container, orient="vertical")
+        self.job_tree = ttk.Treeview(container, columns=("ID", "Name", "Done", "Failed", "Pending", "State", "Updated"),
+                                     show="headings", style='modern.Treeview', yscrollcommand=y_scroll.set)
+        y_scroll.config(command=self.job_tree.yview)
+        for col, text, width in (("ID", "번호", 50), ("Name", "이름", 300), ("Done", "완료", 80),
+                                 ("Failed", "실패", 80), ("Pending", "대기", 80), ("State", "상태", 80),
+                                 ("Updated", "마지막 갱신", 130)):
+            self.job_tree.heading(col, text=text)
+            self.job_tree.column(col, width=width, minwidth=40, anchor="w" if col == "Name" else "center")
+        self.job_tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+
+        button_frame = ttk.Frame(self, style='modern.TFrame')
+        button_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
+        ttk.Button(button_frame, text="현재 폴더로 작업 만들기", style='modern.TButton',
+                   command=self.create_job).pack(side="left")
+        ttk.Button(button_frame, text="이어서 실행", style='modern.TButton',
+                   command=self.resume_job).pack(side="left", padx=(10, 0))
+        ttk.Button(button_frame, text="삭제", style='modern.TButton',
+                   command=self.delete_job).pack(side="left", padx=(10, 0))
+
+        self.refresh()
+
+    def refresh(self):
+        jobs = self.store.list_jobs()
+        seen = set()
+        for job in jobs:
+            row_id = str(job['job_id'])
+            seen.add(row_id)
+            if job['job_id'] in self.running:
+                state = "실행 중"
+            else:
+                state = "끝남" if job['finished_at'] else "중단됨"
+            values = (job['job_id'], job['name'], f"{job['done']:,}/{job['total']:,}", f"{job['failed']:,}",
+                      f"{job['pending']:,}", state,
+                      time.strftime('%Y-%m-%d %H:%M', time.localtime(job['updated_at'])))
+            # 선택과 스크롤 위치가 유지되도록 기존 행은 값만 갱신
+            if self.job_tree.exists(row_id):
+                self.job_tree.item(row_id, values=values)
+            else:
+                self.job_tree.insert("", "end", iid=row_id, values=values)
+        for row_id in self.job_tree.get_children():
+            if row_id not in seen:
+                self.job_tree.delete(row_id)
+        self.refresh_after_id = self.after(self.refresh_interval, self.refresh)
+
+    def selected_job(self):
+        selection = self.job_tree.selection()
+        if not selection:
+            messagebox.showwarning("경고", "작업을 선택해주세요.", parent=self)
+            return None
+        return int(selection[0])
+
+    def create_job(self):
+        if not self.keys:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요. 조회할 수 있는 항목이 없습니다.", parent=self)
+            return
+        job_id = self.store.create_job(self.name, self.keys)
+        self.after_cancel(self.refresh_after_id)
+        self.refresh()
+        self.job_tree.selection_set(str(job_id))
+
+    def resume_job(self):
+        job_id = self.selected_job()
+        if job_id is None or job_id in self.running:
+            return
+        stop = threading.Event()
+        self.running[job_id] = stop
+
+        def task(report):
+            store = CrawlJobStore()
+            cache = MetadataCache()
+            try:
+                return run_job(store, job_id, cache, stop=stop,
+                               progress=lambda done, total: report(f"작업 {job_id} 조회 중", done, total))
+            finally:
+                cache.close()
+                store.close()
+
+        def on_done(result):
+            self.running.pop(job_id, None)
+            if not self.winfo_exists():
+                return
+            text = f"작업 {job_id}: 완료 {result['done']:,}, 실패 {result['failed']:,}, 대기 {result['pending']:,}"
+            if not result['finished']:
+                text += "\n\n남은 항목은 다음에 이어서 실행할 수 있습니다."
+            messagebox.showinfo("크롤링 작업", text, parent=self)
+
+        # 이 창을 닫아도 진행 창은 작업이 멈출 때까지 남도록 메인 창에 연결
+        BackgroundTask(self.master, f"작업 {job_id} 조회", task, on_done, on_cancel=stop.set)
+
+    def delete_job(self):
+        job_id = self.selected_job()
+        if job_id is None:
+            return
+        if job_id in self.running:
+            messagebox.showwarning("경고", "실행 중인 작업은 삭제할 수 없습니다.", parent=self)
+            return
+        if messagebox.askyesno("확인", f"작업 {job_id}을(를) 삭제하시겠습니까?", parent=self):
+            self.store.delete(job_id)
+
+    def destroy(self):
+        if self.refresh_after_id is not None:
+            self.after_cancel(self.refresh_after_id)
+            self.refresh_after_id = None
+        # 실행 중인 작업은 중단. 끝난 항목까지는 이미 기록되어 있음
+        for stop in self.running.values():
+            stop.set()
+        self.store.close()
+        super().destroy()
+
+class DuplicateResolveWindow(tk.Toplevel):
+    # 고유 ID가 같은 항목 중 남길 항목을 정하고 나머지를 격리 폴더로 옮김. 항목을 두 번 누르면 그 항목을 남김
+    def __init__(self, parent, path, plan, name_infos, item_stats, on_moved=None):
+        super().__init__(parent)
+        self.title("중복 정리")
+        self.geometry("1000x550")
+        self.configure(bg='#ECF0F1')
+        self.colors = ModernUI.setup_styles()
+        self.path = path
+        self.plan = plan
+        self.name_infos = name_infos
+        self.item_stats = item_stats
+        self.on_moved = on_moved
+        self.keepers = {entry['unique_id']: entry['keep'] for entry in plan}
+        self.rule_var = tk.StringVar(value=RULES[DEFAULT_RULES[0]])
+        self.quarantine_var = tk.StringVar(value=path.rstrip('/\\') + "_duplicates")
+        self.summary_var = tk.StringVar()
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        top_frame = ttk.Frame(self, style='modern.TFrame')
+        top_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        ttk.Label(top_frame, textvariable=self.summary_var, font=('Malgun Gothic', 9),
+                  background=self.colors['background']).pack(side="left")
+        rule_combo = ttk.Combobox(top_frame, textvariable=self.rule_var, values=list(RULES.values()),
+                                  state="readonly", width=15)
+        rule_combo.pack(side="right")
+        rule_combo.bind('<<ComboboxSelected>>', lambda e: self.apply_rule())
+        ttk.Label(top_frame, text="남길 항목:", font=('Malgun Gothic', 9),
+                  background=self.colors['background']).pack(side="right", padx=(0, 5))
+
+        container = ttk.Frame(self, style='modern.TFrame')
+        container.grid(row=1, column=0, sticky="nsew", padx=20)
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+
+        y_scroll = ttk.Scrollbar(container, orient="vertical")
+        self.plan_tree = ttk.Treeview(container, columns=("Action", "Size", "Modified"), show="tree headings",
+                                      style='modern.Treeview', yscrollcommand=y_scroll.set)
+        y_scroll.config(command=self.plan_tree.yview)
+        self.plan_tree.heading("#0", text="파일/폴더명")
+        self.plan_tree.column("#0", width=600, minwidth=200)
+        for col, text, width in (("Action", "처리", 80), ("Size", "크기", 100), ("Modified", "수정 시각", 130)):
+            self.plan_tree.heading(col, text=text)
+            self.plan_tree.column(col, width=width, minwidth=40, anchor="center")
+        self.plan_tree.tag_configure('move', foreground='#E74C3C')
+        self.plan_tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        self.plan_tree.bind('<Double-1>', self.on_double_click)
+
+        button_frame = ttk.Frame(self, style='modern.TFrame')
+        button_frame.grid(row=2, column=0, sticky="ew", padx=20, pady=(10, 20))
+        ttk.Label(button_frame, text="격리 폴더:", font=('Malgun Gothic', 9),
+                  background=self.colors['background']).pack(side="left")
+        ttk.Entry(button_frame, textvariable=self.quarantine_var, style='modern.TEntry',
+                  width=60).pack(side="left", padx=(5, 5))
+        ttk.Button(button_frame, text="찾아보기", style='modern.TButton',
+                   command=self.browse_quarantine).pack(side="left")
+        ttk.Button(button_frame, text="이동", style='modern.TButton',
+                   command=self.move_items).pack(side="right")
+
+        self.refresh()
+
+    def apply_rule(self):
+        # 고른 규칙을 먼저 비교하고 같으면 나머지 기본 규칙 순서로 비교
+        rule = next(key for key, text in RULES.items() if text == self.rule_var.get())
+        rules = (rule,) + tuple(r for r in DEFAULT_RULES if r != rule)
+        for entry in self.plan:
+            names = [entry['keep']] + entry['move']
+            self.keepers[entry['unique_id']] = choose_keeper(sorted(names), self.name_infos, self.item_stats,
+                                                             entry['sizes'], rules)
+        self.refresh()
+
+    def current_plan(self):
+        plan = []
+        for entry in self.plan:
+            names = sorted([entry['keep']] + entry['move'])
+            keep = self.keepers[entry['unique_id']]
+            plan.append(dict(entry, keep=keep, move=[name for name in names if name != keep]))
+        return plan
+
+    def refresh(self):
+        self.plan_tree.delete(*self.plan_tree.get_children())
+        plan = self.current_plan()
+        for entry in plan:
+            names = sorted([entry['keep']] + entry['move'])
+            group = self.plan_tree.insert("", "end", text=f"[{entry['unique_id']}] ({len(names)}개)", open=True)
+            for name in names:
+                size = entry['sizes'].get(name)
+                mtime = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.item_stats[name]['mtime']))
+                keep = name == entry['keep']
+                self.plan_tree.insert(group, "end", text=name,
+                                      values=("남김" if keep else "이동",
+                                              format_size(size) if size is not None else "-", mtime),
+                                      tags=() if keep else ('move',))
+        moving = [(entry, name) for entry in plan for name in entry['move']]
+        total = sum(entry['sizes'].get(name) or 0 for entry, name in moving)
+        self.summary_var.set(f"중복 {len(plan):,}건, 옮길 항목 {len(moving):,}개 ({format_size(total)})")
+
+    def on_double_click(self, event):
+        row = self.plan_tree.identify_row(event.y)
+        parent = self.plan_tree.parent(row) if row else ""
+        if not parent:
+            return
+        unique_id = self.plan[self.plan_tree.index(parent)]['unique_id']
+        self.keepers[unique_id] = self.plan_tree.item(row, "text")
+        self.refresh()
+
+    def browse_quarantine(self):
+        folder_path = filedialog.askdirectory(parent=self)
+        if folder_path:
+            self.quarantine_var.set(folder_path)
+
+    def move_items(self):
+        plan = self.current_plan()
+        count = sum(len(entry['move']) for entry in plan)
+        quarantine = os.path.abspath(self.quarantine_var.get().strip())
+        if not count or not self.quarantine_var.get().strip():
+            return
+        if os.path.normcase(quarantine + os.sep).startswith(os.path.normcase(os.path.abspath(self.path)) + os.sep):
+            messagebox.showwarning("경고", "격리 폴더는 검증한 폴더 밖에 있어야 합니다.", parent=self)
+            return
+        if not messagebox.askyesno("확인", f"{count:,}개 항목을 다음 폴더로 옮기시겠습니까?\n{quarantine}", parent=self):
+            return
+        path = self.path
+        stop = threading.Event()
+
+        def task(report):
+            mb = 1024 * 1024
+            return move_duplicates(path, plan, quarantine, stop=stop,
+                                   progress=lambda done, total: report("옮기는 중 (MB)", done // mb, total // mb))
+
+        def on_done(result):
+            text = f"{len(result['moved']):,}개 항목을 옮겼습니다.\n{quarantine}"
+            if result['remaining']:
+                text += f"\n\n중단되어 {result['remaining']:,}개 항목은 옮기지 않았습니다."
+            if result['failed']:
+                text += "\n\n옮기지 못한 항목:\n" + "\n".join(f"{name}: {error}" for name, error in result['failed'][:10])
+            if result['incomplete']:
+                text += ("\n\n복사했지만 원본을 모두 지우지 못한 항목 (격리 폴더의 사본은 완전함):\n"
+                         + "\n".join(f"{name}: {error}" for name, _, error in result['incomplete'][:10]))
+            messagebox.showinfo("중복 정리", text)
+            if self.winfo_exists():
+                self.destroy()
+            if (result['moved'] or result['incomplete']) and self.on_moved:
+                self.on_moved()
+
+        BackgroundTask(self.master, "중복 정리", task, on_done, on_cancel=stop.set)
 
 class ModernGameItemValidatorApp:
-    def __init__(self, master):
+    def __init__(self, master, service_client=None):
         self.master = master
         self.master.title("게임 파일/폴더명 검증 및 수정 프로그램")
+        # 서비스에 연결한 경우 스캔/검증과 웹 정보 조회는 서비스가 처리
+        self.service_client = service_client
+        if service_client is not None:
+            self.master.title(f"게임 파일/폴더명 검증 및 수정 프로그램 - {service_client.address}")
         
         window_width = 1400
         window_height = 800
@@ -1011,6 +2283,12 @@ class ModernGameItemValidatorApp:
         self.colors = ModernUI.setup_styles()
         
         self.path_var = tk.StringVar()
+        self.name_infos = {}  # 마지막 검증 결과의 이름 -> (is_valid, info)
+        self.item_stats = {}  # 마지막 검증 결과의 이름 -> 크기/수정 시각
+        self.archive_index = None
+        self.archive_index_generation = 0
+        self.archive_search_var = tk.StringVar()
+        self.archive_status_var = tk.StringVar()
         self.create_widgets()
 
     def create_widgets(self):
@@ -1099,7 +2377,7 @@ class ModernGameItemValidatorApp:
         # 트리뷰 생성 및 스크롤바 연결
         self.result_tree = ttk.Treeview(
             container,
-            columns=("Item", "Status", "Platform", "Genre", "ID"),
+            columns=("Item", "Status", "Integrity", "Platform", "Genre", "ID"),
             show="headings",
             style='modern.Treeview',
             yscrollcommand=y_scroll.set,
@@ -1115,6 +2393,8 @@ class ModernGameItemValidatorApp:
                              command=lambda: self.treeview_sort_column("Item", False))
         self.result_tree.heading("Status", text="상태",
                              command=lambda: self.treeview_sort_column("Status", False))
+        self.result_tree.heading("Integrity", text="무결성",
+                             command=lambda: self.treeview_sort_column("Integrity", False))
         self.result_tree.heading("Platform", text="플랫폼",
                              command=lambda: self.treeview_sort_column("Platform", False))
         self.result_tree.heading("Genre", text="장르",
@@ -1125,6 +2405,7 @@ class ModernGameItemValidatorApp:
         # 컬럼 너비 설정
         self.result_tree.column("Item", width=500, minwidth=200)
         self.result_tree.column("Status", width=100, minwidth=80)
+        self.result_tree.column("Integrity", width=100, minwidth=80)
         self.result_tree.column("Platform", width=100, minwidth=80)
         self.result_tree.column("Genre", width=100, minwidth=80)
         self.result_tree.column("ID", width=100, minwidth=80)
@@ -1140,13 +2421,68 @@ class ModernGameItemValidatorApp:
         x_scroll.grid(row=1, column=0, sticky="ew")
 
     def create_action_buttons(self, parent):
-        button_frame = ttk.Frame(parent, style='modern.TFrame')
-        button_frame.pack(fill="x", pady=(0, 10))
-
-        ttk.Button(button_frame,
-                  text="선택 항목 이름 변경",
+        # 버튼이 한 줄에 모두 들어가지 않으므로 작업과 분석 도구를 줄을 나누고, 검색은 따로 한 줄에 둠
+        button_rows = [
+            ("작업", [
+                ("선택 항목 이름 변경", self.open_rename_window),
+                ("이름 자동 계획", self.plan_renames),
+                ("중복 정리", self.resolve_duplicates),
+                ("크롤링 작업", self.open_crawl_jobs),
+                ("업데이트 확인", self.check_updates),
+            ]),
+            ("분석", [
+                ("내용 중복 검사", self.find_content_duplicates),
+                ("비슷한 제목 찾기", self.find_near_duplicates),
+                ("무결성 검사", self.verify_archives),
+                ("웹 정보 대조", self.check_consistency),
+                ("변경 내역", self.compare_snapshots),
+                ("용량 분석", self.analyze_disk_usage),
+                ("표지 모아보기", self.open_gallery),
+                ("태그 검색", self.open_tag_search),
+                ("진단 정보", self.open_diagnostics_window),
+            ]),
+        ]
+        for title, buttons in button_rows:
+            button_frame = ttk.Frame(parent, style='modern.TFrame')
+            button_frame.pack(fill="x", pady=(0, 10))
+
+            ttk.Label(button_frame,
+                      text=title,
+                      width=6,
+                      font=('Malgun Gothic', 10, 'bold'),
+                      background=self.colors['background']).pack(side="left")
+
+            for i, (text, command) in enumerate(buttons):
+                ttk.Button(button_frame,
+                          text=text,
+                          style='modern.TButton',
+                          command=command).pack(side="left", padx=(10 if i else 0, 0))
+
+        search_frame = ttk.Frame(parent, style='modern.TFrame')
+        search_frame.pack(fill="x", pady=(0, 10))
+
+        ttk.Label(search_frame,
+                  text="검색",
+                  width=6,
+                  font=('Malgun Gothic', 10, 'bold'),
+                  background=self.colors['background']).pack(side="left")
+
+        # 오른쪽 위젯을 먼저 배치해야 창이 좁아져도 입력란만 줄어듦
+        ttk.Button(search_frame,
+                  text="압축 파일 내부 검색",
                   style='modern.TButton',
-                  command=self.open_rename_window).pack(side="left")
+                  command=self.search_archives).pack(side="right")
+
+        ttk.Label(search_frame,
+                  textvariable=self.archive_status_var,
+                  font=('Malgun Gothic', 9),
+                  background=self.colors['background']).pack(side="right", padx=(10, 10))
+
+        search_entry = ttk.Entry(search_frame,
+                                 textvariable=self.archive_search_var,
+                                 style='modern.TEntry')
+        search_entry.pack(side="left", fill="x", expand=True)
+        search_entry.bind('<Return>', lambda e: self.search_archives())
 
     def browse_folder(self):
         folder_path = filedialog.askdirectory()
@@ -1160,26 +2496,45 @@ class ModernGameItemValidatorApp:
             return
 
         extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
-        items = get_items_in_path(path, extensions)
-        valid, invalid, duplicate = classify_items(items)
-
-        self.result_tree.delete(*self.result_tree.get_children())
-
-        for item, info in valid:
-            status = "유효"
-            tag = "valid"
-            if item in duplicate:
-                status = "중복"
-                tag = "duplicate"
-            self.result_tree.insert("", "end",
-                                values=(item, status, info['platform'],
-                                       info['genre'], info['unique_id']),
-                                tags=(tag,))
-
-        for item in invalid:
-            self.result_tree.insert("", "end",
-                                values=(item, "유효하지 않음", "-", "-", "-"),
-                                tags=("invalid",))
+        if self.service_client is not None:
+            try:
+                self.item_stats, valid, invalid, duplicate = self.service_client.validate(path, extensions)
+            except ServiceError as e:
+                messagebox.showerror("오류", f"서비스 요청 중 오류 발생:\n{str(e)}")
+                return
+        else:
+            self.item_stats = scan_items(path, extensions)
+            valid, invalid, duplicate = classify_items_parallel(list(self.item_stats))
+        items = list(self.item_stats)
+
+        self.name_infos = {item: (True, info) for item, info in valid}
+        self.name_infos.update((item, (False, None)) for item in invalid)
+
+        integrity = self.load_integrity(path, self.item_stats)
+
+        with metrics.timer("tree.populate"):
+            self.result_tree.delete(*self.result_tree.get_children())
+            duplicate_set = set(duplicate)
+
+            for item, info in valid:
+                status = "유효"
+                tag = "valid"
+                if item in duplicate_set:
+                    status = "중복"
+                    tag = "duplicate"
+                self.result_tree.insert("", "end",
+                                    values=(item, status, integrity.get(item, "-"), info['platform'],
+                                           info['genre'], info['unique_id']),
+                                    tags=(tag,))
+
+            for item in invalid:
+                self.result_tree.insert("", "end",
+                                    values=(item, "유효하지 않음", integrity.get(item, "-"), "-", "-", "-"),
+                                    tags=("invalid",))
+
+        self.start_archive_indexing(path, self.item_stats)
+        if self.service_client is None:
+            threading.Thread(target=self.import_sidecars, args=(path, self.name_infos), daemon=True).start()
 
         messagebox.showinfo("검증 완료",
                         f"총 항목 수: {len(items)}\n"
@@ -1205,10 +2560,392 @@ class ModernGameItemValidatorApp:
 
         selected_names = [self.result_tree.item(item)["values"][0] 
                        for item in selected_items]
+        name_infos = {name: self.name_infos[name]
+                      for name in selected_names if name in self.name_infos}
         ModernRenameWindow(self.master, selected_names, 
-                        self.path_var.get(), self.validate_items)
+                        self.path_var.get(), self.validate_items, name_infos, self.archive_index)
+
+    def import_sidecars(self, path, name_infos):
+        # 폴더에 저장된 웹 정보를 캐시로 가져옴. 표지 모아보기, 태그 검색 등이 다시 조회하지 않고 사용
+        cache = MetadataCache()
+        try:
+            import_folder(path, name_infos, cache)
+        except OSError:
+            pass
+        finally:
+            cache.close()
+
+    def start_archive_indexing(self, path, item_stats):
+        # 압축 파일 헤더 검사는 스캔 후 백그라운드에서 진행
+        self.archive_index_generation += 1
+        generation = self.archive_index_generation
+        self.archive_index = None
+        self.archive_status_var.set("압축 파일 색인 중...")
+        result = {}
+
+        def build():
+            try:
+                result['index'] = ArchiveIndex().build(path, item_stats)
+            except Exception as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=build, daemon=True)
+        thread.start()
+
+        def poll():
+            if generation != self.archive_index_generation:
+                return
+            if thread.is_alive():
+                self.master.after(200, poll)
+                return
+            if 'error' in result:
+                self.archive_status_var.set("압축 파일 색인 실패")
+                return
+            self.archive_index = result['index']
+            self.archive_status_var.set(f"압축 파일 색인: {len(self.archive_index.archives)}개")
+
+        self.master.after(200, poll)
+
+    def search_archives(self):
+        query = self.archive_search_var.get().strip()
+        if not query:
+            return
+        if self.archive_index is None:
+            messagebox.showwarning("경고", "압축 파일 색인이 아직 준비되지 않았습니다.")
+            return
+
+        results = self.archive_index.search(query)
+        if not results:
+            messagebox.showinfo("검색 결과", "일치하는 압축 파일이 없습니다.")
+            return
+
+        # 결과 목록에서 일치하는 항목을 선택
+        matched = [row for row in self.result_tree.get_children()
+                   if self.result_tree.item(row)["values"][0] in results]
+        self.result_tree.selection_set(matched)
+        if matched:
+            self.result_tree.see(matched[0])
+
+        rows = [(name, f"{len(members)}개", members) for name, members in sorted(results.items())]
+        GroupedResultWindow(self.master, f"압축 파일 내부 검색 - {query}", "일치 파일 수", rows)
+
+    def load_integrity(self, path, item_stats):
+        # 이전 검사 결과 중 파일이 바뀌지 않은 것만 표시
+        manifest = VerifyManifest()
+        integrity = {}
+        for name, stat in item_stats.items():
+            if stat['is_dir']:
+                continue
+            entry = manifest.get(os.path.abspath(os.path.join(path, name)), stat['size'], stat['mtime'])
+            if entry is not None:
+                integrity[name] = STATUS_TEXT[entry['status']]
+        return integrity
+
+    def verify_archives(self):
+        if not self.item_stats:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        path = self.path_var.get()
+        item_stats = self.item_stats
+
+        def task(report):
+            return verify_archives(path, item_stats,
+                                   progress=lambda done, total: report("무결성 검사 중", done, total))
+
+        def on_done(results):
+            rows = {self.result_tree.item(row)["values"][0]: row
+                    for row in self.result_tree.get_children()}
+            for name, result in results.items():
+                if name in rows:
+                    self.result_tree.set(rows[name], "Integrity", STATUS_TEXT[result['status']])
+
+            counts = {}
+            for result in results.values():
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+            messagebox.showinfo("무결성 검사 완료",
+                                "\n".join(f"{STATUS_TEXT[status]}: {count}개"
+                                          for status, count in counts.items()) or "검사할 압축 파일이 없습니다.")
+
+        BackgroundTask(self.master, "무결성 검사", task, on_done)
+
+    def find_content_duplicates(self):
+        if not self.item_stats:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        path = self.path_var.get()
+        item_stats = self.item_stats
+        stage_names = {'partial': "부분 해시 계산 중", 'full': "전체 해시 계산 중"}
+
+        def task(report):
+            return find_content_duplicates(
+                path, item_stats,
+                progress=lambda stage, done, total: report(stage_names[stage], done, total))
+
+        def on_done(groups):
+            if not groups:
+                messagebox.showinfo("완료", "내용이 같은 항목이 없습니다.")
+                return
+            rows = []
+            for i, names in enumerate(groups, 1):
+                size = item_stats[names[0]]['size']
+                size_text = f"{size:,} B" if size is not None else "폴더"
+                rows.append((f"그룹 {i} ({len(names)}개)", size_text, names))
+            GroupedResultWindow(self.master, "내용 중복 항목", "크기", rows)
+
+        BackgroundTask(self.master, "내용 중복 검사", task, on_done)
+
+    def compare_snapshots(self):
+        # 현재 스캔 결과를 스냅샷으로 저장하고 같은 폴더의 이전 스냅샷과 비교
+        path = self.path_var.get()
+        if not path:
+            messagebox.showwarning("경고", "폴더를 선택해주세요.")
+            return
+        extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
+
+        def task(report):
+            report("스냅샷 저장 중", 0, 1)
+            previous = list_snapshots(path)
+            file_path, _ = save_snapshot(path, extensions)
+            if not previous:
+                return None
+            report("이전 스냅샷과 비교 중", 0, 1)
+            changes = {kind: [] for kind in CHANGE_TEXT}
+
+            def on_change(kind, old, new):
+                # 창에는 종류별로 앞부분만 표시
+                if len(changes[kind]) < 1000:
+                    changes[kind].append(describe(kind, old, new))
+
+            counts = diff_snapshot_files(previous[-1], file_path, on_change)
+            return read_meta(previous[-1])['created_at'], counts, changes
+
+        def on_done(result):
+            if result is None:
+                messagebox.showinfo("변경 내역", "현재 상태를 저장했습니다. 다음에 다시 실행하면 지금과 비교합니다.")
+                return
+            created_at, counts, changes = result
+            since = time.strftime('%Y-%m-%d %H:%M', time.localtime(created_at))
+            rows = [(CHANGE_TEXT[kind], f"{count:,}개", changes[kind]) for kind, count in counts.items() if count]
+            if not rows:
+                messagebox.showinfo("변경 내역", f"{since} 이후 바뀐 항목이 없습니다.")
+                return
+            GroupedResultWindow(self.master, f"변경 내역 ({since} 이후)", "개수", rows)
+
+        BackgroundTask(self.master, "변경 내역", task, on_done)
+
+    def resolve_duplicates(self):
+        if not self.name_infos:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        path = self.path_var.get()
+        name_infos = self.name_infos
+        item_stats = self.item_stats
+
+        def task(report):
+            report("중복 항목 크기 계산 중", 0, 1)
+            return plan_resolution(path, name_infos, item_stats)
+
+        def on_done(plan):
+            if not plan:
+                messagebox.showinfo("중복 정리", "고유 ID가 같은 항목이 없습니다.")
+                return
+            DuplicateResolveWindow(self.master, path, plan, name_infos, item_stats, on_moved=self.validate_items)
+
+        BackgroundTask(self.master, "중복 정리", task, on_done)
+
+    def plan_renames(self):
+        # 스캔부터 이름 변경 계획까지 한 번에 흘려 보냄. 검증을 먼저 하지 않아도 됨
+        path = self.path_var.get()
+        if not path:
+            messagebox.showwarning("경고", "폴더를 선택해주세요.")
+            return
+        extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
+        pipeline = IngestPipeline(path, extensions)
+
+        def task(report):
+            groups = {status: [] for status in PLAN_STATUS_TEXT}
+            counts = dict.fromkeys(PLAN_STATUS_TEXT, 0)
+            last = 0
+            for record in pipeline.run():
+                counts[record['status']] += 1
+                # 창에는 상태별로 앞부분만 표시
+                if record['status'] != 'unchanged' and len(groups[record['status']]) < 1000:
+                    groups[record['status']].append((record['name'], record['new_name'] or record['error'] or ""))
+                if time.monotonic() - last > 0.2:
+                    last = time.monotonic()
+                    bottleneck = pipeline.bottleneck()
+                    report(f"이름 계획 중 - 병목: {PIPELINE_STAGE_TEXT.get(bottleneck, '-')}",
+                           pipeline.stats['plan'].items, max(pipeline.stats['scan'].items, 1))
+            return counts, groups, format_stats(pipeline.snapshot(), pipeline.bottleneck())
+
+        def on_done(result):
+            counts, groups, stats_text = result
+            rows = [(PLAN_STATUS_TEXT[status], f"{counts[status]:,}개", children)
+                    for status, children in groups.items() if children]
+            if rows:
+                GroupedResultWindow(self.master, "이름 자동 계획", "새 이름", rows)
+            summary = ", ".join(f"{PLAN_STATUS_TEXT[status]} {count:,}개" for status, count in counts.items() if count)
+            messagebox.showinfo("이름 자동 계획", f"{summary or '항목이 없습니다.'}\n\n{stats_text}")
+
+        BackgroundTask(self.master, "이름 자동 계획", task, on_done, on_cancel=pipeline.stop)
+
+    def find_near_duplicates(self):
+        if not self.name_infos:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        name_infos = self.name_infos
+
+        def task(report):
+            return find_near_duplicates(
+                name_infos, progress=lambda done, total: report("비슷한 제목 찾는 중", done, total))
+
+        def on_done(groups):
+            if not groups:
+                messagebox.showinfo("완료", "제목이 비슷한 항목이 없습니다.")
+                return
+            rows = []
+            for i, group in enumerate(groups, 1):
+                title = name_infos[group['items'][0]][1]['game_title']
+                children = [(name, f"{group['scores'][name]:.0%} / {group['creator_scores'][name]:.0%}")
+                            for name in group['items']]
+                rows.append((f"그룹 {i} ({len(group['items'])}개) {title}", f"최고 {group['score']:.0%}", children))
+            GroupedResultWindow(self.master, "제목이 비슷한 항목", "제목 / 제작자 유사도", rows)
+
+        BackgroundTask(self.master, "비슷한 제목 찾기", task, on_done)
+
+    def open_gallery(self):
+        rows = self.result_tree.get_children()
+        if not rows:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        # 결과 목록의 현재 정렬 순서대로 표시하고, 표지를 누르면 해당 행을 선택
+        names = [self.result_tree.set(row, "Item") for row in rows]
+
+        def select_row(index):
+            row = rows[index]
+            if self.result_tree.exists(row):
+                self.result_tree.selection_set(row)
+                self.result_tree.see(row)
+
+        GalleryWindow(self.master, names, self.name_infos, on_select=select_row,
+                      path=self.path_var.get(), item_stats=self.item_stats, archive_index=self.archive_index)
+
+    def name_selector(self):
+        # 결과 목록에서 이름으로 행을 찾아 선택하는 함수. 다시 검증하여 사라진 행은 무시
+        rows = {self.result_tree.set(row, "Item"): row for row in self.result_tree.get_children()}
+
+        def select_name(name):
+            row = rows.get(name)
+            if row and self.result_tree.exists(row):
+                self.result_tree.selection_set(row)
+                self.result_tree.see(row)
+
+        return select_name
+
+    def open_tag_search(self):
+        if not self.name_infos:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        name_infos = self.name_infos
+
+        def task(report):
+            report("태그 색인 만드는 중", 0, 1)
+            cache = MetadataCache()
+            try:
+                item_tags = cache.load_tags()
+            finally:
+                cache.close()
+            return TagIndex.build(name_infos, item_tags)
+
+        def on_done(index):
+            TagSearchWindow(self.master, index, on_select=self.name_selector())
+
+        BackgroundTask(self.master, "태그 검색", task, on_done)
+
+    def open_crawl_jobs(self):
+        # 검증한 폴더가 있으면 그 폴더의 조회할 수 있는 항목으로 새 작업을 만들 수 있음
+        keys = [(info['platform'], info['unique_id']) for is_valid, info in self.name_infos.values()
+                if is_valid and get_provider(info['platform'])]
+        CrawlJobsWindow(self.master, keys, self.path_var.get())
+
+    def check_consistency(self):
+        if not self.name_infos:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        path = self.path_var.get()
+        name_infos = self.name_infos
+        item_stats = self.item_stats
+
+        def task(report):
+            report("웹 정보 불러오는 중", 0, 1)
+            return check_consistency(path, name_infos, item_stats, progress=report)
+
+        def on_done(result):
+            if not result['checked']:
+                messagebox.showinfo("웹 정보 대조", "조회해 둔 웹 정보가 없습니다. 먼저 크롤링해주세요.")
+                return
+            ConsistencyWindow(self.master, result, on_select=self.name_selector())
+
+        BackgroundTask(self.master, "웹 정보 대조", task, on_done)
+
+    def analyze_disk_usage(self):
+        if not self.item_stats:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        path = self.path_var.get()
+        item_stats = self.item_stats
+        name_infos = self.name_infos
+
+        def task(report):
+            return compute_disk_usage(path, item_stats, name_infos,
+                                      progress=lambda done, total: report("폴더 용량 계산 중", done, total))
+
+        BackgroundTask(self.master, "용량 분석", task, lambda result: DiskUsageWindow(self.master, result))
+
+    def check_updates(self):
+        if not self.name_infos:
+            messagebox.showwarning("경고", "먼저 폴더를 검증해주세요.")
+            return
+
+        name_infos = self.name_infos
+        stop = threading.Event()
+
+        def task(report):
+            return check_updates(name_infos, stop=stop,
+                                 progress=lambda done, total: report("업데이트 확인 중", done, total))
+
+        def on_done(result):
+            summary = (f"확인: {result['checked']}개 (변경 없음 {result['not_modified']}개, 오류 {result['error']}개)\n"
+                       f"최근 확인하여 건너뜀: {result['items'] - result['due']}개, 남은 항목: {result['remaining']}개")
+            if not result['updates']:
+                messagebox.showinfo("업데이트 확인 완료", f"{summary}\n\n업데이트가 있는 작품이 없습니다.")
+                return
+            groups = [(f"[{entry['unique_id']}] {entry['title']}",
+                       "새 업데이트" if entry['new'] else "업데이트 있음",
+                       entry['names'])
+                      for entry in result['updates']]
+            GroupedResultWindow(self.master, "업데이트 확인 결과", "상태", groups)
+            messagebox.showinfo("업데이트 확인 완료", summary)
+
+        BackgroundTask(self.master, "업데이트 확인", task, on_done, on_cancel=stop.set)
+
+    def open_diagnostics_window(self):
+        DiagnosticsWindow(self.master)
 
 if __name__ == "__main__":
+    # PyInstaller로 빌드한 실행 파일에서 분류 작업자 프로세스를 시작하기 위해 필요
+    multiprocessing.freeze_support()
+    # 환경 변수로 지정하면 웹 요청을 기록/재생하거나 로컬 대체 서버로 보냄
+    configure_from_env()
+    service_client = connect_from_env()
     root = tk.Tk()
-    app = ModernGameItemValidatorApp(root)
+    app = ModernGameItemValidatorApp(root, service_client)
     root.mainloop()
\ No newline at end of file
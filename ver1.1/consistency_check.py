@@ -0,0 +1,165 @@
+import argparse
+import csv
+import difflib
+import os
+import re
+
+from constants import DEFAULT_EXTENSIONS
+from disk_usage import compute_disk_usage, format_size
+from metrics import metrics
+from near_duplicates import normalize
+from metadata_cache import MetadataCache
+from utils import scan_items, validate_name
+
+try:
+    from rapidfuzz.fuzz import ratio as fuzz_ratio
+except ImportError:
+    fuzz_ratio = None
+
+# 이름 변경 창의 일치도(Confidence)와 같은 비중
+WEIGHTS = {'title': 40, 'creator': 30, 'genre': 30}
+MISMATCH_SCORE = 0.6  # 항목별 유사도가 이보다 낮으면 불일치로 표시
+SIZE_TOLERANCE = 0.9  # 로컬 용량이 웹에 표시된 용량의 90%보다 작으면 덜 받은 파일로 의심
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+FIELD_TEXT = {'title': "제목", 'creator': "제작자", 'genre': "장르"}
+
+def parse_file_size(text):
+    # 웹 정보의 FileSize("1,234MB", "2.5 GB" 등) -> 바이트. 알 수 없으면 None
+    match = re.search(r'([\d.,]+)\s*(TB|GB|MB|KB|B)\b', str(text or ''), re.IGNORECASE)
+    if not match:
+        return None
+    try:
+        return int(float(match.group(1).replace(',', '')) * SIZE_UNITS[match.group(2).upper()])
+    except ValueError:
+        return None
+
+def similarity(a, b):
+    # 0~1. 어느 한쪽을 알 수 없으면 None
+    if not a or not b or 'N/A' in (a, b):
+        return None
+    a, b = normalize(a), normalize(b)
+    if not a or not b:
+        return None
+    if a == b:
+        return 1.0
+    if fuzz_ratio is not None:
+        return fuzz_ratio(a, b) / 100
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+def compare_item(info, crawled, local_size):
+    scores = {
+        'title': similarity(info['game_title'], crawled.get('Title')),
+        'creator': similarity(info['creator'], crawled.get('Creator')),
+        # ANO는 웹 장르를 프로그램 장르로 바꾸지 못한 경우이므로 비교하지 않음
+        'genre': None if crawled.get('Genre') in (None, 'ANO') else float(info['genre'] == crawled['Genre'])
+    }
+    known = {field: score for field, score in scores.items() if score is not None}
+    score = (sum(WEIGHTS[field] * value for field, value in known.items()) / sum(WEIGHTS[field] for field in known)
+             if known else None)
+
+    remote_size = parse_file_size(crawled.get('FileSize'))
+    size_ratio = local_size / remote_size if local_size is not None and remote_size else None
+
+    issues = [f"{FIELD_TEXT[field]} {value:.0%}" for field, value in known.items() if value < MISMATCH_SCORE]
+    if size_ratio is not None and size_ratio < SIZE_TOLERANCE:
+        issues.append(f"용량 {size_ratio:.0%}")
+    return {
+        'score': score,
+        **scores,
+        'local_size': local_size,
+        'remote_size': remote_size,
+        'size_ratio': size_ratio,
+        'crawled_title': crawled.get('Title'),
+        'crawled_creator': crawled.get('Creator'),
+        'issues': issues
+    }
+
+def check_consistency(path, name_infos, item_stats, cache=None, progress=None):
+    # 조회해 둔 웹 정보(MetadataCache)가 있는 유효한 항목 전체를 한 번에 비교
+    own_cache = cache is None
+    cache = cache or MetadataCache()
+    try:
+        with metrics.timer("consistency.load"):
+            by_platform = {}
+            for name, (is_valid, info) in name_infos.items():
+                if is_valid:
+                    by_platform.setdefault(info['platform'], set()).add(info['unique_id'])
+            crawled = {}
+            for platform, unique_ids in by_platform.items():
+                for unique_id, row in cache.load(platform, unique_ids).items():
+                    if row['info']:
+                        crawled[(platform, unique_id)] = row['info']
+    finally:
+        if own_cache:
+            cache.close()
+
+    targets = {name: crawled[(info['platform'], info['unique_id'])] for name, (is_valid, info) in name_infos.items()
+               if is_valid and (info['platform'], info['unique_id']) in crawled}
+
+    # 폴더 용량은 웹 용량과 비교할 항목만 계산 (용량 분석과 같은 캐시 사용)
+    folders = {name: item_stats[name] for name, info in targets.items()
+               if name in item_stats and item_stats[name]['is_dir'] and parse_file_size(info.get('FileSize'))}
+    local_sizes = {name: stat['size'] for name, stat in item_stats.items() if not stat['is_dir']}
+
+    def folder_progress(done, total):
+        if progress:
+            progress("폴더 용량 계산 중", done, total)
+
+    if folders:
+        usage = compute_disk_usage(path, folders, name_infos, progress=folder_progress)
+        local_sizes.update({name: size for name, (size, _) in usage['item_sizes'].items()})
+
+    rows = []
+    with metrics.timer("consistency.compare"):
+        for done, (name, crawled_info) in enumerate(targets.items(), 1):
+            info = name_infos[name][1]
+            row = compare_item(info, crawled_info, local_sizes.get(name))
+            row.update(name=name, platform=info['platform'], unique_id=info['unique_id'])
+            rows.append(row)
+            if progress and done % 500 == 0:
+                progress("비교 중", done, len(targets))
+    # 문제가 있는 항목부터, 그 안에서는 종합 유사도가 낮은 순
+    rows.sort(key=lambda row: (not row['issues'], row['score'] if row['score'] is not None else 1.0, row['name']))
+
+    metrics.increment("consistency.checked", len(rows))
+    metrics.increment("consistency.mismatched", sum(1 for row in rows if row['issues']))
+    return {
+        'rows': rows,
+        'checked': len(rows),
+        'mismatched': sum(1 for row in rows if row['issues']),
+        'not_crawled': sum(1 for is_valid, _ in name_infos.values() if is_valid) - len(rows)
+    }
+
+def write_csv(rows, file_path):
+    columns = ('name', 'platform', 'unique_id', 'score', 'title', 'creator', 'genre',
+               'local_size', 'remote_size', 'size_ratio', 'crawled_title', 'crawled_creator', 'issues')
+    with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([", ".join(row[column]) if column == 'issues' else row[column] for column in columns])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="파일/폴더명과 조회해 둔 웹 정보(제목/제작자/장르/용량)를 한 번에 비교")
+    parser.add_argument('path')
+    parser.add_argument('--csv', help="결과를 저장할 CSV 파일")
+    parser.add_argument('--all', action='store_true', help="불일치가 없는 항목도 포함")
+    args = parser.parse_args(argv)
+
+    path = os.path.abspath(args.path)
+    item_stats = scan_items(path, DEFAULT_EXTENSIONS)
+    name_infos = {name: validate_name(name) for name in item_stats}
+    result = check_consistency(path, name_infos, item_stats)
+    rows = result['rows'] if args.all else [row for row in result['rows'] if row['issues']]
+    if args.csv:
+        write_csv(rows, args.csv)
+    else:
+        for row in rows:
+            score = f"{row['score']:.0%}" if row['score'] is not None else "-"
+            size = (f"  {format_size(row['local_size'])} / {format_size(row['remote_size'])}"
+                    if row['size_ratio'] is not None else "")
+            print(f"{score:>5}  {', '.join(row['issues']) or '-'}{size}  {row['name']}")
+    print(f"비교 {result['checked']}개, 불일치 {result['mismatched']}개, 웹 정보 없음 {result['not_crawled']}개")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+
+VALID_GENRES = {'RPG', 'ACT', 'SIM', 'ADV', 'VOD', 'SHT', 'NOV', 'ANO'}
+DEFAULT_EXTENSIONS = ['.zip', '.rar', '.7z', '']
+
+# 해시, 메타데이터 등 캐시 파일 저장 위치
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.giana')
+
+# 폴더에 저장하는 웹 정보 파일 (sidecar.py). 스캔 목록에서는 제외
+MANIFEST_NAME = '.giana_manifest'
+SIDECAR_SUFFIX = '.giana'
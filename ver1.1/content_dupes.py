@@ -0,0 +1,214 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import CACHE_DIR
+from metrics import metrics
+
+HEAD_TAIL_SIZE = 64 * 1024
+FULL_HASH_BLOCK = 8 * 1024 * 1024
+
+class HashCache:
+    def __init__(self, db_path=None):
+        db_path = db_path or os.path.join(CACHE_DIR, 'hash_cache.db')
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                partial TEXT,
+                full TEXT
+            )
+        """)
+        self.entries = {}
+
+    def load(self, paths):
+        # 후보 파일의 캐시를 한 번에 읽어둠
+        paths = list(paths)
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT path, size, mtime, partial, full FROM file_hashes WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk)
+            for path, size, mtime, partial, full in rows:
+                self.entries[path] = {'size': size, 'mtime': mtime, 'partial': partial, 'full': full}
+
+    def get(self, path, size, mtime, kind):
+        entry = self.entries.get(path)
+        if entry and entry['size'] == size and entry['mtime'] == mtime:
+            return entry[kind]
+        return None
+
+    def put(self, path, size, mtime, kind, value):
+        entry = self.entries.get(path)
+        if not entry or entry['size'] != size or entry['mtime'] != mtime:
+            entry = {'size': size, 'mtime': mtime, 'partial': None, 'full': None}
+            self.entries[path] = entry
+        entry[kind] = value
+        self.conn.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime, partial, full) VALUES (?, ?, ?, ?, ?)",
+            (path, size, mtime, entry['partial'], entry['full']))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def partial_hash(file_path, size):
+    # 앞/뒤 일부만 읽어 크기가 같은 파일을 빠르게 구분
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(size).encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(HEAD_TAIL_SIZE))
+        if size > HEAD_TAIL_SIZE:
+            f.seek(max(HEAD_TAIL_SIZE, size - HEAD_TAIL_SIZE))
+            digest.update(f.read(HEAD_TAIL_SIZE))
+    return digest.hexdigest()
+
+def full_hash(file_path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                # 큰 블록 단위로 넘기면 해시 계산 중 GIL이 풀려 스레드 병렬 처리가 가능
+                for offset in range(0, len(view), FULL_HASH_BLOCK):
+                    digest.update(view[offset:offset + FULL_HASH_BLOCK])
+    return digest.hexdigest()
+
+def walk_files(folder_path):
+    files = []
+    for root, dirs, names in os.walk(folder_path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            files.append((file_path, stat.st_size, stat.st_mtime_ns))
+    return files
+
+def group_by(keys):
+    groups = {}
+    for item, key in keys.items():
+        if key is None:
+            continue
+        groups.setdefault(key, []).append(item)
+    return [items for items in groups.values() if len(items) > 1]
+
+class ContentDuplicateFinder:
+    def __init__(self, path, item_stats, cache=None, workers=None, progress=None):
+        self.path = path
+        self.item_stats = item_stats
+        self.cache = cache or HashCache()
+        self.workers = workers or min(8, (os.cpu_count() or 1) * 2)
+        self.progress = progress  # progress(단계, 완료 수, 전체 수)
+        self.folder_files = {}
+
+    def report(self, stage, done, total):
+        if self.progress:
+            self.progress(stage, done, total)
+
+    def file_hashes(self, files, kind):
+        # files: (경로, 크기, 수정 시각) 목록. 캐시에 없는 것만 계산
+        hashes = {}
+        missing = []
+        for file_path, size, mtime in files:
+            value = self.cache.get(file_path, size, mtime, kind)
+            if value is None and kind == 'full' and size <= HEAD_TAIL_SIZE * 2:
+                # 앞/뒤 해시가 파일 전체를 포함하는 경우
+                value = self.cache.get(file_path, size, mtime, 'partial')
+            if value is None:
+                missing.append((file_path, size, mtime))
+            else:
+                hashes[file_path] = value
+        metrics.increment(f"content_dupes.{kind}.cached", len(hashes))
+
+        def compute(entry):
+            file_path, size, mtime = entry
+            try:
+                if kind == 'partial' or size <= HEAD_TAIL_SIZE * 2:
+                    return entry, partial_hash(file_path, size)
+                return entry, full_hash(file_path)
+            except (OSError, ValueError):
+                return entry, None
+
+        with metrics.timer(f"content_dupes.{kind}"):
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for done, ((file_path, size, mtime), value) in enumerate(executor.map(compute, missing), 1):
+                    hashes[file_path] = value
+                    if value is not None:
+                        self.cache.put(file_path, size, mtime, kind, value)
+                    self.report(kind, done, len(missing))
+        self.cache.commit()
+        metrics.increment(f"content_dupes.{kind}.computed", len(missing))
+        return hashes
+
+    def item_files(self, name):
+        stat = self.item_stats[name]
+        item_path = os.path.join(self.path, name)
+        if not stat['is_dir']:
+            return [(item_path, stat['size'], stat['mtime'])]
+        if name not in self.folder_files:
+            self.folder_files[name] = walk_files(item_path)
+        return self.folder_files[name]
+
+    def item_size_key(self, name):
+        stat = self.item_stats[name]
+        if not stat['is_dir']:
+            return ('file', stat['size']) if stat['size'] else None
+        files = self.item_files(name)
+        total = sum(size for _, size, _ in files)
+        return ('dir', len(files), total) if total else None
+
+    def item_hash_key(self, names, kind):
+        files = [entry for name in names for entry in self.item_files(name)]
+        self.cache.load(file_path for file_path, _, _ in files)
+        hashes = self.file_hashes(files, kind)
+
+        keys = {}
+        for name in names:
+            member_hashes = [hashes.get(file_path) for file_path, _, _ in self.item_files(name)]
+            if not member_hashes or None in member_hashes:
+                keys[name] = None
+            elif len(member_hashes) == 1 and not self.item_stats[name]['is_dir']:
+                keys[name] = member_hashes[0]
+            else:
+                # 폴더는 내부 파일 이름과 무관하게 내용 해시 목록으로 비교
+                keys[name] = hashlib.blake2b(
+                    "\n".join(sorted(member_hashes)).encode(), digest_size=20).hexdigest()
+        return keys
+
+    def find(self):
+        # 1단계: 스캔 시 얻은 크기(폴더는 파일 수와 전체 크기)로 후보 선별
+        with metrics.timer("content_dupes.size"):
+            candidates = group_by({name: self.item_size_key(name) for name in self.item_stats})
+
+        # 2단계: 크기가 같은 항목끼리 앞/뒤 일부 해시 비교
+        groups = []
+        for names in candidates:
+            partial_keys = self.item_hash_key(names, 'partial')
+            groups.extend(group_by(partial_keys))
+
+        # 3단계: 남은 충돌만 전체 해시로 확인
+        duplicates = []
+        for names in groups:
+            full_keys = self.item_hash_key(names, 'full')
+            duplicates.extend(group_by(full_keys))
+
+        metrics.increment("content_dupes.groups", len(duplicates))
+        return [sorted(names) for names in duplicates]
+
+def find_content_duplicates(path, item_stats, cache=None, workers=None, progress=None):
+    own_cache = cache is None
+    cache = cache or HashCache()
+    try:
+        return ContentDuplicateFinder(path, item_stats, cache, workers, progress).find()
+    finally:
+        if own_cache:
+            cache.close()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metadata_providers import configure_providers, get_provider, get_session
+from metrics import metrics
+from stand_in_server import add_server_arguments, server_options, start_server
+
+BENCHMARK_VERSION = 1
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # nearest-rank 방식
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def latency_summary(latencies, elapsed):
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'per_sec': len(values) / elapsed if elapsed else None,
+        'min': values[0] if values else None,
+        'p50': percentile(values, 0.50),
+        'p90': percentile(values, 0.90),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': values[-1] if values else None
+    }
+
+def make_session(workers):
+    # 작업 스레드 수만큼 연결을 재사용할 수 있도록 연결 풀 크기를 맞춤
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def run_crawl(config):
+    provider = get_provider('DLsite')
+    provider.min_interval = config['min_interval']
+    session = get_session()
+    product_ids = [f"RJ{config['first_id'] + i:08d}" for i in range(config['requests'])]
+    page_latencies = []
+    image_latencies = []
+    failures = {'page': 0, 'image': 0}
+
+    def crawl(product_id):
+        start = time.perf_counter()
+        info = provider.fetch(product_id)
+        page_elapsed = time.perf_counter() - start
+        if info is None:
+            return page_elapsed, None, 'page'
+        if not config['images'] or not info['ImageURL']:
+            return page_elapsed, None, None
+        start = time.perf_counter()
+        try:
+            response = session.get(info['ImageURL'], timeout=provider.timeout)
+            response.raise_for_status()
+        except requests.RequestException:
+            return page_elapsed, None, 'image'
+        return page_elapsed, time.perf_counter() - start, None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config['workers']) as executor:
+        for page_elapsed, image_elapsed, failure in executor.map(crawl, product_ids):
+            # 실패한 요청은 지연 시간 분포에서 제외하고 개수만 기록
+            if failure == 'page':
+                failures['page'] += 1
+                continue
+            page_latencies.append(page_elapsed)
+            if failure == 'image':
+                failures['image'] += 1
+            elif image_elapsed is not None:
+                image_latencies.append(image_elapsed)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'elapsed': elapsed,
+        'page': latency_summary(page_latencies, elapsed),
+        'image': latency_summary(image_latencies, elapsed),
+        'failures': failures
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 대체 서버를 이용한 크롤러 처리량/지연 시간 측정")
+    parser.add_argument('--requests', type=int, default=2000, help="조회할 작품 수")
+    parser.add_argument('--workers', type=int, default=8, help="동시 조회 스레드 수")
+    parser.add_argument('--min-interval', type=float, default=0.0, help="요청 간 최소 간격(초). 실제 사이트 기준은 1.0")
+    parser.add_argument('--images', action='store_true', help="작품마다 이미지도 내려받음")
+    parser.add_argument('--first-id', type=int, default=1000000)
+    parser.add_argument('--url', help="이미 실행 중인 대체 서버 주소 (기본: 내장 서버 실행)")
+    parser.add_argument('--output', help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    config = {
+        'requests': args.requests,
+        'workers': args.workers,
+        'min_interval': args.min_interval,
+        'images': args.images,
+        'first_id': args.first_id
+    }
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        options = server_options(args)
+        server = start_server(**options)
+        base_url = server.base_url
+        config['server'] = dict(options, cassette=args.cassette)
+
+    configure_providers({'DLsite': base_url}, make_session(args.workers))
+    metrics.reset()
+    try:
+        results = run_crawl(config)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        configure_providers()
+
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'base_url': base_url,
+        'config': config,
+        'results': results,
+        'server_stats': server.stats if server is not None else None,
+        'metrics': metrics.snapshot()
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from constants import CACHE_DIR, DEFAULT_EXTENSIONS
+from http_replay import configure_from_env
+from lookup_scheduler import lookup_scheduler
+from metadata_providers import get_provider
+from metrics import metrics
+from metadata_cache import MetadataCache
+from utils import scan_items, validate_name
+
+MAX_ATTEMPTS = 3  # 실패한 항목을 다시 시도하는 최대 횟수
+
+def keys_digest(keys):
+    # 같은 항목 목록으로 다시 조회할 때 끝나지 않은 작업을 찾기 위한 값
+    text = "\n".join(f"{platform}\t{unique_id}" for platform, unique_id in sorted(keys))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class CrawlJobStore:
+    # 조회 작업과 항목별 상태(pending/done/failed)를 저장. 항목 하나가 끝날 때마다 기록하므로
+    # 창을 닫거나 프로그램이 종료되어도 끝난 항목은 다시 조회하지 않음
+    def __init__(self, db_path=None):
+        db_path = os.path.abspath(db_path or os.path.join(CACHE_DIR, 'crawl_jobs.db'))
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # 명령줄에서 실행 중인 작업의 진행 상황을 GUI에서 읽을 수 있도록 WAL 사용
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                keys_hash TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id INTEGER NOT NULL,
+                platform TEXT NOT NULL,
+                unique_id TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL,
+                PRIMARY KEY (job_id, platform, unique_id)
+            )
+        """)
+        self.conn.commit()
+
+    def create_job(self, name, keys):
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (name, keys_hash, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (name, keys_digest(keys), now, now))
+            job_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO job_items (job_id, platform, unique_id) VALUES (?, ?, ?)",
+                [(job_id, platform, unique_id) for platform, unique_id in keys])
+            self.conn.commit()
+        return job_id
+
+    def find_or_create(self, name, keys):
+        # 같은 항목 목록의 끝나지 않은 작업이 있으면 이어서 사용. (작업 번호, 이어서 하는지 여부)
+        keys = list(dict.fromkeys(keys))
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT job_id FROM jobs WHERE keys_hash = ? AND finished_at IS NULL ORDER BY job_id DESC LIMIT 1",
+                (keys_digest(keys),)).fetchone()
+        if row:
+            return row[0], True
+        return self.create_job(name, keys), False
+
+    def keys(self, job_id, status):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT platform, unique_id FROM job_items WHERE job_id = ? AND status = ?", (job_id, status))
+            return [tuple(row) for row in rows]
+
+    def resumable(self, job_id, max_attempts=MAX_ATTEMPTS):
+        # 아직 조회하지 않은 항목과 다시 시도할 수 있는 실패 항목
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT platform, unique_id FROM job_items WHERE job_id = ? "
+                "AND (status = 'pending' OR (status = 'failed' AND attempts < ?)) ORDER BY rowid",
+                (job_id, max_attempts))
+            return [tuple(row) for row in rows]
+
+    def mark(self, job_id, key, ok):
+        self.mark_many(job_id, [(key, ok)])
+
+    def mark_many(self, job_id, results):
+        # results: [((플랫폼, 고유 ID), 성공 여부)]. 한 번에 기록
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE job_items SET status = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE job_id = ? AND platform = ? AND unique_id = ?",
+                [('done' if ok else 'failed', now, job_id, key[0], key[1]) for key, ok in results])
+            self.conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (now, job_id))
+            self.conn.commit()
+
+    def finish_if_done(self, job_id, max_attempts=MAX_ATTEMPTS):
+        # 남은 항목이 없으면 끝난 작업으로 표시. 다시 시도할 수 없는 실패 항목은 남은 것으로 보지 않음
+        if self.resumable(job_id, max_attempts):
+            return False
+        with self.lock:
+            self.conn.execute("UPDATE jobs SET finished_at = ? WHERE job_id = ? AND finished_at IS NULL",
+                              (time.time(), job_id))
+            self.conn.commit()
+        return True
+
+    def list_jobs(self):
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT jobs.job_id, name, created_at, jobs.updated_at, finished_at,
+                       COUNT(job_items.unique_id),
+                       SUM(status = 'done'), SUM(status = 'failed'), SUM(status = 'pending')
+                FROM jobs LEFT JOIN job_items ON job_items.job_id = jobs.job_id
+                GROUP BY jobs.job_id ORDER BY jobs.job_id DESC
+            """).fetchall()
+        return [{'job_id': job_id, 'name': name, 'created_at': created_at, 'updated_at': updated_at,
+                 'finished_at': finished_at, 'total': total, 'done': done or 0, 'failed': failed or 0,
+                 'pending': pending or 0}
+                for job_id, name, created_at, updated_at, finished_at, total, done, failed, pending in rows]
+
+    def job(self, job_id):
+        return next((job for job in self.list_jobs() if job['job_id'] == job_id), None)
+
+    def delete(self, job_id):
+        with self.lock:
+            self.conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            self.conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def run_job(store, job_id, cache, scheduler=None, time_budget=None, stop=None, progress=None,
+            max_attempts=MAX_ATTEMPTS):
+    # 남은 항목을 조회하고 결과를 항목마다 저장. 중단되면 끝난 항목까지만 기록된 상태로 돌아감
+    scheduler = scheduler or lookup_scheduler
+    stop = stop or threading.Event()
+    deadline = time.monotonic() + time_budget if time_budget else None
+    keys = store.resumable(job_id, max_attempts)
+    for key in [key for key in keys if get_provider(key[0]) is None]:
+        store.mark(job_id, key, False)
+    keys = [key for key in keys if get_provider(key[0]) is not None]
+
+    owner = object()
+    received = queue.Queue()
+    for platform, unique_id in keys:
+        scheduler.submit(platform, unique_id, owner, lambda key, info: received.put((key, info)))
+
+    attempted = 0
+    try:
+        with metrics.timer("crawl_job.run"):
+            while attempted < len(keys):
+                if stop.is_set() or (deadline and time.monotonic() > deadline):
+                    break
+                try:
+                    key, info = received.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if info:
+                    cache.put_info(key[0], key[1], info, time.time())
+                    cache.commit()
+                store.mark(job_id, key, bool(info))
+                attempted += 1
+                metrics.increment("crawl_job.done" if info else "crawl_job.failed")
+                if progress:
+                    progress(attempted, len(keys))
+    finally:
+        # 남은 조회는 버리고, 다음 실행 때 pending 상태부터 이어서 조회
+        scheduler.cancel(owner)
+
+    finished = store.finish_if_done(job_id, max_attempts)
+    return dict(store.job(job_id), attempted=attempted, remaining=len(keys) - attempted, finished=finished)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="여러 번에 나누어 실행할 수 있는 대량 웹 정보 조회 작업")
+    parser.add_argument('--db', help="작업 파일 (기본: ~/.giana/crawl_jobs.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create = commands.add_parser('create', help="폴더의 유효한 항목으로 작업 만들기")
+    create.add_argument('path')
+    create.add_argument('--name', help="작업 이름 (기본: 폴더 경로)")
+
+    run = commands.add_parser('run', help="작업을 이어서 실행 (Ctrl+C로 중단해도 다음에 이어서 실행)")
+    run.add_argument('job_id', type=int)
+    run.add_argument('--time-budget', type=float, help="이번에 실행할 최대 시간(분)")
+    run.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help="실패한 항목의 최대 시도 횟수")
+
+    commands.add_parser('list', help="작업 목록과 진행 상황")
+    args = parser.parse_args(argv)
+
+    store = CrawlJobStore(args.db)
+    try:
+        if args.command == 'create':
+            path = os.path.abspath(args.path)
+            keys = []
+            for name in scan_items(path, DEFAULT_EXTENSIONS):
+                is_valid, info = validate_name(name)
+                if is_valid and get_provider(info['platform']) is not None:
+                    keys.append((info['platform'], info['unique_id']))
+            if not keys:
+                parser.error(f"{path}: 조회할 수 있는 항목이 없습니다.")
+            job_id = store.create_job(args.name or path, keys)
+            print(f"작업 {job_id}: {len(set(keys))}개 항목")
+        elif args.command == 'run':
+            if store.job(args.job_id) is None:
+                parser.error(f"작업 {args.job_id}을(를) 찾을 수 없습니다.")
+            configure_from_env()
+            cache = MetadataCache()
+            stop = threading.Event()
+
+            def progress(done, total):
+                if done % 10 == 0 or done == total:
+                    print(f"\r{done}/{total}", end='', flush=True)
+
+            try:
+                result = run_job(store, args.job_id, cache,
+                                 time_budget=args.time_budget * 60 if args.time_budget else None,
+                                 stop=stop, progress=progress, max_attempts=args.max_attempts)
+            except KeyboardInterrupt:
+                stop.set()
+                result = dict(store.job(args.job_id), finished=False)
+            finally:
+                cache.close()
+            print(f"\n작업 {args.job_id}: 완료 {result['done']}, 실패 {result['failed']}, 대기 {result['pending']} / "
+                  f"{result['total']}" + (" (끝남)" if result['finished'] else ""))
+        else:
+            for job in store.list_jobs():
+                state = "끝남" if job['finished_at'] else "진행 중"
+                updated = time.strftime('%Y-%m-%d %H:%M', time.localtime(job['updated_at']))
+                print(f"{job['job_id']:>4}  {state}  완료 {job['done']}, 실패 {job['failed']}, 대기 {job['pending']} / "
+                      f"{job['total']}  {updated}  {job['name']}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import CACHE_DIR
+from metrics import metrics
+
+INVALID_LABEL = "(유효하지 않은 이름)"
+GROUP_FIELDS = ('creator', 'platform', 'genre')
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:,.0f} {unit}" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+class DirSizeCache:
+    # 폴더 경로 -> (수정 시각, 바로 아래 파일 크기 합, 파일 수, 하위 폴더 이름 목록)
+    # 폴더의 수정 시각은 바로 아래 항목이 추가/삭제/이름 변경될 때 바뀌므로, 같으면 다시 읽지 않음
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(CACHE_DIR, 'dir_sizes.db')
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        # 작업 스레드의 읽기와 쓰기가 겹칠 수 있도록 WAL 사용
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS dir_sizes (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER NOT NULL,
+                files_size INTEGER NOT NULL,
+                file_count INTEGER NOT NULL,
+                subdirs TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.local = threading.local()
+
+    def load_tree(self, root):
+        # 작업 스레드에서 호출. 스레드마다 따로 연결을 사용
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.db_path)
+        prefix = os.path.join(root, '')
+        rows = conn.execute(
+            "SELECT path, mtime, files_size, file_count, subdirs FROM dir_sizes "
+            "WHERE path = ? OR (path >= ? AND path < ?)",
+            (root, prefix, prefix + '\U0010ffff'))
+        return {path: (mtime, files_size, file_count, json.loads(subdirs))
+                for path, mtime, files_size, file_count, subdirs in rows}
+
+    def put_many(self, rows):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO dir_sizes (path, mtime, files_size, file_count, subdirs) VALUES (?, ?, ?, ?, ?)",
+            [(path, mtime, files_size, file_count, json.dumps(subdirs, ensure_ascii=False))
+             for path, (mtime, files_size, file_count, subdirs) in rows])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def walk_tree(root, cached):
+    # 수정 시각이 바뀐 폴더만 다시 읽고 나머지는 캐시의 합계와 하위 폴더 목록을 사용
+    total_size = 0
+    file_count = 0
+    new_rows = []
+    reused = 0
+    stack = [root]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            continue
+        entry = cached.get(dir_path)
+        if entry is None or entry[0] != mtime:
+            files_size = files = 0
+            subdirs = []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for dir_entry in entries:
+                        try:
+                            if dir_entry.is_dir(follow_symlinks=False):
+                                subdirs.append(dir_entry.name)
+                            elif dir_entry.is_file(follow_symlinks=False):
+                                files_size += dir_entry.stat(follow_symlinks=False).st_size
+                                files += 1
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            entry = (mtime, files_size, files, subdirs)
+            new_rows.append((dir_path, entry))
+        else:
+            reused += 1
+        total_size += entry[1]
+        file_count += entry[2]
+        stack.extend(os.path.join(dir_path, name) for name in entry[3])
+    return total_size, file_count, new_rows, reused
+
+def aggregate(item_sizes, name_infos):
+    # 분석한 이름의 제작자/플랫폼/장르별 (용량, 항목 수)
+    groups = {field: {} for field in GROUP_FIELDS}
+    for name, (size, _) in item_sizes.items():
+        is_valid, info = name_infos.get(name, (False, None))
+        for field in GROUP_FIELDS:
+            value = info[field] if is_valid else INVALID_LABEL
+            entry = groups[field].setdefault(value, [0, 0])
+            entry[0] += size
+            entry[1] += 1
+    return groups
+
+def compute_disk_usage(path, item_stats, name_infos, cache=None, workers=8, progress=None):
+    own_cache = cache is None
+    cache = cache or DirSizeCache()
+    item_sizes = {}  # 이름 -> (용량, 파일 수)
+    folders = []
+    for name, stat in item_stats.items():
+        if stat['is_dir']:
+            folders.append(name)
+        else:
+            item_sizes[name] = (stat['size'], 1)
+
+    def measure(name):
+        root = os.path.abspath(os.path.join(path, name))
+        return name, walk_tree(root, cache.load_tree(root))
+
+    walked = reused = 0
+    try:
+        with metrics.timer("disk_usage"):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for done, (name, (size, count, new_rows, reused_count)) in enumerate(executor.map(measure, folders), 1):
+                    item_sizes[name] = (size, count)
+                    if new_rows:
+                        cache.put_many(new_rows)
+                    walked += len(new_rows)
+                    reused += reused_count
+                    if done % 100 == 0:
+                        cache.commit()
+                    if progress:
+                        progress(done, len(folders))
+        cache.commit()
+    finally:
+        if own_cache:
+            cache.close()
+    metrics.increment("disk_usage.walked", walked)
+    metrics.increment("disk_usage.reused", reused)
+
+    return {
+        'total_size': sum(size for size, _ in item_sizes.values()),
+        'item_count': len(item_sizes),
+        'item_sizes': item_sizes,
+        'groups': aggregate(item_sizes, name_infos),
+        'walked': walked,
+        'reused': reused
+    }
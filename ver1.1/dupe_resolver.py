@@ -0,0 +1,298 @@
+import argparse
+import errno
+import json
+import os
+import shutil
+import threading
+import time
+
+from constants import DEFAULT_EXTENSIONS
+from disk_usage import compute_disk_usage, format_size
+from metrics import metrics
+from utils import scan_items, validate_name, format_name
+
+COPY_CHUNK = 64 * 1024 * 1024  # 진행 상황을 알리는 단위
+PART_SUFFIX = '.part'
+LOG_NAME = 'quarantine.log'
+# 이 오류는 복사 방법을 지원하지 않는다는 뜻이므로 다음 방법으로 다시 시도
+FALLBACK_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+# 남길 항목을 고르는 규칙. 앞의 규칙부터 비교하고 같으면 다음 규칙으로 비교
+RULES = {
+    'canonical': "표준 형식 이름",
+    'largest': "큰 항목",
+    'newest': "최근 수정",
+}
+DEFAULT_RULES = ('canonical', 'largest', 'newest')
+
+class MoveCancelled(Exception):
+    pass
+
+class SourceNotRemoved(Exception):
+    # 격리 폴더로 복사는 끝났지만 원본을 모두 지우지 못함. 옮긴 것으로 기록해야 다시 복사하지 않음
+    def __init__(self, destination, error):
+        super().__init__(f"복사했지만 원본을 모두 지우지 못했습니다: {error}")
+        self.destination = destination
+        self.error = error
+
+def duplicate_groups(name_infos):
+    # classify_items와 같이 고유 ID가 같은 유효한 항목 묶음
+    by_id = {}
+    for name, (is_valid, info) in name_infos.items():
+        if is_valid:
+            by_id.setdefault(info['unique_id'], []).append(name)
+    return {unique_id: sorted(names) for unique_id, names in by_id.items() if len(names) > 1}
+
+def item_sizes(path, names, item_stats, name_infos):
+    # 폴더 크기는 용량 분석과 같은 캐시로 계산
+    sizes = {name: item_stats[name]['size'] for name in names if not item_stats[name]['is_dir']}
+    folders = {name: item_stats[name] for name in names if item_stats[name]['is_dir']}
+    if folders:
+        usage = compute_disk_usage(path, folders, name_infos)
+        sizes.update({name: size for name, (size, _) in usage['item_sizes'].items()})
+    return sizes
+
+def is_canonical(name, info, is_dir):
+    stem = name if is_dir else os.path.splitext(name)[0]
+    return stem == format_name(info)
+
+def choose_keeper(names, name_infos, item_stats, sizes, rules=DEFAULT_RULES):
+    def key(name):
+        values = []
+        for rule in rules:
+            if rule == 'canonical':
+                values.append(is_canonical(name, name_infos[name][1], item_stats[name]['is_dir']))
+            elif rule == 'largest':
+                values.append(sizes.get(name) or 0)
+            elif rule == 'newest':
+                values.append(item_stats[name]['mtime'])
+        return values
+
+    # 모두 같으면 이름 순으로 처음 것을 남김 (max는 같은 값 중 처음 것을 반환)
+    return max(sorted(names), key=key)
+
+def plan_resolution(path, name_infos, item_stats, rules=DEFAULT_RULES):
+    groups = duplicate_groups(name_infos)
+    names = [name for group in groups.values() for name in group if name in item_stats]
+    sizes = item_sizes(path, names, item_stats, name_infos)
+    plan = []
+    for unique_id, group in sorted(groups.items()):
+        group = [name for name in group if name in item_stats]
+        if len(group) < 2:
+            continue
+        keep = choose_keeper(group, name_infos, item_stats, sizes, rules)
+        plan.append({
+            'unique_id': unique_id,
+            'keep': keep,
+            'move': [name for name in group if name != keep],
+            'sizes': {name: sizes.get(name) for name in group}
+        })
+    return plan
+
+def copy_chunk(src_fd, dst_fd, offset, count, methods):
+    # 커널 안에서 복사(copy_file_range, 안 되면 sendfile)하여 사용자 공간 버퍼를 거치지 않음.
+    # 파일 시스템이 지원하지 않거나 아무것도 복사하지 못한 방법은 methods에서 빼고 다음 방법으로
+    while methods:
+        try:
+            if methods[0] == 'copy_file_range':
+                sent = os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+            else:
+                os.lseek(dst_fd, offset, os.SEEK_SET)
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRORS:
+                raise
+            sent = 0
+        if sent:
+            return sent
+        methods.pop(0)
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    data = os.read(src_fd, count)
+    if not data:
+        raise OSError(errno.EIO, "원본 파일을 끝까지 읽지 못했습니다.")
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.write(dst_fd, data)
+
+def copy_file(src, dst, progress=None, stop=None):
+    flags = getattr(os, 'O_BINARY', 0)
+    src_fd = os.open(src, os.O_RDONLY | flags)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | flags, 0o666)
+        try:
+            size = os.fstat(src_fd).st_size
+            methods = [name for name in ('copy_file_range', 'sendfile') if hasattr(os, name)]
+            copied = 0
+            while copied < size:
+                if stop is not None and stop.is_set():
+                    raise MoveCancelled()
+                sent = copy_chunk(src_fd, dst_fd, copied, min(COPY_CHUNK, size - copied), methods)
+                copied += sent
+                if progress:
+                    progress(sent)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    if os.stat(dst).st_size != size:
+        raise OSError(errno.EIO, f"복사한 크기가 원본과 다릅니다: {dst}")
+    shutil.copystat(src, dst)
+    metrics.increment("dupe_resolver.copied_bytes", copied)
+
+def copy_tree(src, dst, progress=None, stop=None):
+    os.makedirs(dst)
+    for entry in os.scandir(src):
+        target = os.path.join(dst, entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            copy_tree(entry.path, target, progress, stop)
+        elif entry.is_symlink():
+            os.symlink(os.readlink(entry.path), target)
+        else:
+            copy_file(entry.path, target, progress, stop)
+    shutil.copystat(src, dst)
+
+def tree_size(path):
+    # 파일은 크기, 폴더는 안의 모든 파일 크기의 합 (심볼릭 링크는 따라가지 않음)
+    if not os.path.isdir(path) or os.path.islink(path):
+        return os.lstat(path).st_size
+    total = 0
+    for root, dirs, files in os.walk(path):
+        total += sum(os.lstat(os.path.join(root, name)).st_size for name in files)
+    return total
+
+def remove_path(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+def free_destination(folder, name):
+    # 격리 폴더에 같은 이름이 있으면 번호를 붙임
+    stem, ext = os.path.splitext(name)
+    candidate = name
+    number = 2
+    while os.path.lexists(os.path.join(folder, candidate)):
+        candidate = f"{stem} ({number}){ext}"
+        number += 1
+    return os.path.join(folder, candidate)
+
+def move_item(src, folder, progress=None, stop=None):
+    # 같은 장치면 이름만 바꾸고, 다른 장치면 .part로 복사한 뒤 이름을 바꾸고 원본을 지움
+    dst = free_destination(folder, os.path.basename(src))
+    if os.stat(src).st_dev == os.stat(folder).st_dev:
+        os.rename(src, dst)
+        metrics.increment("dupe_resolver.renamed")
+        return dst, False
+    part = dst + PART_SUFFIX
+    remove_path(part)  # 이전에 중단된 복사
+    try:
+        if os.path.isdir(src):
+            copy_tree(src, part, progress, stop)
+        else:
+            copy_file(src, part, progress, stop)
+        # 원본을 지우기 전에 옮긴 크기를 다시 확인
+        if tree_size(part) != tree_size(src):
+            raise OSError(errno.EIO, f"복사한 크기가 원본과 다릅니다: {src}")
+        os.rename(part, dst)
+    except BaseException:
+        remove_path(part)
+        raise
+    metrics.increment("dupe_resolver.copied")
+    try:
+        remove_path(src)
+    except OSError as e:
+        metrics.increment("dupe_resolver.source_not_removed")
+        raise SourceNotRemoved(dst, e)
+    return dst, True
+
+def move_duplicates(path, plan, quarantine, progress=None, stop=None):
+    # plan의 move 항목을 격리 폴더로 옮기고 옮긴 내용을 격리 폴더의 로그에 기록
+    os.makedirs(quarantine, exist_ok=True)
+    jobs = [(entry, name) for entry in plan for name in entry['move']]
+    total = sum((entry['sizes'].get(name) or 0) for entry, name in jobs)
+    done = 0
+    moved = []
+    failed = []
+    incomplete = []  # 복사했지만 원본이 남은 항목 (이름, 격리 폴더 경로, 오류)
+
+    def advance(count):
+        nonlocal done
+        done += count
+        if progress:
+            progress(done, total)
+
+    with metrics.timer("dupe_resolver.move"), open(os.path.join(quarantine, LOG_NAME), 'a', encoding='utf-8') as log:
+        for entry, name in jobs:
+            if stop is not None and stop.is_set():
+                break
+            src = os.path.join(path, name)
+            before = done
+            record = {'unique_id': entry['unique_id'], 'keep': entry['keep'], 'source': src}
+            try:
+                dst, copied = move_item(src, quarantine, advance, stop)
+            except MoveCancelled:
+                done = before
+                break
+            except SourceNotRemoved as e:
+                # 격리 폴더의 사본은 완전하므로 기록은 남기고 원본 정리만 실패로 보고
+                incomplete.append((name, e.destination, str(e.error)))
+                record.update(destination=e.destination, source_removed=False)
+            except OSError as e:
+                done = before
+                failed.append((name, str(e)))
+                continue
+            else:
+                if not copied:
+                    advance(entry['sizes'].get(name) or 0)
+                moved.append((name, dst))
+                record['destination'] = dst
+            record['moved_at'] = time.time()
+            log.write(json.dumps(record, ensure_ascii=False) + "\n")
+            log.flush()
+    return {'moved': moved, 'failed': failed, 'incomplete': incomplete,
+            'remaining': len(jobs) - len(moved) - len(failed) - len(incomplete)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="고유 ID가 같은 항목 중 하나만 남기고 나머지를 격리 폴더로 옮김")
+    parser.add_argument('path')
+    parser.add_argument('--quarantine', help="격리 폴더 (기본: 폴더 옆의 '폴더명_duplicates')")
+    parser.add_argument('--rule', action='append', choices=list(RULES),
+                        help=f"남길 항목을 고르는 규칙. 여러 번 지정하면 순서대로 비교 (기본: {', '.join(DEFAULT_RULES)})")
+    parser.add_argument('--dry-run', action='store_true', help="옮기지 않고 계획만 출력")
+    args = parser.parse_args(argv)
+
+    path = os.path.abspath(args.path)
+    quarantine = os.path.abspath(args.quarantine or path.rstrip(os.sep) + "_duplicates")
+    item_stats = scan_items(path, DEFAULT_EXTENSIONS)
+    name_infos = {name: validate_name(name) for name in item_stats}
+    plan = plan_resolution(path, name_infos, item_stats, tuple(args.rule or DEFAULT_RULES))
+    for entry in plan:
+        print(f"[{entry['unique_id']}] 남김: {entry['keep']}")
+        for name in entry['move']:
+            size = entry['sizes'].get(name)
+            print(f"    이동: {name} ({format_size(size) if size is not None else '-'})")
+    if args.dry_run or not plan:
+        return
+
+    stop = threading.Event()
+    last = [0]
+
+    def progress(done, total):
+        if time.monotonic() - last[0] > 0.5 or done == total:
+            last[0] = time.monotonic()
+            print(f"\r{format_size(done)} / {format_size(total)}", end='', flush=True)
+
+    try:
+        result = move_duplicates(path, plan, quarantine, progress=progress, stop=stop)
+    except KeyboardInterrupt:
+        stop.set()
+        raise
+    print(f"\n{len(result['moved'])}개 이동, 원본 정리 실패 {len(result['incomplete'])}개, "
+          f"실패 {len(result['failed'])}개 -> {quarantine}")
+    for name, error in result['failed']:
+        print(f"  {name}: {error}")
+    for name, dst, error in result['incomplete']:
+        print(f"  {name}: 복사했지만 원본을 모두 지우지 못했습니다 ({error}) -> {dst}")
+
+if __name__ == "__main__":
+    main()
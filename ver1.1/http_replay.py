@@ -0,0 +1,186 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from constants import CACHE_DIR
+from metadata_providers import PROVIDERS, configure_providers
+from metrics import metrics
+
+# 본문은 이미 압축이 풀린 상태로 저장하므로 전송 관련 헤더는 기록하지 않음
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+def body_bytes(body):
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return bytes(body)
+
+def body_hash(body):
+    return hashlib.sha1(body).hexdigest() if body else None
+
+def request_key(method, target, digest=None):
+    # target은 전체 URL 또는 경로+쿼리. POST 본문이 다르면 다른 요청으로 취급
+    key = f"{method.upper()} {target}"
+    if digest:
+        key += " " + digest
+    return key
+
+def path_target(url):
+    parts = urlsplit(url)
+    return parts.path + ('?' + parts.query if parts.query else '')
+
+class Cassette:
+    def __init__(self, path=None, save_interval=2.0):
+        self.path = path or os.path.join(CACHE_DIR, 'http_cassette')
+        self.index_path = os.path.join(self.path, 'index.json')
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.path_entries = None  # 경로+쿼리 -> 항목. 주소와 무관하게 찾을 때 사용
+        self.dirty = False
+        self.last_save = time.monotonic()
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, method, url, body=None):
+        with self.lock:
+            return self.entries.get(request_key(method, url, body_hash(body)))
+
+    def find(self, method, target, body=None):
+        with self.lock:
+            if self.path_entries is None:
+                self.path_entries = {}
+                for entry in self.entries.values():
+                    key = request_key(entry['method'], path_target(entry['url']), entry['body_hash'])
+                    self.path_entries[key] = entry
+            return self.path_entries.get(request_key(method, target, body_hash(body)))
+
+    def read_body(self, entry):
+        with open(os.path.join(self.path, entry['file']), 'rb') as f:
+            return f.read()
+
+    def put(self, method, url, body, status, reason, headers, content, elapsed):
+        digest = body_hash(body)
+        key = request_key(method, url, digest)
+        file_name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, file_name), 'wb') as f:
+            f.write(content)
+        entry = {
+            'method': method.upper(),
+            'url': url,
+            'body_hash': digest,
+            'status': status,
+            'reason': reason,
+            'headers': {name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS},
+            'file': file_name,
+            'elapsed': elapsed
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self.path_entries = None
+            self.dirty = True
+            due = time.monotonic() - self.last_save > self.save_interval
+        if due:
+            self.save()
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            temp_path = self.index_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.index_path)
+            self.dirty = False
+            self.last_save = time.monotonic()
+
+class RecordingAdapter(HTTPAdapter):
+    # 실제로 요청을 보내고 응답을 카세트에 기록
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.cassette.put(request.method, request.url, body_bytes(request.body),
+                          response.status_code, response.reason, response.headers,
+                          response.content, response.elapsed.total_seconds())
+        metrics.increment("http_replay.recorded")
+        return response
+
+    def close(self):
+        self.cassette.save()
+        super().close()
+
+class ReplayAdapter(BaseAdapter):
+    # 네트워크를 사용하지 않고 기록된 응답만 돌려줌
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        entry = self.cassette.get(request.method, request.url, body_bytes(request.body))
+        if entry is None:
+            metrics.increment("http_replay.missing")
+            raise requests.ConnectionError(f"기록된 응답이 없습니다: {request.method} {request.url}", request=request)
+        metrics.increment("http_replay.replayed")
+        return self.build_response(request, entry, self.cassette.read_body(entry))
+
+    def build_response(self, request, entry, content):
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response._content = content
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+def install(session, mode, cassette_path=None):
+    # mode: 'record' 또는 'replay'
+    cassette = Cassette(cassette_path)
+    if mode == 'record':
+        adapter = RecordingAdapter(cassette)
+        # 저장 간격 사이에 종료되어도 기록이 남도록 함
+        atexit.register(cassette.save)
+    elif mode == 'replay':
+        adapter = ReplayAdapter(cassette)
+    else:
+        raise ValueError(f"알 수 없는 모드: {mode}")
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return cassette
+
+def configure_from_env(environ=None):
+    # GIANA_HTTP_MODE=record|replay, GIANA_CASSETTE=경로, GIANA_STAND_IN=대체 서버 주소
+    environ = os.environ if environ is None else environ
+    mode = environ.get('GIANA_HTTP_MODE')
+    stand_in = environ.get('GIANA_STAND_IN')
+    if not mode and not stand_in:
+        return None
+
+    session = requests.Session()
+    cassette = install(session, mode, environ.get('GIANA_CASSETTE')) if mode else None
+    base_urls = {platform: stand_in for platform in PROVIDERS} if stand_in else None
+    configure_providers(base_urls, session)
+    return cassette
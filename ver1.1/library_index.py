@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import threading
+import time
+
+from constants import CACHE_DIR
+from metrics import metrics
+
+NAME_PARTS = ('creator', 'unique_id', 'game_title', 'genre', 'platform')
+
+class SequenceError(Exception):
+    # 에이전트가 보낸 변경 내용의 기준 번호가 색인과 다름. 전체 목록을 다시 보내야 함
+    pass
+
+class LibraryIndex:
+    # 여러 저장소(샤드)의 스캔 에이전트가 보낸 변경 내용을 모아 하나의 색인으로 관리
+    def __init__(self, db_path=None):
+        db_path = os.path.abspath(db_path or os.path.join(CACHE_DIR, 'library_index.db'))
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                shard TEXT PRIMARY KEY,
+                root TEXT,
+                seq INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                shard TEXT NOT NULL,
+                name TEXT NOT NULL,
+                is_dir INTEGER NOT NULL,
+                size INTEGER,
+                mtime INTEGER NOT NULL,
+                creator TEXT,
+                unique_id TEXT,
+                game_title TEXT,
+                genre TEXT,
+                platform TEXT,
+                PRIMARY KEY (shard, name)
+            )
+        """)
+        # 여러 번에 나누어 받는 중인 전체 목록
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS staged_items (
+                shard TEXT NOT NULL,
+                name TEXT NOT NULL,
+                is_dir INTEGER NOT NULL,
+                size INTEGER,
+                mtime INTEGER NOT NULL,
+                creator TEXT,
+                unique_id TEXT,
+                game_title TEXT,
+                genre TEXT,
+                platform TEXT,
+                PRIMARY KEY (shard, name)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS staging (
+                shard TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                next_page INTEGER NOT NULL
+            )
+        """)
+        # 샤드를 가로지르는 중복 검사용
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_unique_id ON items (unique_id)")
+        self.conn.commit()
+
+    def item_row(self, shard, name, stat, info):
+        is_dir, size, mtime = stat
+        parts = [info[part] for part in NAME_PARTS] if info else [None] * len(NAME_PARTS)
+        return (shard, name, int(is_dir), size, mtime, *parts)
+
+    def apply_delta(self, delta):
+        # delta: {'shard', 'root', 'base_seq', 'seq', 'full', 'page', 'last',
+        #         'added': {이름: [is_dir, size, mtime, info]}, 'changed': {이름: [is_dir, size, mtime]},
+        #         'removed': [이름], 'renamed': [[이전 이름, 새 이름, info]]}
+        # 전체 목록('full')은 여러 번('page' 0부터, 마지막은 'last')에 나누어 받을 수 있음
+        shard = delta['shard']
+        with self.lock, metrics.timer("library_index.apply"):
+            row = self.conn.execute("SELECT seq FROM shards WHERE shard = ?", (shard,)).fetchone()
+            if not delta.get('full') and (row is None or row[0] != delta['base_seq']):
+                raise SequenceError(f"{shard}: 색인의 기준 번호({row[0] if row else None})와 "
+                                    f"보낸 기준 번호({delta['base_seq']})가 다릅니다.")
+            try:
+                if delta.get('full'):
+                    complete = self.stage_full_page(delta)
+                else:
+                    self.apply_changes(delta)
+                    complete = True
+                if complete:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO shards (shard, root, seq, updated_at) VALUES (?, ?, ?, ?)",
+                        (shard, delta.get('root'), delta['seq'], time.time()))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            count = self.conn.execute("SELECT COUNT(*) FROM items WHERE shard = ?", (shard,)).fetchone()[0]
+
+        for kind in ('added', 'changed', 'removed', 'renamed'):
+            metrics.increment(f"library_index.{kind}", len(delta.get(kind, ())))
+        return {'shard': shard, 'seq': delta['seq'], 'items': count, 'complete': complete}
+
+    def stage_full_page(self, delta):
+        # 받은 묶음은 임시 테이블에 모아두고, 마지막 묶음에서 샤드의 목록을 한 트랜잭션으로 교체.
+        # 교체 전까지는 이전 목록이 그대로 보임. 마지막 묶음까지 받았으면 True
+        shard = delta['shard']
+        page = delta.get('page', 0)
+        if page == 0:
+            self.conn.execute("DELETE FROM staged_items WHERE shard = ?", (shard,))
+            self.conn.execute("INSERT OR REPLACE INTO staging (shard, seq, next_page) VALUES (?, ?, 0)",
+                              (shard, delta['seq']))
+        else:
+            row = self.conn.execute("SELECT seq, next_page FROM staging WHERE shard = ?", (shard,)).fetchone()
+            if row is None or row != (delta['seq'], page):
+                raise SequenceError(f"{shard}: 전체 목록의 {page}번째 묶음을 이어 받을 수 없습니다.")
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO staged_items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self.item_row(shard, name, entry[:3], entry[3]) for name, entry in delta.get('added', {}).items()])
+        if not delta.get('last', True):
+            self.conn.execute("UPDATE staging SET next_page = ? WHERE shard = ?", (page + 1, shard))
+            return False
+        self.conn.execute("DELETE FROM items WHERE shard = ?", (shard,))
+        self.conn.execute("INSERT INTO items SELECT * FROM staged_items WHERE shard = ?", (shard,))
+        self.conn.execute("DELETE FROM staged_items WHERE shard = ?", (shard,))
+        self.conn.execute("DELETE FROM staging WHERE shard = ?", (shard,))
+        return True
+
+    def apply_changes(self, delta):
+        shard = delta['shard']
+        self.conn.executemany(
+            "DELETE FROM items WHERE shard = ? AND name = ?",
+            [(shard, name) for name in delta.get('removed', [])])
+        # 이름만 바뀐 항목은 기존 크기/수정 시각을 유지
+        for old_name, new_name, info in delta.get('renamed', []):
+            stat = self.conn.execute(
+                "SELECT is_dir, size, mtime FROM items WHERE shard = ? AND name = ?",
+                (shard, old_name)).fetchone()
+            if stat is None:
+                raise SequenceError(f"{shard}: 색인에 없는 항목의 이름 변경입니다: {old_name}")
+            self.conn.execute("DELETE FROM items WHERE shard = ? AND name = ?", (shard, old_name))
+            self.conn.execute("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              self.item_row(shard, new_name, stat, info))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self.item_row(shard, name, entry[:3], entry[3]) for name, entry in delta.get('added', {}).items()])
+        self.conn.executemany(
+            "UPDATE items SET is_dir = ?, size = ?, mtime = ? WHERE shard = ? AND name = ?",
+            [(int(is_dir), size, mtime, shard, name)
+             for name, (is_dir, size, mtime) in delta.get('changed', {}).items()])
+
+    def shards(self):
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT shards.shard, root, seq, updated_at, COUNT(items.name), COUNT(items.unique_id)
+                FROM shards LEFT JOIN items ON items.shard = shards.shard
+                GROUP BY shards.shard ORDER BY shards.shard
+            """).fetchall()
+        return [{'shard': shard, 'root': root, 'seq': seq, 'updated_at': updated_at, 'items': items, 'valid': valid}
+                for shard, root, seq, updated_at, items, valid in rows]
+
+    def duplicates(self):
+        # classify_items와 같이 고유 ID가 같은 유효한 항목을 모든 샤드에서 모음
+        with self.lock, metrics.timer("library_index.duplicates"):
+            rows = self.conn.execute("""
+                SELECT unique_id, shard, name FROM items
+                WHERE unique_id IN (
+                    SELECT unique_id FROM items WHERE unique_id IS NOT NULL
+                    GROUP BY unique_id HAVING COUNT(*) > 1
+                )
+                ORDER BY unique_id, shard, name
+            """).fetchall()
+        groups = {}
+        for unique_id, shard, name in rows:
+            groups.setdefault(unique_id, []).append([shard, name])
+        return [{'unique_id': unique_id, 'items': items,
+                 'shards': sorted({shard for shard, _ in items})}
+                for unique_id, items in groups.items()]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
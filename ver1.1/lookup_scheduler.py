@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import threading
+
+from metadata_providers import get_provider
+from metrics import metrics
+
+class LookupScheduler:
+    # 같은 (플랫폼, 고유 ID)에 대한 조회는 한 번만 보내고 결과를 요청한 모든 곳에 전달
+    def __init__(self, provider_factory=None):
+        self.provider_factory = provider_factory or get_provider
+        self.condition = threading.Condition()
+        self.pending = {}  # (플랫폼, 고유 ID) -> 대기 항목
+        self.in_flight = {}
+        self.workers = {}  # 플랫폼 -> 작업 스레드
+        self.delivering = {}  # 플랫폼 -> (결과를 전달받는 중인 요청한 곳, 작업 스레드)
+        self.sequence = itertools.count()
+
+    def submit(self, platform, unique_id, owner, callback, priority=0):
+        # callback(key, info)는 작업 스레드에서 호출됨. 숫자가 작을수록 먼저 조회
+        key = (platform, unique_id)
+        with self.condition:
+            metrics.increment("lookup.requested")
+            entry = self.in_flight.get(key) or self.pending.get(key)
+            if entry is None:
+                entry = {'waiters': [], 'order': next(self.sequence)}
+                self.pending[key] = entry
+                self.start_worker(platform)
+            else:
+                metrics.increment("lookup.coalesced")
+            entry['waiters'].append([owner, callback, priority])
+            self.condition.notify_all()
+
+    def set_priorities(self, owner, priorities):
+        # priorities: key -> 우선순위. 화면에 보이는 행이 바뀌었을 때 호출
+        with self.condition:
+            for key, priority in priorities.items():
+                entry = self.pending.get(key)
+                if entry is None:
+                    continue
+                for waiter in entry['waiters']:
+                    if waiter[0] is owner:
+                        waiter[2] = priority
+
+    def cancel(self, owner):
+        # 요청한 곳이 사라지면 대기 중인 조회를 버리고 진행 중인 조회의 결과도 전달하지 않음
+        # 이미 전달 중인 결과가 있으면 끝날 때까지 기다리므로, 반환한 뒤에는 callback이 호출되지 않음
+        with self.condition:
+            for entries in (self.pending, self.in_flight):
+                for key in list(entries):
+                    waiters = entries[key]['waiters']
+                    remaining = [waiter for waiter in waiters if waiter[0] is not owner]
+                    if len(remaining) == len(waiters):
+                        continue
+                    entries[key]['waiters'] = remaining
+                    if not remaining and entries is self.pending:
+                        del self.pending[key]
+                        metrics.increment("lookup.cancelled")
+            # callback 안에서 취소한 경우는 자기 자신을 기다리지 않음
+            current = threading.current_thread()
+            self.condition.wait_for(lambda: all(
+                target is not owner or worker is current for target, worker in self.delivering.values()))
+
+    def start_worker(self, platform):
+        # 플랫폼별 요청 간격 제한이 있으므로 플랫폼마다 하나의 스레드로 순서대로 조회
+        worker = self.workers.get(platform)
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(target=self.run, args=(platform,), daemon=True)
+            self.workers[platform] = worker
+            worker.start()
+
+    def next_batch(self, platform, batch_size):
+        candidates = [(min(waiter[2] for waiter in entry['waiters']), entry['order'], key)
+                      for key, entry in self.pending.items() if key[0] == platform]
+        batch = [key for _, _, key in heapq.nsmallest(batch_size, candidates)]
+        for key in batch:
+            self.in_flight[key] = self.pending.pop(key)
+        return batch
+
+    def run(self, platform):
+        provider = self.provider_factory(platform)
+        while True:
+            with self.condition:
+                batch = self.next_batch(platform, provider.batch_size if provider else 1)
+                if not batch:
+                    # 대기 중인 조회가 없으면 스레드를 종료하고 다음 요청 때 다시 시작
+                    del self.workers[platform]
+                    return
+
+            results = {}
+            if provider is not None:
+                try:
+                    results = provider.fetch_many([unique_id for _, unique_id in batch])
+                except Exception:
+                    metrics.increment("lookup.errors")
+
+            for key in batch:
+                self.deliver(platform, key, results.get(key[1]))
+
+    def deliver(self, platform, key, info):
+        # 호출 직전에 요청한 곳이 아직 등록되어 있는지 다시 확인. 전달 중에 합쳐진 요청에도 같은 결과를 전달
+        delivered = []
+        while True:
+            with self.condition:
+                entry = self.in_flight[key]
+                waiter = next((waiter for waiter in entry['waiters']
+                               if not any(waiter is done for done in delivered)), None)
+                if waiter is None:
+                    del self.in_flight[key]
+                    return
+                delivered.append(waiter)
+                self.delivering[platform] = (waiter[0], threading.current_thread())
+            try:
+                waiter[1](key, info)
+            except Exception:
+                # 요청한 곳 하나의 오류로 작업 스레드가 멈추면 다른 곳의 조회도 전달되지 않음
+                metrics.increment("lookup.callback_errors")
+            finally:
+                with self.condition:
+                    del self.delivering[platform]
+                    self.condition.notify_all()
+
+lookup_scheduler = LookupScheduler()
@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+
+from constants import CACHE_DIR
+
+# parse_dlsite_page가 btn_ver_up을 찾았을 때의 버전 값
+UPDATE_TEXT = '업데이트 있음'
+
+class MetadataCache:
+    def __init__(self, db_path=None, check_same_thread=True):
+        db_path = os.path.abspath(db_path or os.path.join(CACHE_DIR, 'metadata_cache.db'))
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # 예약 실행 중 GUI가 같은 파일을 읽을 수 있도록 WAL 사용
+        # 여러 스레드에서 사용할 때(check_same_thread=False)는 호출하는 쪽에서 잠금으로 순서를 맞춤
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                platform TEXT NOT NULL,
+                unique_id TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                info TEXT,
+                checked_at REAL NOT NULL,
+                update_seen_at REAL,
+                PRIMARY KEY (platform, unique_id)
+            )
+        """)
+        # 조회한 태그를 따로 저장하여 태그 색인(tag_index.py)을 JSON 해석 없이 만듦
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata_tags (
+                platform TEXT NOT NULL,
+                unique_id TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (platform, unique_id, tag)
+            )
+        """)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self.backfill_tags()
+            self.conn.execute("PRAGMA user_version = 1")
+        self.conn.commit()
+
+    def backfill_tags(self):
+        # 태그 테이블이 생기기 전에 저장한 정보의 태그를 채움
+        rows = self.conn.execute("SELECT platform, unique_id, info FROM metadata WHERE info IS NOT NULL").fetchall()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO metadata_tags (platform, unique_id, tag) VALUES (?, ?, ?)",
+            [(platform, unique_id, tag) for platform, unique_id, info in rows for tag in info_tags(json.loads(info))])
+
+    def load(self, platform, unique_ids):
+        rows = {}
+        unique_ids = list(unique_ids)
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            cursor = self.conn.execute(
+                "SELECT unique_id, etag, last_modified, info, checked_at, update_seen_at FROM metadata "
+                f"WHERE platform = ? AND unique_id IN ({','.join('?' * len(chunk))})",
+                [platform] + chunk)
+            for unique_id, etag, last_modified, info, checked_at, update_seen_at in cursor:
+                rows[unique_id] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'info': json.loads(info) if info else None,
+                    'checked_at': checked_at,
+                    'update_seen_at': update_seen_at
+                }
+        return rows
+
+    def put(self, platform, unique_id, row):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO metadata (platform, unique_id, etag, last_modified, info, checked_at, update_seen_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (platform, unique_id, row['etag'], row['last_modified'],
+             json.dumps(row['info'], ensure_ascii=False) if row['info'] else None,
+             row['checked_at'], row['update_seen_at']))
+        if row['info']:
+            self.conn.execute("DELETE FROM metadata_tags WHERE platform = ? AND unique_id = ?", (platform, unique_id))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO metadata_tags (platform, unique_id, tag) VALUES (?, ?, ?)",
+                [(platform, unique_id, tag) for tag in info_tags(row['info'])])
+
+    def load_tags(self):
+        # (플랫폼, 고유 ID) -> 태그 목록
+        tags = {}
+        for platform, unique_id, tag in self.conn.execute("SELECT platform, unique_id, tag FROM metadata_tags"):
+            tags.setdefault((platform, unique_id), []).append(tag)
+        return tags
+
+    def put_info(self, platform, unique_id, info, checked_at):
+        # 업데이트 확인 외의 조회 결과 저장. 검증값이 없으므로 다음 업데이트 확인 때는 페이지 전체를 받음
+        row = self.load(platform, [unique_id]).get(unique_id)
+        update_seen_at = None
+        if has_update(info):
+            update_seen_at = row['update_seen_at'] if row and row['update_seen_at'] else checked_at
+        self.put(platform, unique_id, {
+            'etag': None,
+            'last_modified': None,
+            'info': info,
+            'checked_at': checked_at,
+            'update_seen_at': update_seen_at
+        })
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def info_tags(info):
+    if not info:
+        return []
+    if 'TagList' in info:
+        return info['TagList']
+    # TagList가 없던 때 저장한 정보는 표시용 문자열에서 복원
+    return [tag for tag in (info.get('Tags') or '').split(', ') if tag and tag != 'N/A']
+
+def has_update(info):
+    return bool(info) and info.get('Version') == UPDATE_TEXT
@@ -0,0 +1,474 @@
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from metrics import metrics
+
+# DLsite의 장르를 프로그램의 장르로 매핑
+DLSITE_GENRE_MAPPING = {
+    'アドベンチャー': 'ADV',
+    'ロールプレイング': 'RPG',
+    'シミュレーション': 'SIM',
+    'アクション': 'ACT',
+    '音声作品': 'VOD',
+    'シューティング': 'SHT',
+    'ノベル': 'NOV',
+    'その他ゲーム': 'ANO'
+}
+
+STEAM_GENRE_MAPPING = {
+    'Adventure': 'ADV',
+    'RPG': 'RPG',
+    'Simulation': 'SIM',
+    'Action': 'ACT',
+    'Strategy': 'SIM',
+    'Casual': 'ANO'
+}
+
+FANZA_GENRE_MAPPING = {
+    'アドベンチャー': 'ADV',
+    'ロールプレイング': 'RPG',
+    'シミュレーション': 'SIM',
+    'アクション': 'ACT',
+    'ボイス・ASMR': 'VOD',
+    '音声': 'VOD',
+    'シューティング': 'SHT',
+    'ノベル': 'NOV'
+}
+
+GETCHU_GENRE_MAPPING = {
+    'ADV': 'ADV',
+    'アドベンチャー': 'ADV',
+    'RPG': 'RPG',
+    'SLG': 'SIM',
+    'シミュレーション': 'SIM',
+    'ACT': 'ACT',
+    'アクション': 'ACT',
+    'STG': 'SHT',
+    'ノベル': 'NOV'
+}
+
+def map_genre(genres, mapping, default='ANO'):
+    for genre in genres:
+        for key, value in mapping.items():
+            if key == genre or key in genre:
+                return value
+    return default
+
+def confidence_text(title, creator, genres):
+    # 일치도 계산
+    confidence = 0
+    if title != 'N/A':
+        confidence += 40
+    if creator != 'N/A':
+        confidence += 30
+    if genres:
+        confidence += 30
+    return f"{confidence}%"
+
+def make_info(platform, unique_id, title='N/A', creator='N/A', genres=(), mapping=None,
+              release_date='N/A', file_size='-', version='-', image_url=None):
+    return {
+        'Platform': platform,
+        'Title': title,
+        'Creator': creator,
+        'ID': unique_id,
+        'Genre': map_genre(genres, mapping or {}),
+        'ReleaseDate': release_date,
+        'FileSize': file_size,
+        'Version': version,
+        'Tags': ", ".join(genres),
+        'TagList': list(genres),  # 태그 검색용. Tags는 표시용으로 유지
+        'Confidence': confidence_text(title, creator, genres),
+        'ImageURL': image_url
+    }
+
+def meta_content(soup, prop):
+    tag = soup.find('meta', {'property': prop})
+    return tag['content'].strip() if tag and tag.get('content') else None
+
+def row_value(soup, label):
+    # <th>라벨</th><td>값</td> 또는 <td>라벨</td><td>값</td> 형태의 표에서 값 셀을 찾음
+    header = soup.find(['th', 'td'], string=re.compile(rf'^\s*{re.escape(label)}\s*[:：]?\s*$'))
+    return header.find_next_sibling('td') if header else None
+
+def parse_dlsite_page(html, product_id):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    def get_tag_text(tag, default='N/A'):
+        return tag.get_text(strip=True) if tag else default
+
+    # 메인 이미지 URL 가져오기 (수정된 부분)
+    try:
+        # 방법 1: 작품 이미지 메타 태그
+        img_tag = soup.find('meta', {'property': 'og:image'})
+        if img_tag and 'content' in img_tag.attrs:
+            image_url = img_tag['content']
+        else:
+            # 방법 2: 메인 이미지 태그
+            img_tag = soup.find('img', {'class': 'slider_item'}) or \
+                     soup.find('img', {'id': 'work_main_img'}) or \
+                     soup.find('img', {'class': 'product-slider-data'}) or \
+                     soup.find('div', {'class': 'product-slider-data'})
+
+            if img_tag:
+                image_url = img_tag.get('src') or img_tag.get('data-src')
+            else:
+                image_url = None
+
+        # URL이 상대 경로인 경우 절대 경로로 변환
+        if image_url and not image_url.startswith('http'):
+            image_url = 'https:' + image_url
+    except:
+        image_url = None
+
+    # 게임 제목
+    title_tag = soup.find('h1', itemprop='name', id='work_name')
+    title = get_tag_text(title_tag)
+
+    # 서클명
+    try:
+        circle_tag = soup.find('span', itemprop='brand', class_='maker_name').find('a')
+        circle_name = get_tag_text(circle_tag)
+    except:
+        circle_name = 'N/A'
+
+    # 장르
+    genre_tags = soup.find('th', string='장르')
+    if genre_tags:
+        genre_tags = genre_tags.find_next_sibling('td').find_all('a')
+    genres = [get_tag_text(genre) for genre in genre_tags] if genre_tags else []
+
+    # 판매일
+    sales_date_tag = soup.find('th', string='판매일')
+    if sales_date_tag:
+        sales_date_tag = sales_date_tag.find_next_sibling('td').find('a')
+    sales_date = get_tag_text(sales_date_tag)
+
+    # 파일 용량
+    file_size_tag = soup.find('th', string='파일 용량')
+    if file_size_tag:
+        file_size_tag = file_size_tag.find_next_sibling('td').find('div', class_='main_genre')
+    file_size = get_tag_text(file_size_tag)
+
+    # 파일 용량 변환
+    try:
+        size_str = re.sub(r'[^\d.]', '', file_size)
+        size_num = float(size_str)
+        if 'MB' in file_size:
+            file_size = size_num
+        elif 'GB' in file_size:
+            file_size = size_num * 1024
+        else:
+            file_size = 'Unknown'
+    except:
+        file_size = 'Unknown'
+
+    # 버전 정보
+    btn_ver_up_tag = soup.find('div', class_='btn_ver_up')
+
+    # DLsite의 장르를 프로그램의 장르로 매핑
+    primary_genre = map_genre(genres, DLSITE_GENRE_MAPPING)
+
+    return {
+        'Platform': 'DLsite',
+        'Title': title,
+        'Creator': circle_name,
+        'ID': product_id,
+        'Genre': primary_genre,
+        'ReleaseDate': sales_date,
+        'FileSize': f"{file_size:,.0f}MB" if isinstance(file_size, (int, float)) else file_size,
+        'Version': '업데이트 있음' if btn_ver_up_tag else '최신 버전',
+        'Tags': ", ".join(genres),
+        'TagList': list(genres),
+        'Confidence': confidence_text(title, circle_name, genres),
+        'ImageURL': image_url
+    }
+
+def parse_getchu_page(html, product_id):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title_tag = soup.find(id='soft-title')
+    title = title_tag.get_text(" ", strip=True) if title_tag else (meta_content(soup, 'og:title') or 'N/A')
+
+    brand_cell = row_value(soup, 'ブランド')
+    creator = brand_cell.find('a').get_text(strip=True) if brand_cell and brand_cell.find('a') else 'N/A'
+
+    genre_cell = row_value(soup, 'ジャンル')
+    genres = [genre_cell.get_text(strip=True)] if genre_cell else []
+
+    date_cell = row_value(soup, '発売日')
+    release_date = date_cell.get_text(strip=True) if date_cell else 'N/A'
+
+    image_url = meta_content(soup, 'og:image')
+    return make_info('Getchu', product_id, title, creator, genres, GETCHU_GENRE_MAPPING,
+                     release_date, image_url=image_url)
+
+def parse_fanza_page(html, product_id):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title_tag = soup.find('h1', class_='productTitle__txt')
+    title = title_tag.get_text(strip=True) if title_tag else (meta_content(soup, 'og:title') or 'N/A')
+
+    circle_tag = soup.find(class_='circleName__txt')
+    creator = circle_tag.get_text(strip=True) if circle_tag else 'N/A'
+
+    genre_tags = soup.select('.genreTag__item a, .genreTag__txt')
+    genres = [tag.get_text(strip=True) for tag in genre_tags]
+
+    date_cell = row_value(soup, '配信開始日')
+    release_date = date_cell.get_text(strip=True) if date_cell else 'N/A'
+
+    image_url = meta_content(soup, 'og:image')
+    return make_info('Fanza', product_id, title, creator, genres, FANZA_GENRE_MAPPING,
+                     release_date, image_url=image_url)
+
+class MetadataProvider:
+    platform = None
+    base_url = None
+    min_interval = 1.0  # 같은 사이트에 대한 요청 간 최소 간격(초)
+    batch_size = 1  # 요청 한 번에 조회할 수 있는 ID 수
+    timeout = 15
+
+    def __init__(self, session=None, base_url=None):
+        self.session = session or requests.Session()
+        if base_url:
+            self.base_url = base_url.rstrip('/')
+        self.lock = threading.Lock()
+        self.last_request = 0.0
+
+    def throttle(self):
+        with self.lock:
+            wait = self.last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_request = time.monotonic()
+
+    def request(self, method, url, **kwargs):
+        self.throttle()
+        kwargs.setdefault('timeout', self.timeout)
+        metrics.increment(f"provider.{self.platform}.requests")
+        try:
+            with metrics.timer("http.fetch"):
+                response = self.session.request(method, url, **kwargs)
+            metrics.increment("http.bytes", len(response.content))
+            response.raise_for_status()
+        except requests.RequestException:
+            metrics.increment("http.errors")
+            return None
+        return response
+
+    def request_json(self, method, url, **kwargs):
+        # 오류 페이지처럼 JSON이 아닌 응답은 조회 실패로 처리
+        response = self.request(method, url, **kwargs)
+        if response is None:
+            return None
+        try:
+            data = response.json()
+        except ValueError:
+            metrics.increment("http.errors")
+            return None
+        return data if isinstance(data, dict) else None
+
+    def fetch(self, unique_id):
+        return self.fetch_many([unique_id]).get(unique_id)
+
+    def fetch_many(self, unique_ids):
+        # ID -> 정보. 조회에 실패한 ID는 결과에 포함하지 않음
+        results = {}
+        for i in range(0, len(unique_ids), self.batch_size):
+            results.update(self.fetch_batch(unique_ids[i:i + self.batch_size]))
+        return results
+
+    def fetch_batch(self, unique_ids):
+        raise NotImplementedError
+
+class DLsiteProvider(MetadataProvider):
+    platform = 'DLsite'
+    base_url = "https://www.dlsite.com"
+    min_interval = 1.0
+
+    def product_url(self, product_id):
+        return f"{self.base_url}/maniax/work/=/product_id/{product_id}/?locale=ko_KR"
+
+    def fetch_batch(self, unique_ids):
+        results = {}
+        for product_id in unique_ids:
+            response = self.request('GET', self.product_url(product_id))
+            if response is None:
+                continue
+            with metrics.timer("html.parse"):
+                results[product_id] = parse_dlsite_page(response.text, product_id)
+        return results
+
+    def fetch_conditional(self, product_id, etag=None, last_modified=None):
+        # 이전 응답의 ETag/Last-Modified로 조회. 실패하면 None,
+        # 바뀌지 않았으면 ('not_modified', None, 검증값), 바뀌었으면 ('modified', 정보, 검증값)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = self.request('GET', self.product_url(product_id), headers=headers)
+        if response is None:
+            return None
+        validators = (response.headers.get('ETag') or etag,
+                      response.headers.get('Last-Modified') or last_modified)
+        if response.status_code == 304:
+            metrics.increment("http.not_modified")
+            return 'not_modified', None, validators
+        with metrics.timer("html.parse"):
+            return 'modified', parse_dlsite_page(response.text, product_id), validators
+
+class VNdbProvider(MetadataProvider):
+    # VNDB API는 5분에 200회로 제한되며 필터 하나로 최대 100개까지 조회 가능
+    platform = 'VNdb'
+    base_url = "https://api.vndb.org/kana"
+    min_interval = 1.5
+    batch_size = 100
+
+    def fetch_batch(self, unique_ids):
+        query = {
+            'filters': ['or'] + [['id', '=', unique_id] for unique_id in unique_ids],
+            'fields': 'title, released, developers.name, tags.name, tags.rating, image.url',
+            'results': len(unique_ids)
+        }
+        if len(unique_ids) == 1:
+            query['filters'] = ['id', '=', unique_ids[0]]
+        data = self.request_json('POST', f"{self.base_url}/vn", json=query)
+        if data is None:
+            return {}
+
+        results = {}
+        with metrics.timer("html.parse"):
+            for vn in data.get('results') or []:
+                developers = vn.get('developers') or []
+                tags = sorted(vn.get('tags') or [], key=lambda tag: -tag.get('rating', 0))
+                results[vn['id']] = make_info(
+                    'VNdb', vn['id'],
+                    title=vn.get('title') or 'N/A',
+                    creator=developers[0]['name'] if developers else 'N/A',
+                    genres=[tag['name'] for tag in tags],
+                    release_date=vn.get('released') or 'N/A',
+                    image_url=(vn.get('image') or {}).get('url'))
+                # VNDB는 비주얼 노벨 데이터베이스이므로 장르는 노벨로 고정
+                results[vn['id']]['Genre'] = 'NOV'
+        return results
+
+class GetchuProvider(MetadataProvider):
+    platform = 'Getchu'
+    base_url = "https://www.getchu.com"
+    min_interval = 2.0
+
+    def fetch_batch(self, unique_ids):
+        results = {}
+        for product_id in unique_ids:
+            # gc=gc는 연령 확인 페이지를 건너뛰기 위한 값
+            response = self.request('GET', f"{self.base_url}/soft.phtml",
+                                    params={'id': product_id, 'gc': 'gc'})
+            if response is None:
+                continue
+            # requests는 charset이 없는 text/html을 ISO-8859-1로 보므로 Getchu의 기본 인코딩을 지정
+            if 'charset' not in response.headers.get('Content-Type', '').lower():
+                response.encoding = 'euc-jp'
+            with metrics.timer("html.parse"):
+                results[product_id] = parse_getchu_page(response.text, product_id)
+        return results
+
+class FanzaProvider(MetadataProvider):
+    platform = 'Fanza'
+    base_url = "https://www.dmm.co.jp"
+    min_interval = 2.0
+
+    def __init__(self, session=None, base_url=None):
+        super().__init__(session, base_url)
+        # 세션을 다른 플랫폼과 공유할 수 있으므로 연령 확인 쿠키는 Fanza 도메인에만 보냄
+        host = urlparse(self.base_url).hostname or ''
+        domain = '.dmm.co.jp' if host.endswith('dmm.co.jp') else host
+        self.session.cookies.set('age_check_done', '1', domain=domain, path='/')
+
+    def fetch_batch(self, unique_ids):
+        results = {}
+        for product_id in unique_ids:
+            response = self.request('GET', f"{self.base_url}/dc/doujin/-/detail/=/cid={product_id}/")
+            if response is None:
+                continue
+            with metrics.timer("html.parse"):
+                results[product_id] = parse_fanza_page(response.text, product_id)
+        return results
+
+class SteamProvider(MetadataProvider):
+    # appdetails는 여러 ID를 받으면 가격 정보만 돌려주므로 하나씩 조회
+    platform = 'Steam'
+    base_url = "https://store.steampowered.com"
+    min_interval = 1.5
+
+    def fetch_batch(self, unique_ids):
+        results = {}
+        for app_id in unique_ids:
+            data = self.request_json('GET', f"{self.base_url}/api/appdetails",
+                                     params={'appids': app_id, 'l': 'english'})
+            if data is None:
+                continue
+            with metrics.timer("html.parse"):
+                entry = data.get(str(app_id)) or {}
+                if not entry.get('success'):
+                    continue
+                data = entry['data']
+                developers = data.get('developers') or []
+                results[app_id] = make_info(
+                    'Steam', app_id,
+                    title=data.get('name') or 'N/A',
+                    creator=developers[0] if developers else 'N/A',
+                    genres=[genre['description'] for genre in data.get('genres') or []],
+                    mapping=STEAM_GENRE_MAPPING,
+                    release_date=(data.get('release_date') or {}).get('date') or 'N/A',
+                    image_url=data.get('header_image'))
+        return results
+
+PROVIDERS = {
+    'DLsite': DLsiteProvider,
+    'VNdb': VNdbProvider,
+    'Getchu': GetchuProvider,
+    'Fanza': FanzaProvider,
+    'Steam': SteamProvider
+}
+
+# 요청 간격 제한을 공유하도록 플랫폼별로 하나의 인스턴스를 사용
+_providers = {}
+_providers_lock = threading.Lock()
+_base_urls = {}
+_session = None
+
+def configure_providers(base_urls=None, session=None):
+    # 테스트용 로컬 서버 등 다른 주소로 조회하도록 설정
+    global _session
+    with _providers_lock:
+        _providers.clear()
+        _base_urls.clear()
+        _base_urls.update(base_urls or {})
+        _session = session
+        if session is not None:
+            for platform, provider_class in PROVIDERS.items():
+                _providers[platform] = provider_class(session, _base_urls.get(platform))
+
+def get_session():
+    # 이미지처럼 provider를 거치지 않는 요청에 사용할 세션
+    global _session
+    with _providers_lock:
+        if _session is None:
+            _session = requests.Session()
+        return _session
+
+def get_provider(platform):
+    with _providers_lock:
+        if platform not in _providers:
+            provider_class = PROVIDERS.get(platform)
+            if provider_class is None:
+                return None
+            _providers[platform] = provider_class(base_url=_base_urls.get(platform))
+        return _providers[platform]
@@ -0,0 +1,111 @@
+import cProfile
+import io
+import json
+import platform
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}  # 이름 -> [횟수, 합계, 최소, 최대] (초)
+        self.counters = {}
+        self.detailed = False  # 정규식 패턴별 측정처럼 비용이 큰 세부 측정 여부
+        self.profiler = None
+        self.profile_result = None
+
+    def add_time(self, name, elapsed):
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, elapsed, elapsed, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+                if elapsed < timer[2]:
+                    timer[2] = elapsed
+                if elapsed > timer[3]:
+                    timer[3] = elapsed
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+        self.profile_result = None
+
+    def snapshot(self):
+        with self.lock:
+            timers = {name: {'count': count,
+                             'total': total,
+                             'avg': total / count,
+                             'min': minimum,
+                             'max': maximum}
+                      for name, (count, total, minimum, maximum) in self.timers.items()}
+            counters = dict(self.counters)
+        return {'timers': timers, 'counters': counters}
+
+    @property
+    def is_profiling(self):
+        return self.profiler is not None
+
+    def start_profiling(self):
+        # cProfile은 호출한 스레드(GUI 메인 스레드)만 기록함
+        if self.profiler is not None:
+            return
+        self.profile_result = None
+        tracemalloc.start()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profiling(self, limit=30):
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(limit)
+
+        memory_snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        top_allocations = [str(stat) for stat in memory_snapshot.statistics('lineno')[:limit]]
+
+        self.profiler = None
+        self.profile_result = {
+            'cpu': stream.getvalue(),
+            'memory_current': current,
+            'memory_peak': peak,
+            'memory_top': top_allocations
+        }
+        return self.profile_result
+
+    def dump(self, path):
+        report = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'detailed': self.detailed,
+            **self.snapshot(),
+            'profile': self.profile_result
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+metrics = Metrics()
@@ -0,0 +1,265 @@
+import os
+import random
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from zlib import crc32
+
+from metrics import metrics
+from utils import PARALLEL_THRESHOLD
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NGRAM = 3
+NUM_HASHES = 64  # 2의 거듭제곱이어야 함 (numpy가 없을 때 해시 값의 하위 비트로 칸을 나눔)
+# 16밴드 x 4행: 후보가 되는 경계가 (1/16)^(1/4) = 0.5로 THRESHOLD보다 낮음.
+# 제목 유사도 0.6인 쌍은 약 89%, 0.7이면 약 99%가 후보가 됨
+BANDS = 16
+MAX_BUCKET = 100
+THRESHOLD = 0.6
+SEED = 0
+
+def normalize(text):
+    # 전각/반각, 대소문자, 공백과 기호 차이를 무시
+    text = unicodedata.normalize('NFKC', text).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+def shingles(text, n=NGRAM):
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def shingle_hashes(text, n=NGRAM):
+    # 실행할 때마다 결과가 같도록 hash() 대신 crc32 사용 (문자열 hash는 프로세스마다 달라짐)
+    return {crc32(text[i:i + n].encode('utf-8')) for i in range(max(1, len(text) - n + 1))}
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+@lru_cache(maxsize=None)
+def probe_orders(num_hashes, seed=SEED):
+    # 빈 칸마다 값을 빌려올 칸의 순서. 자기 자신 다음은 칸마다 따로 섞은 순서
+    rng = random.Random(seed)
+    orders = []
+    for i in range(num_hashes):
+        others = [j for j in range(num_hashes) if j != i]
+        rng.shuffle(others)
+        orders.append((i, *others))
+    return tuple(orders)
+
+def minhash_python(texts, num_hashes=NUM_HASHES):
+    # One Permutation Hashing: 해시를 한 번만 계산하고 하위 비트로 나눈 칸마다 최솟값을 사용.
+    # 칸 수만큼 해시를 반복 계산하는 방식보다 훨씬 빨라 numpy 없이도 대규모로 사용 가능
+    mask = num_hashes - 1
+    positions = range(num_hashes)
+    orders = probe_orders(num_hashes)
+    signatures = []
+    for text in texts:
+        hashes = shingle_hashes(text)
+        # 큰 값부터 넣으면 칸마다 마지막에 남는 값이 최솟값
+        bins = {h & mask: h for h in sorted(hashes, reverse=True)}
+        if len(bins) == num_hashes:
+            signatures.append(list(map(bins.__getitem__, positions)))
+            continue
+        # 제목은 3-gram이 10~25개 정도라 대부분의 칸이 비어 있음. 빈 칸은 칸마다 다른 순서로
+        # 처음 찾은 채워진 칸의 값을 사용 (optimal densification). 다음 칸의 값을 이어 쓰면
+        # 연속된 빈 칸이 모두 같은 값이 되어, 3-gram 하나만 같아도 밴드 전체가 같아짐
+        filled = bins.__contains__
+        signatures.append([bins[next(filter(filled, order))] for order in orders])
+    return signatures
+
+def minhash_numpy(texts, num_hashes=NUM_HASHES, seed=SEED):
+    # 모든 제목의 n-gram 해시를 한 배열에 모은 뒤 순열(XOR 마스크)마다 구간 최솟값을 계산
+    hashes = []
+    offsets = []
+    for text in texts:
+        offsets.append(len(hashes))
+        hashes.extend(shingle_hashes(text))
+    hashes = np.array(hashes, dtype=np.int64)
+    offsets = np.array(offsets, dtype=np.int64)
+    rng = random.Random(seed)
+    signatures = np.empty((num_hashes, len(texts)), dtype=np.int64)
+    for i in range(num_hashes):
+        permuted = hashes ^ np.int64(rng.getrandbits(32))
+        signatures[i] = np.minimum.reduceat(permuted, offsets)
+    return signatures.T.tolist()
+
+def band_keys(signatures, bands=BANDS):
+    # 밴드마다 항목별 밴드 값의 정수 해시 목록. 정수 튜플의 hash는 프로세스마다 같음
+    rows = len(signatures[0]) // bands if signatures else 0
+    columns = list(zip(*signatures))
+    return [list(map(hash, zip(*columns[band * rows:(band + 1) * rows]))) if signatures else []
+            for band in range(bands)]
+
+def _python_band_keys(args):
+    texts, num_hashes, bands = args
+    return band_keys(minhash_python(texts, num_hashes), bands)
+
+def signature_band_keys(texts, num_hashes=NUM_HASHES, bands=BANDS, use_numpy=False, workers=None):
+    if use_numpy:
+        return band_keys(minhash_numpy(texts, num_hashes) if texts else [], bands)
+    workers = workers or os.cpu_count() or 1
+    if len(texts) < PARALLEL_THRESHOLD or workers < 2:
+        return _python_band_keys((texts, num_hashes, bands))
+
+    # 서명 전체 대신 밴드 해시만 돌려받아 프로세스 간 전달량을 줄임
+    chunk_size = max(1000, -(-len(texts) // (workers * 4)))
+    chunks = [(texts[i:i + chunk_size], num_hashes, bands) for i in range(0, len(texts), chunk_size)]
+    keys = [[] for _ in range(bands)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        # map은 청크 순서대로 결과를 돌려주므로 번호가 texts의 순서와 같음
+        for chunk_keys in executor.map(_python_band_keys, chunks):
+            for band, band_chunk in zip(keys, chunk_keys):
+                band.extend(band_chunk)
+    return keys
+
+def lsh_candidates(keys, max_bucket=MAX_BUCKET):
+    # 밴드의 값이 모두 같은 항목끼리 후보로 묶음. 너무 큰 버킷은 흔한 제목이므로 건너뜀.
+    # 해시가 우연히 같아도 후보는 이후 실제 유사도로 다시 확인함
+    candidates = set()
+    skipped = 0
+    for band in keys:
+        # 두 번 이상 나온 값만 버킷을 만듦
+        shared = {key for key, count in Counter(band).items() if count > 1}
+        buckets = {}
+        for index, key in enumerate(band):
+            if key in shared:
+                buckets.setdefault(key, []).append(index)
+        for members in buckets.values():
+            if len(members) > max_bucket:
+                skipped += 1
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    candidates.add((a, b))
+    metrics.increment("near_dupes.skipped_buckets", skipped)
+    return candidates
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        while parent != self.parent[parent]:
+            self.parent[parent] = self.parent[self.parent[parent]]
+            parent = self.parent[parent]
+        self.parent[item] = parent
+        return parent
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+def find_near_duplicates(name_infos, threshold=THRESHOLD, num_hashes=NUM_HASHES, bands=BANDS,
+                         max_bucket=MAX_BUCKET, use_numpy=None, workers=None, progress=None):
+    # 제목이 비슷한 항목 그룹을 찾음. 같은 플랫폼의 같은 ID는 이미 중복으로 표시되므로 제외
+    use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+
+    def step(done):
+        # progress(완료한 단계 수, 전체 단계 수)
+        if progress:
+            progress(done, 4)
+
+    items = [(name, info) for name, (is_valid, info) in name_infos.items() if is_valid]
+
+    # 서명은 제목으로만 만들고 제작자 유사도는 찾은 쌍마다 따로 계산해 보고함.
+    # 같은 작품도 플랫폼마다 서클명/브랜드명이 달라 제작자를 서명에 섞으면 놓치고,
+    # 제작자만으로 묶으면 같은 서클의 모든 작품이 한 버킷에 모이기 때문
+
+    # 정규화한 제목이 같은 항목은 한 번만 계산
+    with metrics.timer("near_dupes.normalize"):
+        text_items = {}
+        for name, info in items:
+            text = normalize(info['game_title'])
+            if text:
+                text_items.setdefault(text, []).append(name)
+        texts = list(text_items)
+
+    step(1)
+    with metrics.timer("near_dupes.minhash"):
+        keys = signature_band_keys(texts, num_hashes, bands, use_numpy, workers)
+
+    step(2)
+    with metrics.timer("near_dupes.lsh"):
+        candidates = lsh_candidates(keys, max_bucket)
+
+    step(3)
+    # 후보만 실제 n-gram 집합으로 유사도를 확인
+    with metrics.timer("near_dupes.verify"):
+        shingle_cache = {}
+
+        def text_shingles(index):
+            if index not in shingle_cache:
+                shingle_cache[index] = shingles(texts[index])
+            return shingle_cache[index]
+
+        similar = [(a, b, jaccard(text_shingles(a), text_shingles(b))) for a, b in candidates]
+        similar = [(a, b, score) for a, b, score in similar if score >= threshold]
+    metrics.increment("near_dupes.candidates", len(candidates))
+
+    step(4)
+    infos = dict(items)
+    union = UnionFind()
+    best = {}  # 이름 -> 그룹 안에서 가장 높은 (제목 유사도, 그 쌍의 제작자 유사도)
+    pairs = []
+
+    def same_id(name_a, name_b):
+        info_a, info_b = infos[name_a], infos[name_b]
+        return info_a['platform'] == info_b['platform'] and info_a['unique_id'] == info_b['unique_id']
+
+    def link(name_a, name_b, score):
+        if same_id(name_a, name_b):
+            return False
+        info_a, info_b = infos[name_a], infos[name_b]
+        union.union(name_a, name_b)
+        creator_score = jaccard(shingles(normalize(info_a['creator'])), shingles(normalize(info_b['creator'])))
+        pairs.append((name_a, name_b, score, creator_score))
+        best[name_a] = max(best.get(name_a, (0, 0)), (score, creator_score))
+        best[name_b] = max(best.get(name_b, (0, 0)), (score, creator_score))
+        return True
+
+    # 제목이 같은 항목은 각자 ID가 다른 첫 항목과 연결. 첫 항목에만 연결하면
+    # 첫 항목과 ID가 같은 항목이 나머지 항목과 묶이지 않음
+    for names in text_items.values():
+        for name in names:
+            other = next((other for other in names if not same_id(name, other)), None)
+            if other is not None and union.find(name) != union.find(other):
+                link(name, other, 1.0)
+    for a, b, score in similar:
+        names_a, names_b = text_items[texts[a]], text_items[texts[b]]
+        # 두 제목의 항목 중 ID가 다른 한 쌍만 연결하면 나머지는 union-find로 함께 묶임
+        linked = next(((name_a, name_b) for name_a in names_a for name_b in names_b
+                       if link(name_a, name_b, score)), None)
+        if linked:
+            # 같은 제목을 가진 나머지 항목은 연결한 항목과 이미 묶여 있음
+            for name in names_a + names_b:
+                if name not in linked and name in best and score > best[name][0]:
+                    best[name] = (score, best[name][1])
+
+    groups = {}
+    for name in best:
+        groups.setdefault(union.find(name), []).append(name)
+    pair_lists = {}
+    for pair in pairs:
+        pair_lists.setdefault(union.find(pair[0]), []).append(pair)
+
+    result = []
+    for root, names in groups.items():
+        if len(names) < 2:
+            continue
+        result.append({
+            'items': sorted(names, key=lambda name: (-best[name][0], name)),
+            'scores': {name: best[name][0] for name in names},
+            'creator_scores': {name: best[name][1] for name in names},
+            'pairs': pair_lists.get(root, []),  # (이름, 이름, 제목 유사도, 제작자 유사도)
+            'score': max(best[name][0] for name in names)
+        })
+    result.sort(key=lambda group: (-group['score'], -len(group['items'])))
+    metrics.increment("near_dupes.groups", len(result))
+    return result
@@ -0,0 +1,366 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from constants import DEFAULT_EXTENSIONS
+from http_replay import configure_from_env
+from lookup_scheduler import lookup_scheduler
+from metadata_providers import get_provider
+from metrics import metrics
+from metadata_cache import MetadataCache
+from utils import iter_items, plan_name, validate_name
+
+BUFFER_SIZE = 256  # 단계 사이 대기열의 최대 항목 수. 가득 차면 앞 단계가 기다림
+CRAWL_WINDOW = 64  # 결과를 기다리는 조회의 최대 개수
+VALIDATE_BATCH = 200  # 캐시를 한 번에 읽는 항목 수
+COMMIT_INTERVAL = 100  # 조회 결과를 이 개수마다 캐시에 기록
+STAGES = ('scan', 'validate', 'crawl', 'plan')
+STAGE_TEXT = {'scan': "스캔", 'validate': "검증", 'crawl': "조회", 'plan': "이름 계획"}
+STATUS_TEXT = {
+    'rename': "이름 변경",
+    'unchanged': "변경 없음",
+    'conflict': "이름 충돌",
+    'not_found': "웹 정보 없음",
+    'invalid': "형식 오류",
+    'error': "오류"
+}
+DONE = object()  # 대기열의 끝 표시
+
+class PipelineStopped(Exception):
+    pass
+
+class StageStats:
+    # work: 처리한 시간(조회는 결과를 기다린 시간 포함), starved: 앞 단계를 기다린 시간, blocked: 뒤 단계를 기다린 시간
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.work = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    def snapshot(self, now, depth):
+        elapsed = ((self.finished_at or now) - self.started_at) if self.started_at else 0.0
+        return {
+            'stage': self.name,
+            'items': self.items,
+            'per_sec': self.items / elapsed if elapsed else None,
+            'work': self.work / elapsed if elapsed else None,
+            'starved': self.starved / elapsed if elapsed else None,
+            'blocked': self.blocked / elapsed if elapsed else None,
+            'queue': depth,
+            'finished': self.finished_at is not None
+        }
+
+class IngestPipeline:
+    # 스캔 -> 검증 -> 조회 -> 이름 계획을 단계별 스레드와 크기가 정해진 대기열로 연결.
+    # 항목은 하나씩 흘러가므로 스캔은 조회가 끝나기를 기다리지 않고, 대기열이 가득 찰 때만 멈춤
+    def __init__(self, path, extensions=None, buffer_size=BUFFER_SIZE, crawl_window=CRAWL_WINDOW,
+                 scheduler=None, cache_path=None):
+        self.path = os.path.abspath(path)
+        self.extensions = DEFAULT_EXTENSIONS if extensions is None else extensions
+        self.crawl_window = crawl_window
+        self.scheduler = scheduler or lookup_scheduler
+        self.cache_path = cache_path
+        self.stop_event = threading.Event()
+        self.queues = {stage: queue.Queue(maxsize=buffer_size) for stage in STAGES[1:]}
+        self.output = queue.Queue(maxsize=buffer_size)
+        self.stats = {stage: StageStats(stage) for stage in STAGES}
+        self.errors = []
+        self.threads = []
+        self.targets = set()  # 계획한 새 이름. 같은 이름으로 바꾸는 항목끼리의 충돌 확인용
+
+    def stop(self):
+        self.stop_event.set()
+
+    def put(self, target, item, stats):
+        # 뒤 단계의 대기열이 가득 차면 빌 때까지 기다림(역압력). 중단 요청은 주기적으로 확인
+        start = time.perf_counter()
+        try:
+            while True:
+                if self.stop_event.is_set():
+                    raise PipelineStopped()
+                try:
+                    target.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.blocked += time.perf_counter() - start
+
+    def get(self, source, stats, timeout=None):
+        start = time.perf_counter()
+        try:
+            while True:
+                if self.stop_event.is_set():
+                    raise PipelineStopped()
+                try:
+                    return source.get(timeout=0.1 if timeout is None else timeout)
+                except queue.Empty:
+                    if timeout is not None:
+                        return None
+        finally:
+            stats.starved += time.perf_counter() - start
+
+    def start_stage(self, stage, func, targets):
+        def run():
+            stats = self.stats[stage]
+            stats.started_at = time.perf_counter()
+            try:
+                func(stats)
+            except PipelineStopped:
+                pass
+            except Exception as e:
+                self.errors.append((stage, e))
+                self.stop_event.set()
+            finally:
+                stats.finished_at = time.perf_counter()
+                metrics.add_time(f"pipeline.{stage}.work", stats.work)
+                metrics.add_time(f"pipeline.{stage}.starved", stats.starved)
+                metrics.add_time(f"pipeline.{stage}.blocked", stats.blocked)
+                metrics.increment(f"pipeline.{stage}.items", stats.items)
+                # 중단되지 않았으면 다음 단계에 끝을 알림
+                try:
+                    for target in targets:
+                        self.put(target, DONE, stats)
+                except PipelineStopped:
+                    pass
+
+        thread = threading.Thread(target=run, name=f"pipeline-{stage}", daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def scan_stage(self, stats):
+        items = iter_items(self.path, self.extensions)
+        while True:
+            start = time.perf_counter()
+            item = next(items, None)
+            stats.work += time.perf_counter() - start
+            if item is None:
+                return
+            stats.items += 1
+            self.put(self.queues['validate'], item, stats)
+
+    def validate_stage(self, stats):
+        cache = MetadataCache(self.cache_path)
+        try:
+            finished = False
+            while not finished:
+                # 첫 항목은 기다리고, 나머지는 이미 대기열에 있는 만큼만 모아 캐시를 한 번에 읽음
+                batch = []
+                item = self.get(self.queues['validate'], stats)
+                while item is not DONE:
+                    batch.append(item)
+                    if len(batch) >= VALIDATE_BATCH:
+                        break
+                    try:
+                        item = self.queues['validate'].get_nowait()
+                    except queue.Empty:
+                        break
+                finished = item is DONE
+
+                start = time.perf_counter()
+                validated = [(name, stat, validate_name(name)) for name, stat in batch]
+                by_platform = {}
+                for name, stat, (is_valid, info) in validated:
+                    if is_valid:
+                        by_platform.setdefault(info['platform'], set()).add(info['unique_id'])
+                cached = {}
+                for platform, unique_ids in by_platform.items():
+                    for unique_id, row in cache.load(platform, unique_ids).items():
+                        if row['info']:
+                            cached[(platform, unique_id)] = row['info']
+                stats.work += time.perf_counter() - start
+
+                for name, stat, (is_valid, info) in validated:
+                    stats.items += 1
+                    key = (info['platform'], info['unique_id']) if is_valid else None
+                    if key in cached:
+                        self.put(self.queues['plan'], (name, stat, info, cached[key]), stats)
+                    elif is_valid and get_provider(info['platform']) is not None:
+                        self.put(self.queues['crawl'], (name, stat, info), stats)
+                    else:
+                        # 형식이 맞지 않거나 조회할 수 없는 항목은 조회 단계를 거치지 않음
+                        self.put(self.queues['plan'], (name, stat, info if is_valid else None, None), stats)
+        finally:
+            cache.close()
+
+    def crawl_stage(self, stats):
+        # 결과를 기다리는 조회가 CRAWL_WINDOW개를 넘지 않도록 하여 결과 대기열의 크기도 제한
+        cache = MetadataCache(self.cache_path)
+        owner = object()
+        results = queue.Queue()
+        waiting = {}  # (플랫폼, 고유 ID) -> 결과를 기다리는 항목 목록
+        in_flight = 0
+        input_done = False
+        uncommitted = 0
+        try:
+            while not input_done or in_flight:
+                if self.stop_event.is_set():
+                    raise PipelineStopped()
+                if not input_done and in_flight < self.crawl_window:
+                    # 조회할 자리가 있으면 다음 항목을 받음. 결과가 오면 먼저 처리하도록 짧게 기다림
+                    item = self.get(self.queues['crawl'], stats, timeout=0.05 if in_flight else None)
+                    if item is DONE:
+                        input_done = True
+                    elif item is not None:
+                        name, stat, info = item
+                        key = (info['platform'], info['unique_id'])
+                        if key not in waiting:
+                            waiting[key] = []
+                            self.scheduler.submit(key[0], key[1], owner,
+                                                  lambda key, crawled: results.put((key, crawled)))
+                        waiting[key].append(item)
+                        in_flight += 1
+                    if in_flight == 0 or results.empty():
+                        continue
+
+                start = time.perf_counter()
+                try:
+                    key, crawled_info = results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                finally:
+                    stats.work += time.perf_counter() - start
+
+                if crawled_info:
+                    cache.put_info(key[0], key[1], crawled_info, time.time())
+                    uncommitted += 1
+                    if uncommitted >= COMMIT_INTERVAL:
+                        cache.commit()
+                        uncommitted = 0
+                for name, stat, info in waiting.pop(key):
+                    in_flight -= 1
+                    stats.items += 1
+                    self.put(self.queues['plan'], (name, stat, info, crawled_info), stats)
+        finally:
+            self.scheduler.cancel(owner)
+            cache.commit()
+            cache.close()
+
+    def plan_stage(self, stats):
+        # 검증 단계와 조회 단계가 모두 끝을 알려야 끝남
+        senders = 2
+        while True:
+            item = self.get(self.queues['plan'], stats)
+            if item is DONE:
+                senders -= 1
+                if not senders:
+                    return
+                continue
+            start = time.perf_counter()
+            name, stat, info, crawled_info = item
+            record = {'name': name, 'new_name': None, 'error': None}
+            if info is None:
+                record['status'] = 'invalid'
+            elif not crawled_info:
+                record['status'] = 'not_found'
+            else:
+                # 서비스의 이름 변경 계획(LibraryService.rename_plan)과 같은 규칙
+                new_name, valid, error = plan_name(name, info, stat['is_dir'], crawled_info)
+                if not error and not valid:
+                    error = "새 이름이 이름 형식에 맞지 않습니다."
+                record.update(new_name=new_name, error=error)
+                if error:
+                    record['status'] = 'error'
+                elif new_name == name:
+                    record['status'] = 'unchanged'
+                elif new_name in self.targets or os.path.lexists(os.path.join(self.path, new_name)):
+                    record['status'] = 'conflict'
+                else:
+                    record['status'] = 'rename'
+                    self.targets.add(new_name)
+            stats.work += time.perf_counter() - start
+            stats.items += 1
+            self.put(self.output, record, stats)
+
+    def run(self):
+        # 이름 변경 계획을 하나씩 반환. 반환을 멈추면(또는 stop) 모든 단계가 멈춤
+        stages = {'scan': self.scan_stage, 'validate': self.validate_stage,
+                  'crawl': self.crawl_stage, 'plan': self.plan_stage}
+        # 검증 단계는 조회 대기열과 계획 대기열 모두에 보내므로 둘 다에 끝을 알림
+        targets = {'scan': (self.queues['validate'],), 'validate': (self.queues['crawl'], self.queues['plan']),
+                   'crawl': (self.queues['plan'],), 'plan': (self.output,)}
+        with metrics.timer("pipeline.run"):
+            try:
+                for stage in STAGES:
+                    self.start_stage(stage, stages[stage], targets[stage])
+                while True:
+                    try:
+                        record = self.output.get(timeout=0.1)
+                    except queue.Empty:
+                        if self.stop_event.is_set():
+                            break
+                        continue
+                    if record is DONE:
+                        break
+                    yield record
+            finally:
+                self.stop_event.set()
+                for thread in self.threads:
+                    thread.join()
+        if self.errors:
+            stage, error = self.errors[0]
+            raise RuntimeError(f"{STAGE_TEXT[stage]} 단계 오류: {error}") from error
+
+    def snapshot(self):
+        # 단계별 처리량과 시간 비율. work 비율이 가장 높은 단계가 병목
+        now = time.perf_counter()
+        depths = {'scan': self.queues['validate'].qsize(), 'validate': self.queues['crawl'].qsize(),
+                  'crawl': self.queues['plan'].qsize(), 'plan': self.output.qsize()}
+        return [self.stats[stage].snapshot(now, depths[stage]) for stage in STAGES]
+
+    def bottleneck(self):
+        rows = [row for row in self.snapshot() if row['work'] is not None]
+        return max(rows, key=lambda row: row['work'])['stage'] if rows else None
+
+def format_stats(rows, bottleneck=None):
+    def percent(value):
+        return f"{value:.0%}" if value is not None else "-"
+
+    lines = []
+    for row in rows:
+        per_sec = f"{row['per_sec']:,.0f}/s" if row['per_sec'] is not None else "-"
+        mark = "  <- 병목" if row['stage'] == bottleneck else ""
+        lines.append(f"{STAGE_TEXT[row['stage']]:<6} {row['items']:>9,}개 {per_sec:>10}  "
+                     f"처리 {percent(row['work'])} 대기(앞) {percent(row['starved'])} "
+                     f"대기(뒤) {percent(row['blocked'])}  대기열 {row['queue']}{mark}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스캔 -> 검증 -> 웹 정보 조회 -> 이름 변경 계획을 한 번에 흘려 보내며 실행")
+    parser.add_argument('path')
+    parser.add_argument('--output', help="이름 변경 계획을 저장할 파일 (탭 구분: 상태, 현재 이름, 새 이름). 기본: 표준 출력")
+    parser.add_argument('--all', action='store_true', help="바꿀 필요가 없는 항목도 출력")
+    parser.add_argument('--buffer', type=int, default=BUFFER_SIZE, help="단계 사이 대기열 크기")
+    parser.add_argument('--window', type=int, default=CRAWL_WINDOW, help="동시에 결과를 기다리는 조회 수")
+    parser.add_argument('--stats-interval', type=float, default=5, help="단계별 처리량을 표준 오류에 출력하는 간격(초). 0이면 끝날 때만")
+    args = parser.parse_args(argv)
+
+    configure_from_env()
+    pipeline = IngestPipeline(args.path, buffer_size=args.buffer, crawl_window=args.window)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    counts = dict.fromkeys(STATUS_TEXT, 0)
+    last = time.monotonic()
+    try:
+        for record in pipeline.run():
+            counts[record['status']] += 1
+            if args.all or record['status'] not in ('unchanged',):
+                out.write(f"{record['status']}\t{record['name']}\t{record['new_name'] or ''}\n")
+            if args.stats_interval and time.monotonic() - last >= args.stats_interval:
+                last = time.monotonic()
+                print(format_stats(pipeline.snapshot(), pipeline.bottleneck()) + "\n", file=sys.stderr)
+    except KeyboardInterrupt:
+        pipeline.stop()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(format_stats(pipeline.snapshot(), pipeline.bottleneck()), file=sys.stderr)
+    print(", ".join(f"{STATUS_TEXT[status]} {count:,}개" for status, count in counts.items() if count), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
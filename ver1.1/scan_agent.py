@@ -0,0 +1,165 @@
+import argparse
+import os
+import socket
+import threading
+
+from constants import DEFAULT_EXTENSIONS
+from metrics import metrics
+from service import ServiceClient, ServiceError
+from snapshots import match_renames
+from utils import scan_items, validate_name
+
+DEFAULT_INTERVAL = 60
+FULL_PAGE_SIZE = 5000  # 항목당 약 350바이트. 한 요청이 2MB 정도가 되도록
+FATAL_STATUSES = (400, 401, 404, 413)
+
+def snapshot_items(path, extensions):
+    # 이름 -> (is_dir, size, mtime)
+    return {name: (stat['is_dir'], stat['size'], stat['mtime'])
+            for name, stat in scan_items(path, extensions).items()}
+
+def diff_snapshots(old, new):
+    # 이전/현재 스캔 결과의 차이. 없어진 항목과 새 항목 중 종류/크기/수정 시각이 같은 것이
+    # 하나씩뿐이면 이름 변경으로 봄 (이름을 바꿔도 수정 시각은 바뀌지 않음)
+    removed = [name for name in old if name not in new]
+    added = [name for name in new if name not in old]
+    changed = {name: new[name] for name in new if name in old and new[name] != old[name]}
+
+    renamed = match_renames([(name, old[name]) for name in removed], [(name, new[name]) for name in added])
+    renamed_old = {old_name for old_name, _ in renamed}
+    renamed_new = {new_name for _, new_name in renamed}
+
+    return {
+        'added': [name for name in added if name not in renamed_new],
+        'removed': [name for name in removed if name not in renamed_old],
+        'changed': changed,
+        'renamed': renamed
+    }
+
+class ScanAgent:
+    # 저장소 가까이에서 스캔/이름 검사를 하고 바뀐 부분만 중앙 서비스(service.py)로 보냄
+    def __init__(self, root, shard, client, extensions=None):
+        self.root = os.path.abspath(root)
+        self.shard = shard
+        self.client = client
+        self.extensions = DEFAULT_EXTENSIONS if extensions is None else extensions
+        self.snapshot = {}
+        self.infos = {}  # 이름 -> validate_name 결과 정보 (유효하지 않으면 None)
+        self.seq = 0
+        self.synced = False  # 중앙 색인이 self.seq 시점의 목록을 가지고 있는지
+
+    def info(self, name):
+        if name not in self.infos:
+            self.infos[name] = validate_name(name)[1]
+        return self.infos[name]
+
+    def full_payloads(self, current):
+        # 서비스의 요청 크기 제한(MAX_BODY)을 넘지 않도록 전체 목록은 FULL_PAGE_SIZE개씩 나누어 보냄.
+        # 중앙 색인은 마지막 묶음을 받을 때 한 번에 교체함
+        names = list(current)
+        for page, start in enumerate(range(0, max(len(names), 1), FULL_PAGE_SIZE)):
+            chunk = names[start:start + FULL_PAGE_SIZE]
+            yield {'shard': self.shard, 'root': self.root, 'base_seq': self.seq, 'seq': self.seq + 1,
+                   'full': True, 'page': page, 'last': start + FULL_PAGE_SIZE >= len(names),
+                   'added': {name: [*current[name], self.info(name)] for name in chunk}}
+
+    def make_payloads(self, current):
+        if not self.synced:
+            yield from self.full_payloads(current)
+            return
+
+        delta = diff_snapshots(self.snapshot, current)
+        if not any(delta.values()):
+            return
+        if sum(map(len, delta.values())) > FULL_PAGE_SIZE:
+            # 한 번에 보내기엔 변경이 너무 많으면 전체 목록을 나누어 보냄
+            yield from self.full_payloads(current)
+            return
+        # 새 이름만 검사. 바뀌지 않은 이름의 검사 결과는 이전 것을 사용
+        yield {
+            'shard': self.shard, 'root': self.root, 'base_seq': self.seq, 'seq': self.seq + 1,
+            'added': {name: [*current[name], self.info(name)] for name in delta['added']},
+            'changed': delta['changed'],
+            'removed': delta['removed'],
+            'renamed': [[old_name, new_name, self.info(new_name)] for old_name, new_name in delta['renamed']]
+        }
+
+    def send(self, payloads):
+        # 보낸 항목 수와 마지막 요청을 반환 (보낼 것이 없으면 None)
+        sent = 0
+        payload = None
+        for payload in payloads:
+            self.client.call('POST', '/shards/delta', payload)
+            sent += sum(len(payload.get(kind, ())) for kind in ('added', 'changed', 'removed', 'renamed'))
+        return sent, payload
+
+    def run_once(self):
+        # 한 번 스캔하고 변경 내용을 보냄. 보낸 항목 수를 반환 (변경 없으면 0)
+        with metrics.timer("agent.scan"):
+            current = snapshot_items(self.root, self.extensions)
+        try:
+            sent, payload = self.send(self.make_payloads(current))
+        except ServiceError as e:
+            if e.status != 409:
+                raise
+            # 중앙 색인이 다시 만들어졌거나 다른 에이전트가 같은 샤드 이름을 사용한 경우
+            metrics.increment("agent.resync")
+            self.synced = False
+            sent, payload = self.send(self.make_payloads(current))
+        if payload is None:
+            return 0
+
+        metrics.increment("agent.sent", sent)
+        self.snapshot = current
+        self.seq = payload['seq']
+        self.synced = True
+        # 없어진 이름의 검사 결과는 버림
+        self.infos = {name: self.infos[name] for name in current if name in self.infos}
+        return sent
+
+    def run(self, interval=DEFAULT_INTERVAL, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                sent = self.run_once()
+                if sent:
+                    print(f"[{self.shard}] {sent}개 변경 전송 (기준 번호 {self.seq})")
+            except ServiceError as e:
+                # 요청 크기 초과나 인증 실패는 다시 보내도 같으므로 중단
+                if e.status in FATAL_STATUSES:
+                    raise
+                print(f"[{self.shard}] 오류: {e}")
+                self.synced = False
+            except OSError as e:
+                # 서비스나 저장소에 잠시 접근할 수 없으면 다음 주기에 전체 목록부터 다시 보냄
+                print(f"[{self.shard}] 오류: {e}")
+                self.synced = False
+            stop.wait(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="저장소(NAS 등)마다 실행하는 스캔 에이전트. 바뀐 항목만 중앙 서비스로 보냄. "
+                    "한 컴퓨터에서 폴더마다 --shard 이름을 다르게 하여 여러 개 실행해 볼 수 있음")
+    parser.add_argument('root', help="스캔할 폴더")
+    parser.add_argument('--service', default=os.environ.get('GIANA_SERVICE', 'http://127.0.0.1:8766'),
+                        help="중앙 서비스 주소 (service.py)")
+    parser.add_argument('--token', default=os.environ.get('GIANA_SERVICE_TOKEN'))
+    parser.add_argument('--shard', help="샤드 이름 (기본: 컴퓨터 이름:폴더 경로)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="스캔 간격(초)")
+    parser.add_argument('--once', action='store_true', help="한 번만 스캔하고 종료")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    agent = ScanAgent(root, args.shard or f"{socket.gethostname()}:{root}", ServiceClient(args.service, args.token))
+    try:
+        if args.once:
+            print(f"[{agent.shard}] {agent.run_once()}개 전송")
+            return
+        agent.run(args.interval)
+    except ServiceError as e:
+        parser.exit(1, f"[{agent.shard}] 중단: {e}\n")
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+from constants import DEFAULT_EXTENSIONS
+from http_replay import configure_from_env
+from library_index import LibraryIndex, SequenceError
+from lookup_scheduler import lookup_scheduler
+from metadata_providers import get_provider
+from metrics import metrics
+from sidecar import import_folder
+from tag_index import TagIndex
+from metadata_cache import MetadataCache
+from utils import scan_items, classify_items_parallel, plan_name
+
+DEFAULT_PORT = 8766  # stand_in_server의 기본 포트(8765)와 겹치지 않도록 함
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+CRAWL_TIMEOUT = 300
+MAX_BODY = 16 * 1024 * 1024
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class LibraryService:
+    # 여러 사람이 같은 공유 폴더를 다룰 때 스캔 결과, 메타데이터 캐시, 조회 스케줄러를 한 곳에서 관리
+    def __init__(self, cache=None, scheduler=None, max_age=DEFAULT_MAX_AGE, index=None):
+        self.cache = cache or MetadataCache(check_same_thread=False)
+        self.index = index or LibraryIndex()  # 스캔 에이전트(scan_agent.py)가 보낸 저장소별 목록
+        self.cache_lock = threading.Lock()
+        self.scheduler = scheduler or lookup_scheduler
+        self.max_age = max_age  # 이 시간(초) 안에 조회한 정보는 다시 조회하지 않음
+        self.scans = {}  # (경로, 확장자) -> 스캔 결과
+        self.scan_locks = {}
+        self.lock = threading.Lock()
+        self.tags_version = 0  # 조회 결과를 저장할 때마다 증가. 태그 색인을 다시 만들지 판단
+        self.started_at = time.time()
+
+    def scan(self, path, extensions=None, refresh=False):
+        # 폴더의 수정 시각은 바로 아래 항목이 추가/삭제/이름 변경될 때 바뀌므로, 같으면 이전 결과를 사용
+        path = os.path.abspath(path)
+        extensions = tuple(sorted(DEFAULT_EXTENSIONS if extensions is None else extensions))
+        key = (path, extensions)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            raise ServiceError(404, f"폴더를 찾을 수 없습니다: {path}")
+
+        with self.lock:
+            scan_lock = self.scan_locks.setdefault(key, threading.Lock())
+        # 같은 폴더를 여러 클라이언트가 동시에 요청해도 한 번만 스캔
+        with scan_lock:
+            entry = self.scans.get(key)
+            if entry is not None and entry['mtime'] == mtime and not refresh:
+                metrics.increment("service.scan.reused")
+                return entry
+            item_stats = scan_items(path, list(extensions))
+            valid, invalid, duplicate = classify_items_parallel(list(item_stats))
+            infos = dict(valid)
+            entry = {
+                'path': path,
+                'extensions': extensions,
+                'mtime': mtime,
+                'scanned_at': time.time(),
+                'item_stats': item_stats,
+                'valid': valid,
+                'invalid': invalid,
+                'duplicate': duplicate,
+                'infos': infos,
+                # 검색용 소문자 이름
+                'search_names': [(name.lower(), name) for name in item_stats]
+            }
+            # 폴더에 저장된 웹 정보를 캐시로 가져와 다른 컴퓨터에서 옮겨 온 라이브러리도 다시 조회하지 않음
+            with self.cache_lock:
+                try:
+                    _, imported = import_folder(path, {name: (True, info) for name, info in valid}, self.cache)
+                except OSError:
+                    imported = 0
+                if imported:
+                    self.tags_version += 1
+            with self.lock:
+                self.scans[key] = entry
+            metrics.increment("service.scan.fresh")
+            return entry
+
+    def validate(self, path, extensions=None, refresh=False):
+        entry = self.scan(path, extensions, refresh)
+        return {
+            'path': entry['path'],
+            'scanned_at': entry['scanned_at'],
+            'item_stats': entry['item_stats'],
+            'valid': entry['valid'],
+            'invalid': entry['invalid'],
+            'duplicate': entry['duplicate']
+        }
+
+    def search(self, path, query='', extensions=None, filters=None, limit=100):
+        # 검색어의 모든 단어가 이름에 포함되고 지정한 필드(플랫폼/장르/제작자)가 일치하는 항목
+        entry = self.scan(path, extensions)
+        terms = query.lower().split()
+        filters = filters or {}
+        matches = []
+        for lower_name, name in entry['search_names']:
+            if not all(term in lower_name for term in terms):
+                continue
+            info = entry['infos'].get(name)
+            if filters and (info is None or any(info.get(field) != value for field, value in filters.items())):
+                continue
+            matches.append({'name': name, 'info': info})
+        return {'total': len(matches), 'items': matches[:limit]}
+
+    def cached_infos(self, keys, max_age):
+        # (플랫폼, 고유 ID) -> 정보. max_age 안에 조회한 것만
+        by_platform = {}
+        for platform, unique_id in keys:
+            by_platform.setdefault(platform, []).append(unique_id)
+        now = time.time()
+        infos = {}
+        with self.cache_lock:
+            for platform, unique_ids in by_platform.items():
+                for unique_id, row in self.cache.load(platform, unique_ids).items():
+                    if row['info'] and (max_age is None or now - row['checked_at'] < max_age):
+                        infos[(platform, unique_id)] = row['info']
+        return infos
+
+    def crawl(self, items, max_age=None, timeout=CRAWL_TIMEOUT, refresh=False):
+        # 캐시에 없는 항목만 공용 스케줄러로 조회. 여러 클라이언트가 같은 ID를 요청해도 한 번만 조회됨
+        max_age = self.max_age if max_age is None else max_age
+        keys = list(dict.fromkeys((platform, unique_id) for platform, unique_id in items))
+        cached = {} if refresh else self.cached_infos(keys, max_age)
+        missing = [key for key in keys if key not in cached and get_provider(key[0]) is not None]
+        metrics.increment("service.crawl.cached", len(cached))
+
+        owner = object()
+        received = queue.Queue()
+        for platform, unique_id in missing:
+            self.scheduler.submit(platform, unique_id, owner, lambda key, info: received.put((key, info)))
+
+        fetched = {}
+        deadline = time.monotonic() + timeout
+        while len(fetched) < len(missing):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                key, info = received.get(timeout=remaining)
+            except queue.Empty:
+                break
+            fetched[key] = info
+        # 시간 안에 끝나지 않은 조회는 다른 클라이언트가 기다리지 않으면 버림
+        self.scheduler.cancel(owner)
+
+        checked_at = time.time()
+        with self.cache_lock:
+            for (platform, unique_id), info in fetched.items():
+                if info:
+                    self.cache.put_info(platform, unique_id, info, checked_at)
+            self.cache.commit()
+            if any(fetched.values()):
+                self.tags_version += 1
+        metrics.increment("service.crawl.fetched", len(fetched))
+
+        results = []
+        for key in keys:
+            if key in cached:
+                results.append({'platform': key[0], 'unique_id': key[1], 'info': cached[key], 'cached': True})
+            elif key in fetched:
+                results.append({'platform': key[0], 'unique_id': key[1], 'info': fetched[key], 'cached': False})
+        pending = [list(key) for key in missing if key not in fetched]
+        return {'results': results, 'pending': pending}
+
+    def tag_query(self, path, include=(), exclude=(), filters=None, extensions=None, limit=100):
+        entry = self.scan(path, extensions)
+        with self.cache_lock:
+            cached = entry.get('tag_index')
+            if cached is None or cached[0] != self.tags_version:
+                name_infos = {name: (True, info) for name, info in entry['valid']}
+                name_infos.update((name, (False, None)) for name in entry['invalid'])
+                cached = entry['tag_index'] = (self.tags_version, TagIndex.build(name_infos, self.cache.load_tags()))
+        return cached[1].query(include, exclude, filters, limit, facets=('tag', 'platform', 'genre'))
+
+    def rename_plan(self, path, changes, extensions=None):
+        # changes: [{'name', 'overrides': {구성 요소: 값}, 'use_crawled': 캐시의 조회 결과 사용 여부}]
+        # 실제 이름은 바꾸지 않고 바꿀 이름과 충돌 여부만 계산
+        entry = self.scan(path, extensions)
+        crawled = {}
+        lookups = [(entry['infos'][change['name']]['platform'], entry['infos'][change['name']]['unique_id'])
+                   for change in changes if change.get('use_crawled') and change['name'] in entry['infos']]
+        if lookups:
+            crawled = self.cached_infos(lookups, None)
+
+        plan = []
+        targets = {}
+        for change in changes:
+            name = change['name']
+            row = {'name': name, 'new_name': None, 'valid': False, 'conflict': False, 'error': None}
+            plan.append(row)
+            stat_info = entry['item_stats'].get(name)
+            if stat_info is None:
+                row['error'] = "항목을 찾을 수 없습니다."
+                continue
+
+            info = entry['infos'].get(name)
+            crawled_info = None
+            if info and change.get('use_crawled'):
+                crawled_info = crawled.get((info['platform'], info['unique_id']))
+            new_name, row['valid'], row['error'] = plan_name(name, info, stat_info['is_dir'], crawled_info,
+                                                             change.get('overrides'))
+            row['new_name'] = new_name
+            if new_name is None or row['error']:
+                continue
+            if new_name == name:
+                continue
+            # 이미 있는 다른 항목이나 계획의 다른 항목과 이름이 겹치면 충돌
+            if new_name in entry['item_stats'] or os.path.exists(os.path.join(entry['path'], new_name)):
+                row['conflict'] = True
+            if new_name in targets:
+                row['conflict'] = True
+                targets[new_name]['conflict'] = True
+            targets[new_name] = row
+        return {'path': entry['path'], 'plan': plan}
+
+    def apply_delta(self, delta):
+        try:
+            return self.index.apply_delta(delta)
+        except SequenceError as e:
+            raise ServiceError(409, str(e))
+
+    def shard_duplicates(self):
+        return {'shards': self.index.shards(), 'duplicates': self.index.duplicates()}
+
+    def status(self):
+        with self.lock:
+            scans = [{'path': entry['path'],
+                      'extensions': list(entry['extensions']),
+                      'items': len(entry['item_stats']),
+                      'scanned_at': entry['scanned_at']}
+                     for entry in self.scans.values()]
+        return {
+            'started_at': self.started_at,
+            'uptime': time.time() - self.started_at,
+            'scans': scans,
+            'shards': self.index.shards(),
+            'metrics': metrics.snapshot()
+        }
+
+    def close(self):
+        with self.cache_lock:
+            self.cache.close()
+        self.index.close()
+
+ROUTES = {
+    ('GET', '/status'): lambda service, payload, query: service.status(),
+    ('POST', '/validate'): lambda service, payload, query: service.validate(
+        payload['path'], payload.get('extensions'), payload.get('refresh', False)),
+    ('GET', '/search'): lambda service, payload, query: service.search(
+        query['path'], query.get('q', ''),
+        filters={field: query[field] for field in ('platform', 'genre', 'creator') if field in query},
+        limit=int(query.get('limit', 100))),
+    ('POST', '/crawl'): lambda service, payload, query: service.crawl(
+        payload['items'], payload.get('max_age'),
+        min(float(payload.get('timeout', CRAWL_TIMEOUT)), CRAWL_TIMEOUT), payload.get('refresh', False)),
+    ('POST', '/rename-plan'): lambda service, payload, query: service.rename_plan(
+        payload['path'], payload['changes'], payload.get('extensions')),
+    ('POST', '/tags/query'): lambda service, payload, query: service.tag_query(
+        payload['path'], payload.get('include', []), payload.get('exclude', []), payload.get('filters'),
+        payload.get('extensions'), int(payload.get('limit', 100))),
+    ('POST', '/shards/delta'): lambda service, payload, query: service.apply_delta(payload),
+    ('GET', '/shards/duplicates'): lambda service, payload, query: service.shard_duplicates()
+}
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+        parts = urlsplit(self.path)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY:
+                self.close_connection = True
+                raise ServiceError(413, "요청이 너무 큽니다.")
+            body = self.rfile.read(length) if length else b''
+            token = self.server.token
+            if token and self.headers.get('Authorization') != f"Bearer {token}":
+                raise ServiceError(401, "인증 토큰이 올바르지 않습니다.")
+            route = ROUTES.get((method, parts.path))
+            if route is None:
+                raise ServiceError(404, f"알 수 없는 요청입니다: {method} {parts.path}")
+            payload = json.loads(body) if body else {}
+            query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+            metrics.increment(f"service.requests{parts.path.replace('/', '.')}")
+            with metrics.timer(f"service{parts.path.replace('/', '.')}"):
+                result = route(self.server.service, payload, query)
+            self.send_json(200, result)
+        except ServiceError as e:
+            self.send_json(e.status, {'error': str(e)})
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {'error': f"잘못된 요청입니다: {e}"})
+        except Exception as e:
+            metrics.increment("service.errors")
+            self.send_json(500, {'error': str(e)})
+
+    def send_json(self, status, result):
+        content = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, token=None):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.token = token
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class UnixServiceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        # 같은 컴퓨터에서만 접근하도록 할 때 사용 (파일 권한으로 접근 제어)
+        daemon_threads = True
+
+        def __init__(self, socket_path, service, token=None):
+            # 이전 실행에서 남은 소켓 파일은 지우고 다시 만듦
+            if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                os.remove(socket_path)
+            super().__init__(socket_path, ServiceHandler)
+            self.service = service
+            self.token = token
+
+        @property
+        def address(self):
+            return f"unix:{self.server_address}"
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class ServiceClient:
+    # address: "http://호스트:포트" 또는 "unix:소켓 경로"
+    def __init__(self, address, token=None, timeout=CRAWL_TIMEOUT + 30):
+        self.address = address
+        self.token = token
+        self.timeout = timeout
+        self.local = threading.local()  # 스레드마다 연결을 따로 유지
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            if self.address.startswith('unix:'):
+                conn = UnixHTTPConnection(self.address[len('unix:'):], self.timeout)
+            else:
+                parts = urlsplit(self.address)
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or DEFAULT_PORT, timeout=self.timeout)
+            self.local.conn = conn
+        return conn
+
+    def call(self, method, path, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        # 서버가 유지 중인 연결을 닫았을 수 있으므로 한 번은 새 연결로 다시 시도
+        for attempt in range(2):
+            conn = self.connection()
+            try:
+                with metrics.timer("service.client.request"):
+                    conn.request(method, path, body, headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise ServiceError(503, f"서비스에 연결할 수 없습니다: {e}")
+        result = json.loads(data) if data else {}
+        if response.status != 200:
+            raise ServiceError(response.status, result.get('error', f"HTTP {response.status}"))
+        return result
+
+    def status(self):
+        return self.call('GET', '/status')
+
+    def validate(self, path, extensions=None, refresh=False):
+        # classify_items와 같은 형태로 반환: (이름 -> 크기/수정 시각, 유효 목록, 유효하지 않은 목록, 중복 목록)
+        result = self.call('POST', '/validate', {'path': path, 'extensions': extensions, 'refresh': refresh})
+        valid = [(name, info) for name, info in result['valid']]
+        return result['item_stats'], valid, result['invalid'], result['duplicate']
+
+    def search(self, path, query='', limit=100, **filters):
+        return self.call('GET', '/search?' + urlencode(dict(filters, path=path, q=query, limit=limit)))
+
+    def crawl(self, items, max_age=None, timeout=None, refresh=False):
+        # (플랫폼, 고유 ID) -> 정보. 조회에 실패했거나 시간 안에 끝나지 않은 항목은 포함하지 않음
+        payload = {'items': [list(item) for item in items], 'max_age': max_age, 'refresh': refresh}
+        if timeout is not None:
+            payload['timeout'] = timeout
+        result = self.call('POST', '/crawl', payload)
+        return {(row['platform'], row['unique_id']): row['info'] for row in result['results'] if row['info']}
+
+    def rename_plan(self, path, changes, extensions=None):
+        return self.call('POST', '/rename-plan', {'path': path, 'changes': changes, 'extensions': extensions})['plan']
+
+    def tag_query(self, path, include=(), exclude=(), filters=None, limit=100):
+        return self.call('POST', '/tags/query', {'path': path, 'include': list(include), 'exclude': list(exclude),
+                                                 'filters': filters, 'limit': limit})
+
+    def shard_duplicates(self):
+        # 모든 스캔 에이전트의 목록을 합쳐 찾은 중복 항목
+        return self.call('GET', '/shards/duplicates')
+
+    def provider(self, platform):
+        if get_provider(platform) is None:
+            return None
+        return RemoteProvider(self, platform)
+
+class RemoteProvider:
+    # lookup_scheduler가 서비스를 통해 조회하도록 하는 provider. 요청 간격 제한과 캐시는 서비스가 담당
+    batch_size = 10  # 작을수록 화면에 보이는 행의 우선순위가 빨리 반영됨
+
+    def __init__(self, client, platform):
+        self.client = client
+        self.platform = platform
+
+    def fetch(self, unique_id):
+        return self.fetch_many([unique_id]).get(unique_id)
+
+    def fetch_many(self, unique_ids):
+        results = self.client.crawl([(self.platform, unique_id) for unique_id in unique_ids])
+        return {unique_id: info for (_, unique_id), info in results.items()}
+
+def connect_from_env(environ=None):
+    # GIANA_SERVICE=서비스 주소, GIANA_SERVICE_TOKEN=인증 토큰
+    # 지정하면 검증과 웹 정보 조회를 서비스에 맡기고 프로그램은 결과만 표시
+    environ = os.environ if environ is None else environ
+    address = environ.get('GIANA_SERVICE')
+    if not address:
+        return None
+    client = ServiceClient(address, environ.get('GIANA_SERVICE_TOKEN'))
+    lookup_scheduler.provider_factory = client.provider
+    return client
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="스캔 결과, 메타데이터 캐시, 웹 정보 조회를 여러 프로그램이 함께 사용하도록 하는 로컬 서비스")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', help="지정하면 TCP 대신 이 경로의 Unix 소켓 사용")
+    parser.add_argument('--token', default=os.environ.get('GIANA_SERVICE_TOKEN'),
+                        help="지정하면 이 토큰을 보낸 요청만 처리 (다른 컴퓨터에서 접근할 때 사용)")
+    parser.add_argument('--max-age-days', type=float, default=7, help="이 기간 안에 조회한 정보는 캐시 사용")
+    parser.add_argument('--db', help="메타데이터 캐시 파일 (기본: ~/.giana/metadata_cache.db)")
+    parser.add_argument('--index-db', help="스캔 에이전트 목록 색인 파일 (기본: ~/.giana/library_index.db)")
+    args = parser.parse_args(argv)
+
+    configure_from_env()
+    service = LibraryService(MetadataCache(args.db, check_same_thread=False), max_age=args.max_age_days * 24 * 3600,
+                             index=LibraryIndex(args.index_db))
+    if args.socket:
+        server = UnixServiceServer(args.socket, service, args.token)
+    else:
+        server = ServiceServer((args.host, args.port), service, args.token)
+    print(f"{server.address} 에서 실행 중 (GIANA_SERVICE={server.address} 로 프로그램 실행)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    main()
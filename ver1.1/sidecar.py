@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from constants import DEFAULT_EXTENSIONS, MANIFEST_NAME, SIDECAR_SUFFIX
+from metrics import metrics
+from metadata_cache import MetadataCache
+from utils import scan_items, validate_name
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT_VERSION = 1
+FORMATS = ('json', 'msgpack')
+MODES = ('manifest', 'sidecar')  # 폴더마다 목록 파일 하나 / 항목마다 옆에 파일 하나
+MODE_TEXT = {'manifest': "폴더 목록 파일", 'sidecar': "항목별 파일"}
+BATCH_SIZE = 200
+
+def encode(data, fmt):
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack 형식을 사용하려면 msgpack 패키지가 필요합니다.")
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def decode(data, fmt):
+    if fmt == 'msgpack':
+        if msgpack is None:
+            return None
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data.decode('utf-8'))
+
+def atomic_write(path, data):
+    # 같은 폴더의 임시 파일에 쓴 뒤 교체하므로 도중에 종료되어도 이전 파일 또는 새 파일만 남음
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def manifest_path(folder, fmt):
+    return os.path.join(folder, f"{MANIFEST_NAME}.{fmt}")
+
+def sidecar_path(folder, name, fmt):
+    return os.path.join(folder, f"{name}{SIDECAR_SUFFIX}.{fmt}")
+
+def make_entry(name, info, checked_at):
+    # 표지는 주소와 축소 이미지 저장소(ThumbnailStore)의 키만 기록
+    return {
+        'name': name,
+        'platform': info['Platform'],
+        'unique_id': info['ID'],
+        'checked_at': checked_at,
+        'info': info,
+        'cover': {'image_url': info.get('ImageURL'), 'thumb_key': f"{info['Platform']}:{info['ID']}"}
+    }
+
+def read_file(path, fmt):
+    try:
+        with open(path, 'rb') as f:
+            return decode(f.read(), fmt)
+    except (OSError, ValueError):
+        return None
+
+def read_manifest(folder):
+    # (플랫폼, 고유 ID) -> 항목. 두 형식이 모두 있으면 나중에 저장한 항목을 사용
+    entries = {}
+    for fmt in FORMATS:
+        data = read_file(manifest_path(folder, fmt), fmt)
+        if not data or data.get('version') != FORMAT_VERSION:
+            continue
+        for entry in data.get('items', {}).values():
+            merge_entry(entries, entry)
+    return entries
+
+def merge_entry(entries, entry):
+    key = (entry['platform'], entry['unique_id'])
+    current = entries.get(key)
+    if current is None or (entry.get('checked_at') or 0) >= (current.get('checked_at') or 0):
+        entries[key] = entry
+
+def load_folder(folder):
+    # 폴더 목록 파일과 항목별 파일을 한 번에 읽음. 이름이 바뀌어도 찾을 수 있도록 (플랫폼, 고유 ID)로 연결
+    with metrics.timer("sidecar.load"):
+        entries = read_manifest(folder)
+        try:
+            with os.scandir(folder) as dir_entries:
+                sidecars = [entry.name for entry in dir_entries if SIDECAR_SUFFIX + '.' in entry.name]
+        except OSError:
+            sidecars = []
+        for name in sidecars:
+            fmt = name.rsplit('.', 1)[-1]
+            if fmt not in FORMATS:
+                continue
+            entry = read_file(os.path.join(folder, name), fmt)
+            if entry and entry.get('version') == FORMAT_VERSION:
+                merge_entry(entries, entry)
+    metrics.increment("sidecar.loaded", len(entries))
+    return entries
+
+def rename_sidecars(folder, old_name, new_name):
+    # 항목 이름을 바꿀 때 옆의 파일도 함께 변경
+    for fmt in FORMATS:
+        old_path = sidecar_path(folder, old_name, fmt)
+        if os.path.exists(old_path):
+            os.replace(old_path, sidecar_path(folder, new_name, fmt))
+
+class SidecarWriter:
+    # 조회 결과를 모아 두었다가 BATCH_SIZE개마다(또는 flush/close 때) 한 번에 기록
+    def __init__(self, folder, mode='manifest', fmt='json', batch_size=BATCH_SIZE):
+        if mode not in MODES or fmt not in FORMATS:
+            raise ValueError(f"지원하지 않는 방식입니다: {mode}, {fmt}")
+        if fmt == 'msgpack' and msgpack is None:
+            raise RuntimeError("msgpack 형식을 사용하려면 msgpack 패키지가 필요합니다.")
+        self.folder = folder
+        self.mode = mode
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def add(self, name, info, checked_at=None):
+        with self.lock:
+            entry = make_entry(name, info, checked_at or time.time())
+            self.pending[(entry['platform'], entry['unique_id'])] = entry
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            if not pending:
+                return 0
+            with metrics.timer("sidecar.write"):
+                if self.mode == 'manifest':
+                    self.write_manifest(pending)
+                else:
+                    for entry in pending.values():
+                        atomic_write(sidecar_path(self.folder, entry['name'], self.fmt),
+                                     encode(dict(entry, version=FORMAT_VERSION), self.fmt))
+        metrics.increment("sidecar.written", len(pending))
+        return len(pending)
+
+    def write_manifest(self, pending):
+        path = manifest_path(self.folder, self.fmt)
+        data = read_file(path, self.fmt)
+        items = data['items'] if data and data.get('version') == FORMAT_VERSION else {}
+        for (platform, unique_id), entry in pending.items():
+            items[f"{platform}:{unique_id}"] = entry
+        atomic_write(path, encode({'version': FORMAT_VERSION, 'items': items}, self.fmt))
+
+    def close(self):
+        self.flush()
+
+def import_folder(folder, name_infos, cache):
+    # 폴더의 항목과 같은 ID의 저장된 정보를 MetadataCache로 가져옴. 캐시에 더 최근 정보가 있으면 유지
+    entries = load_folder(folder)
+    wanted = {(info['platform'], info['unique_id']) for is_valid, info in name_infos.values() if is_valid}
+    entries = {key: entry for key, entry in entries.items() if key in wanted and entry.get('info')}
+    imported = 0
+    for platform in {key[0] for key in entries}:
+        rows = cache.load(platform, [unique_id for p, unique_id in entries if p == platform])
+        for (p, unique_id), entry in entries.items():
+            if p != platform:
+                continue
+            row = rows.get(unique_id)
+            if row and row['info'] and (row['checked_at'] or 0) >= (entry.get('checked_at') or 0):
+                continue
+            cache.put_info(platform, unique_id, entry['info'], entry.get('checked_at') or time.time())
+            imported += 1
+    cache.commit()
+    metrics.increment("sidecar.imported", imported)
+    return entries, imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="조회해 둔 웹 정보를 라이브러리 폴더에 저장하거나 폴더에서 가져오기")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help="캐시의 웹 정보를 폴더에 저장")
+    export.add_argument('path')
+    export.add_argument('--mode', choices=MODES, default='manifest', help="manifest: 폴더 목록 파일, sidecar: 항목별 파일")
+    export.add_argument('--format', choices=FORMATS, default='json')
+
+    load = commands.add_parser('import', help="폴더에 저장된 웹 정보를 캐시로 가져오기")
+    load.add_argument('path')
+    args = parser.parse_args(argv)
+
+    path = os.path.abspath(args.path)
+    name_infos = {name: validate_name(name) for name in scan_items(path, DEFAULT_EXTENSIONS)}
+    cache = MetadataCache()
+    try:
+        if args.command == 'export':
+            # 목록 파일은 기록할 때마다 전체를 다시 쓰므로 마지막에 한 번만 기록
+            writer = SidecarWriter(path, args.mode, args.format, batch_size=len(name_infos) + 1)
+            by_platform = {}
+            for name, (is_valid, info) in name_infos.items():
+                if is_valid:
+                    by_platform.setdefault(info['platform'], {})[info['unique_id']] = name
+            count = 0
+            for platform, names in by_platform.items():
+                for unique_id, row in cache.load(platform, names).items():
+                    if row['info']:
+                        writer.add(names[unique_id], row['info'], row['checked_at'])
+                        count += 1
+            writer.close()
+            print(f"{count}개 항목 저장")
+        else:
+            entries, imported = import_folder(path, name_infos, cache)
+            print(f"저장된 정보 {len(entries)}개 중 {imported}개 가져옴")
+    finally:
+        cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+from constants import CACHE_DIR, DEFAULT_EXTENSIONS
+from content_dupes import HashCache, partial_hash
+from metrics import metrics
+from utils import scan_items, classify_items_parallel
+
+FORMAT_HEADER = "#giana-snapshot 1"
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, 'snapshots')
+UNESCAPES = {'\\\\': '\\', '\\t': '\t', '\\n': '\n', '\\r': '\r'}
+CHANGE_TEXT = {'added': "새 항목", 'removed': "삭제", 'renamed': "이름 변경", 'status': "상태 변경", 'modified': "내용 변경"}
+
+def escape(text):
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def unescape(text):
+    if '\\' not in text:
+        return text
+    return re.sub(r'\\[\\tnr]', lambda match: UNESCAPES[match.group()], text)
+
+def snapshot_dir(path):
+    # 폴더 경로마다 스냅샷을 따로 모아 둠
+    return os.path.join(SNAPSHOT_DIR, hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16])
+
+def list_snapshots(path):
+    folder = snapshot_dir(path)
+    try:
+        names = sorted(name for name in os.listdir(folder) if name.endswith('.snap.gz'))
+    except OSError:
+        return []
+    return [os.path.join(folder, name) for name in names]
+
+def new_snapshot_path(path):
+    # 시각 순으로 정렬되는 이름. 같은 순간에 저장해도 이미 있는 이름은 건너뛰어 이전 스냅샷을 덮어쓰지 않음
+    folder = snapshot_dir(path)
+    stamp = time.time_ns()
+    while True:
+        seconds, nanos = divmod(stamp, 1_000_000_000)
+        file_path = os.path.join(folder, f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(seconds))}_{nanos:09d}.snap.gz")
+        if not os.path.exists(file_path):
+            return file_path
+        stamp += 1
+
+def build_records(path, item_stats, valid, invalid, duplicate, hashes=None):
+    # 이름 순으로 정렬한 스냅샷 행. classify_items 결과로 유효/유효하지 않음/중복 상태를 기록
+    infos = dict(valid)
+    duplicate = set(duplicate)
+    hashes = hashes or {}
+    for name in sorted(item_stats):
+        stat = item_stats[name]
+        info = infos.get(name)
+        if name in duplicate:
+            status = 'duplicate'
+        else:
+            status = 'valid' if info else 'invalid'
+        yield {
+            'name': name,
+            'kind': 'd' if stat['is_dir'] else 'f',
+            'size': stat['size'],
+            'mtime': stat['mtime'],
+            'status': status,
+            'unique_id': info['unique_id'] if info else None,
+            'hash': hashes.get(name)
+        }
+
+def file_hashes(path, item_stats, cache=None):
+    # 파일 항목의 앞/뒤 일부 해시. 이름을 바꾸면서 수정 시각이 바뀐 항목도 이름 변경으로 찾을 수 있음
+    own_cache = cache is None
+    cache = cache or HashCache()
+    hashes = {}
+    try:
+        files = {os.path.join(path, name): name for name, stat in item_stats.items() if not stat['is_dir']}
+        cache.load(files)
+        for file_path, name in files.items():
+            stat = item_stats[name]
+            value = cache.get(file_path, stat['size'], stat['mtime'], 'partial')
+            if value is None:
+                try:
+                    value = partial_hash(file_path, stat['size'])
+                except OSError:
+                    continue
+                cache.put(file_path, stat['size'], stat['mtime'], 'partial', value)
+            hashes[name] = value
+        cache.commit()
+    finally:
+        if own_cache:
+            cache.close()
+    return hashes
+
+def write_snapshot(file_path, records, meta):
+    # 한 줄에 한 항목, 탭으로 구분. 임시 파일에 쓴 뒤 교체
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    temp_path = file_path + '.tmp'
+    count = 0
+    with metrics.timer("snapshot.write"):
+        with gzip.open(temp_path, 'wt', encoding='utf-8', newline='\n', compresslevel=6) as f:
+            f.write(f"{FORMAT_HEADER} {json.dumps(meta, ensure_ascii=False)}\n")
+            for record in records:
+                f.write("\t".join((
+                    escape(record['name']),
+                    record['kind'],
+                    '' if record['size'] is None else str(record['size']),
+                    str(record['mtime']),
+                    record['status'],
+                    escape(record['unique_id'] or ''),
+                    record['hash'] or ''
+                )) + "\n")
+                count += 1
+        os.replace(temp_path, file_path)
+    metrics.increment("snapshot.records", count)
+    return count
+
+def save_snapshot(path, extensions=None, with_hash=False, file_path=None):
+    path = os.path.abspath(path)
+    extensions = DEFAULT_EXTENSIONS if extensions is None else extensions
+    item_stats = scan_items(path, extensions)
+    valid, invalid, duplicate = classify_items_parallel(list(item_stats))
+    hashes = file_hashes(path, item_stats) if with_hash else None
+    file_path = file_path or new_snapshot_path(path)
+    meta = {'path': path, 'created_at': time.time(), 'extensions': list(extensions), 'hash': bool(with_hash)}
+    count = write_snapshot(file_path, build_records(path, item_stats, valid, invalid, duplicate, hashes), meta)
+    return file_path, count
+
+def read_meta(file_path):
+    with gzip.open(file_path, 'rt', encoding='utf-8', newline='\n') as f:
+        header = f.readline()
+    if not header.startswith(FORMAT_HEADER):
+        raise ValueError(f"스냅샷 파일이 아닙니다: {file_path}")
+    return json.loads(header[len(FORMAT_HEADER):])
+
+def read_lines(file_path):
+    # (이름, 줄)을 한 줄씩 반환하므로 항목 수와 관계없이 메모리 사용량이 일정함
+    with gzip.open(file_path, 'rt', encoding='utf-8', newline='\n') as f:
+        if not f.readline().startswith(FORMAT_HEADER):
+            raise ValueError(f"스냅샷 파일이 아닙니다: {file_path}")
+        previous = None
+        for line in f:
+            name = unescape(line[:line.index('\t')])
+            if previous is not None and name <= previous:
+                raise ValueError(f"스냅샷이 이름 순으로 정렬되어 있지 않습니다: {file_path}")
+            previous = name
+            yield name, line
+
+def parse_line(line):
+    name, kind, size, mtime, status, unique_id, digest = line.rstrip('\n').split('\t')
+    return {
+        'name': unescape(name),
+        'kind': kind,
+        'size': int(size) if size else None,
+        'mtime': int(mtime),
+        'status': status,
+        'unique_id': unescape(unique_id) or None,
+        'hash': digest or None
+    }
+
+def read_records(file_path):
+    for _, line in read_lines(file_path):
+        yield parse_line(line)
+
+def match_renames(removed, added):
+    # removed/added: (이름, 비교 키) 목록. 같은 키가 양쪽에 하나씩뿐이면 이름 변경으로 봄
+    removed_by_key = {}
+    for name, key in removed:
+        removed_by_key.setdefault(key, []).append(name)
+    added_by_key = {}
+    for name, key in added:
+        added_by_key.setdefault(key, []).append(name)
+    renamed = []
+    for key, names in removed_by_key.items():
+        candidates = added_by_key.get(key)
+        if len(names) == 1 and candidates and len(candidates) == 1:
+            renamed.append((names[0], candidates[0]))
+    return renamed
+
+def rename_key(record, use_hash):
+    # 내용 해시 또는 종류/크기/수정 시각으로 비교 (이름을 바꿔도 수정 시각은 그대로)
+    if use_hash:
+        return ('hash', record['hash'])
+    return ('stat', record['kind'], record['size'], record['mtime'])
+
+def find_renames(removed, added):
+    # 양쪽 모두 해시가 있는 항목끼리는 해시로, 나머지(폴더, 해시 계산에 실패한 파일)는 종류/크기/수정 시각으로 짝지음
+    renamed = match_renames([(record['name'], rename_key(record, True)) for record in removed if record['hash']],
+                            [(record['name'], rename_key(record, True)) for record in added if record['hash']])
+    matched = {name for pair in renamed for name in pair}
+    hashes = {record['name']: record['hash'] for record in removed + added}
+    # 해시가 다른 두 파일은 크기와 수정 시각이 같아도 이름 변경이 아님
+    renamed += [(old_name, new_name) for old_name, new_name in match_renames(
+                    [(record['name'], rename_key(record, False)) for record in removed if record['name'] not in matched],
+                    [(record['name'], rename_key(record, False)) for record in added if record['name'] not in matched])
+                if not (hashes[old_name] and hashes[new_name])]
+    return renamed
+
+def diff_records(old_lines, new_lines):
+    # 이름 순으로 정렬된 두 목록(read_lines)을 한 번에 병합. 변경 내용을 (종류, 이전 행, 새 행)으로 차례로 반환
+    # 줄이 같으면 해석하지 않고 넘어감. 이름 변경을 찾기 위해 없어진 항목과 새 항목만 모아 둠 (변경된 양에 비례하는 메모리)
+    removed = []
+    added = []
+    old_iter = iter(old_lines)
+    new_iter = iter(new_lines)
+    old = next(old_iter, None)
+    new = next(new_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            removed.append(parse_line(old[1]))
+            old = next(old_iter, None)
+        elif old is None or new[0] < old[0]:
+            added.append(parse_line(new[1]))
+            new = next(new_iter, None)
+        else:
+            if old[1] != new[1]:
+                old_record = parse_line(old[1])
+                new_record = parse_line(new[1])
+                if (old_record['kind'], old_record['size'], old_record['mtime']) != \
+                        (new_record['kind'], new_record['size'], new_record['mtime']):
+                    yield 'modified', old_record, new_record
+                if old_record['status'] != new_record['status']:
+                    yield 'status', old_record, new_record
+            old = next(old_iter, None)
+            new = next(new_iter, None)
+
+    renamed = find_renames(removed, added)
+    removed_by_name = {record['name']: record for record in removed}
+    added_by_name = {record['name']: record for record in added}
+    for old_name, new_name in renamed:
+        yield 'renamed', removed_by_name.pop(old_name), added_by_name.pop(new_name)
+    for record in removed_by_name.values():
+        yield 'removed', record, None
+    for record in added_by_name.values():
+        yield 'added', None, record
+
+def diff_snapshot_files(old_path, new_path, on_change=None):
+    # 변경 종류별 개수를 반환하고 각 변경은 on_change로 전달
+    counts = {kind: 0 for kind in CHANGE_TEXT}
+    with metrics.timer("snapshot.diff"):
+        for kind, old, new in diff_records(read_lines(old_path), read_lines(new_path)):
+            counts[kind] += 1
+            if on_change:
+                on_change(kind, old, new)
+    for kind, count in counts.items():
+        metrics.increment(f"snapshot.{kind}", count)
+    return counts
+
+def describe(kind, old, new):
+    if kind == 'added':
+        return f"+ {new['name']} ({new['status']})"
+    if kind == 'removed':
+        return f"- {old['name']}"
+    if kind == 'renamed':
+        status = f" ({old['status']} -> {new['status']})" if old['status'] != new['status'] else ""
+        return f"> {old['name']} -> {new['name']}{status}"
+    if kind == 'status':
+        return f"! {new['name']} ({old['status']} -> {new['status']})"
+    return f"~ {new['name']}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="폴더 스캔 결과를 스냅샷으로 저장하고 두 스냅샷의 차이를 비교")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    save = commands.add_parser('save', help="현재 스캔 결과를 스냅샷으로 저장")
+    save.add_argument('path')
+    save.add_argument('--out', help="스냅샷 파일 (기본: ~/.giana/snapshots/...)")
+    save.add_argument('--hash', action='store_true', help="파일 앞/뒤 일부의 해시도 기록 (이름 변경 찾기에 사용)")
+
+    listing = commands.add_parser('list', help="폴더의 저장된 스냅샷 목록")
+    listing.add_argument('path')
+
+    diff = commands.add_parser('diff', help="두 스냅샷 비교. --path만 지정하면 그 폴더의 마지막 두 스냅샷을 비교")
+    diff.add_argument('old', nargs='?')
+    diff.add_argument('new', nargs='?')
+    diff.add_argument('--path')
+    diff.add_argument('--out', help="변경 내용을 JSON Lines로 저장")
+    args = parser.parse_args(argv)
+
+    if args.command == 'save':
+        file_path, count = save_snapshot(args.path, with_hash=args.hash, file_path=args.out)
+        print(f"{file_path}: {count}개 항목")
+    elif args.command == 'list':
+        for file_path in list_snapshots(args.path):
+            meta = read_meta(file_path)
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(meta['created_at']))
+            print(f"{created}  {file_path}")
+    else:
+        if args.path and not args.old:
+            snapshots = list_snapshots(args.path)
+            if len(snapshots) < 2:
+                parser.error("비교할 스냅샷이 두 개 이상 필요합니다.")
+            old_path, new_path = snapshots[-2:]
+        elif args.old and args.new:
+            old_path, new_path = args.old, args.new
+        else:
+            parser.error("비교할 두 스냅샷 파일 또는 --path를 지정해주세요.")
+
+        out = open(args.out, 'w', encoding='utf-8') if args.out else None
+        try:
+            def on_change(kind, old, new):
+                if out:
+                    out.write(json.dumps({'change': kind, 'old': old, 'new': new}, ensure_ascii=False) + "\n")
+                else:
+                    print(describe(kind, old, new))
+
+            counts = diff_snapshot_files(old_path, new_path, on_change)
+        finally:
+            if out:
+                out.close()
+        print(", ".join(f"{CHANGE_TEXT[kind]} {count}" for kind, count in counts.items()))
+
+if __name__ == "__main__":
+    main()
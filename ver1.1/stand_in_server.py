@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from http_replay import Cassette
+
+DLSITE_PAGE_PATTERN = re.compile(r'^/maniax/work/=/product_id/(RJ\d+)/')
+IMAGE_PATTERN = re.compile(r'^/img/(RJ\d+)\.png$')
+
+GENRES = ['アドベンチャー', 'ロールプレイング', 'シミュレーション', 'アクション', '音声作品', 'シューティング', 'ノベル', 'その他ゲーム']
+WRITE_CHUNK = 16 * 1024
+
+class RateLimiter:
+    # 토큰 버킷. rate가 None이면 제한 없음
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        # 잠금 밖에서 기다려 다른 요청이 차례를 예약할 수 있도록 함
+        if wait > 0:
+            time.sleep(wait)
+
+def make_png(width, height, color):
+    # 외부 라이브러리 없이 단색 PNG 생성
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    row = b'\x00' + bytes(color) * width
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * height))
+            + chunk(b'IEND', b''))
+
+def make_dlsite_page(product_id, base_url, page_bytes=0):
+    # parse_dlsite_page가 읽는 구조만 갖춘 가짜 작품 페이지. 같은 ID는 항상 같은 내용
+    rng = random.Random(product_id)
+    genres = rng.sample(GENRES, rng.randint(1, 3))
+    size = rng.randint(10, 4000)
+    version_up = '<div class="btn_ver_up">업데이트</div>' if rng.random() < 0.2 else ''
+    genre_links = "".join(f'<a href="#">{genre}</a>' for genre in genres)
+    html = f"""<!DOCTYPE html>
+<html><head>
+<meta property="og:image" content="{base_url}/img/{product_id}.png">
+<title>{product_id}</title>
+</head><body>
+<h1 itemprop="name" id="work_name">Stand-in Work {product_id}</h1>
+<span itemprop="brand" class="maker_name"><a href="#">Circle{rng.randint(1, 500)}</a></span>
+<table>
+<tr><th>판매일</th><td><a href="#">20{rng.randint(10, 24)}년 {rng.randint(1, 12):02d}월 {rng.randint(1, 28):02d}일</a></td></tr>
+<tr><th>장르</th><td>{genre_links}</td></tr>
+<tr><th>파일 용량</th><td><div class="main_genre">{size}MB</div></td></tr>
+</table>
+{version_up}
+"""
+    # 실제 페이지와 비슷한 크기가 되도록 주석으로 채움
+    padding = page_bytes - len(html.encode('utf-8'))
+    if padding > 0:
+        html += "<!--" + "x" * padding + "-->"
+    return (html + "</body></html>").encode('utf-8')
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cassette=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 max_rps=None, bandwidth=None, page_bytes=100 * 1024, seed=None):
+        super().__init__(address, StandInHandler)
+        self.cassette = cassette
+        self.latency = latency  # 초
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.request_limiter = RateLimiter(max_rps)
+        self.byte_limiter = RateLimiter(bandwidth, max(bandwidth or 0, WRITE_CHUNK))
+        self.page_bytes = page_bytes
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'not_found': 0, 'not_modified': 0, 'bytes': 0}
+        self.images = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name, value=1):
+        with self.stats_lock:
+            self.stats[name] += value
+
+    def draw(self):
+        with self.rng_lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            return delay, self.rng.random() < self.error_rate
+
+    def image(self, product_id):
+        if product_id not in self.images:
+            rng = random.Random(product_id)
+            self.images[product_id] = make_png(560, 420, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        return self.images[product_id]
+
+    def lookup(self, method, target, body):
+        # 기록된 응답을 먼저 찾고, 없으면 DLsite 작품 페이지와 이미지를 생성
+        if self.cassette is not None:
+            entry = self.cassette.find(method, target, body)
+            if entry is not None:
+                return entry['status'], entry['headers'], self.cassette.read_body(entry)
+        if method != 'GET':
+            return None
+        path = urlsplit(target).path
+        match = DLSITE_PAGE_PATTERN.match(path)
+        if match:
+            content = make_dlsite_page(match.group(1), self.base_url, self.page_bytes)
+            return 200, {'Content-Type': 'text/html; charset=utf-8'}, content
+        match = IMAGE_PATTERN.match(path)
+        if match:
+            return 200, {'Content-Type': 'image/png'}, self.image(match.group(1))
+        return None
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def respond(self, method):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        server.count('requests')
+        server.request_limiter.acquire()
+
+        delay, failed = server.draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            server.count('errors')
+            self.send_content(503, {'Content-Type': 'text/plain', 'Retry-After': '1'}, b'stand-in error')
+            return
+
+        result = server.lookup(method, self.path, body)
+        if result is None:
+            server.count('not_found')
+            self.send_content(404, {'Content-Type': 'text/plain'}, b'not found')
+            return
+        status, headers, content = result
+        if status == 200:
+            # 조건부 요청 확인용. 내용이 같으면 304로 응답
+            etag = '"' + hashlib.sha1(content).hexdigest()[:16] + '"'
+            headers = dict(headers, ETag=etag)
+            if self.headers.get('If-None-Match') == etag:
+                server.count('not_modified')
+                self.send_content(304, {'ETag': etag}, b'')
+                return
+        self.send_content(status, headers, content)
+
+    def send_content(self, status, headers, content):
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() not in ('content-length', 'connection', 'date', 'server'):
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        # 대역폭 제한은 모든 연결이 함께 사용
+        for offset in range(0, len(content), WRITE_CHUNK):
+            block = content[offset:offset + WRITE_CHUNK]
+            self.server.byte_limiter.acquire(len(block))
+            self.wfile.write(block)
+        self.server.count('bytes', len(content))
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(host='127.0.0.1', port=0, **options):
+    # 백그라운드 스레드에서 서버를 실행하고 서버 객체를 반환
+    server = StandInServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def add_server_arguments(parser):
+    parser.add_argument('--cassette', help="기록된 응답 폴더 (http_replay로 기록)")
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 지연 (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="지연 시간 변동폭 (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503 오류 응답 비율 (0~1)")
+    parser.add_argument('--max-rps', type=float, help="초당 최대 요청 수")
+    parser.add_argument('--bandwidth', type=float, help="전체 전송 속도 제한 (바이트/초)")
+    parser.add_argument('--page-bytes', type=int, default=100 * 1024, help="생성하는 작품 페이지 크기")
+    parser.add_argument('--seed', type=int, default=0)
+
+def server_options(args):
+    return {
+        'cassette': Cassette(args.cassette) if args.cassette else None,
+        'latency': args.latency / 1000,
+        'jitter': args.jitter / 1000,
+        'error_rate': args.error_rate,
+        'max_rps': args.max_rps,
+        'bandwidth': args.bandwidth,
+        'page_bytes': args.page_bytes,
+        'seed': args.seed
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="크롤러 테스트용 로컬 DLsite 대체 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = StandInServer((args.host, args.port), **server_options(args))
+    print(f"{server.base_url} 에서 실행 중 (GIANA_STAND_IN={server.base_url} 로 프로그램 실행)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.stats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from metrics import metrics
+
+FACETS = ('tag', 'platform', 'genre', 'creator')
+
+# Roaring 비트맵처럼 항목 번호의 상위 비트로 컨테이너를 나누고, 컨테이너 안은 정수 비트 연산으로 처리.
+# 항목이 적은 값(대부분의 제작자)은 몇 개의 작은 컨테이너만 가지므로 메모리와 연산이 적음
+CHUNK_BITS = 12
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# 바이트 값 -> 켜진 비트 위치
+BYTE_BITS = [[bit for bit in range(8) if value >> bit & 1] for value in range(256)]
+
+def make_bitmap(positions):
+    # 비트맵: 컨테이너 번호 -> 정수. 빈 컨테이너는 저장하지 않음
+    chunks = {}
+    for position in positions:
+        chunk = position >> CHUNK_BITS
+        chunks[chunk] = chunks.get(chunk, 0) | (1 << (position & CHUNK_MASK))
+    return chunks
+
+def full_bitmap(size):
+    chunks = {chunk: (1 << (1 << CHUNK_BITS)) - 1 for chunk in range(size >> CHUNK_BITS)}
+    if size & CHUNK_MASK:
+        chunks[size >> CHUNK_BITS] = (1 << (size & CHUNK_MASK)) - 1
+    return chunks
+
+def bitmap_and(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    result = {}
+    for chunk, bits in a.items():
+        other = b.get(chunk)
+        if other is not None:
+            bits &= other
+            if bits:
+                result[chunk] = bits
+    return result
+
+def bitmap_and_not(a, b):
+    result = {}
+    for chunk, bits in a.items():
+        other = b.get(chunk)
+        if other is not None:
+            bits &= ~other
+        if bits:
+            result[chunk] = bits
+    return result
+
+def bitmap_count(a):
+    return sum(bits.bit_count() for bits in a.values())
+
+def bitmap_and_count(a, b):
+    # bitmap_and 결과를 만들지 않고 개수만 계산
+    if len(a) > len(b):
+        a, b = b, a
+    count = 0
+    for chunk, bits in a.items():
+        other = b.get(chunk)
+        if other is not None:
+            count += (bits & other).bit_count()
+    return count
+
+def bitmap_positions(a, limit=None):
+    positions = []
+    for chunk in sorted(a):
+        bits = a[chunk]
+        base = chunk << CHUNK_BITS
+        for index, value in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')):
+            if value:
+                positions.extend(base + (index << 3) + bit for bit in BYTE_BITS[value])
+        if limit is not None and len(positions) >= limit:
+            return positions[:limit]
+    return positions
+
+class TagIndex:
+    # 항목 번호를 비트 위치로 하는 비트맵을 태그/플랫폼/장르/제작자 값마다 만들어 두고 AND/NOT 조합과 개수를 계산
+    def __init__(self, names):
+        self.names = list(names)
+        self.all = full_bitmap(len(self.names))
+        self.bitmaps = {facet: {} for facet in FACETS}
+        self.tagged = {}  # 조회한 태그가 있는 항목
+
+    @classmethod
+    def build(cls, name_infos, item_tags):
+        # item_tags: (플랫폼, 고유 ID) -> 태그 목록 (MetadataCache.load_tags)
+        with metrics.timer("tag_index.build"):
+            index = cls(name_infos)
+            postings = {facet: {} for facet in FACETS}
+            tagged = []
+            for position, name in enumerate(index.names):
+                is_valid, info = name_infos[name]
+                if not is_valid:
+                    continue
+                for facet in ('platform', 'genre', 'creator'):
+                    postings[facet].setdefault(info[facet], []).append(position)
+                tags = item_tags.get((info['platform'], info['unique_id']))
+                if tags:
+                    tagged.append(position)
+                    for tag in tags:
+                        postings['tag'].setdefault(tag, []).append(position)
+
+            for facet, values in postings.items():
+                index.bitmaps[facet] = {value: make_bitmap(positions) for value, positions in values.items()}
+            index.tagged = make_bitmap(tagged)
+        metrics.increment("tag_index.tags", len(index.bitmaps['tag']))
+        return index
+
+    def query(self, include=(), exclude=(), filters=None, limit=100, facets=FACETS):
+        # include의 태그를 모두 가지고 exclude의 태그는 없으며 filters({facet: 값})가 일치하는 항목
+        with metrics.timer("tag_index.query"):
+            result = self.all
+            for tag in include:
+                result = bitmap_and(result, self.bitmaps['tag'].get(tag, {}))
+            for facet, value in (filters or {}).items():
+                result = bitmap_and(result, self.bitmaps[facet].get(value, {}))
+            for tag in exclude:
+                result = bitmap_and_not(result, self.bitmaps['tag'].get(tag, {}))
+
+            # 결과 안에서 각 값의 항목 수 (다음 조건을 고를 때 표시)
+            facet_counts = {}
+            for facet in facets:
+                counts = {}
+                for value, bitmap in self.bitmaps[facet].items():
+                    count = bitmap_and_count(bitmap, result)
+                    if count:
+                        counts[value] = count
+                facet_counts[facet] = counts
+            return {
+                'count': bitmap_count(result),
+                'tagged': bitmap_and_count(self.tagged, result),
+                'names': [self.names[position] for position in bitmap_positions(result, limit)],
+                'facets': facet_counts
+            }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 프로그램 모듈은 패키지가 아니라 ver1.1 폴더에서 바로 import함
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
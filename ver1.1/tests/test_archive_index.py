@@ -0,0 +1,289 @@
+import io
+import lzma
+import struct
+from zlib import crc32
+
+import pytest
+
+from archive_index import (ArchiveError, CountingFile, inspect_7z, inspect_rar, inspect_archive,
+                           SEVENZIP_SIGNATURE, SEVENZIP_AES, SEVENZIP_LZMA2, RAR4_SIGNATURE, RAR5_SIGNATURE)
+
+# 테스트용 압축 파일은 형식 문서에 따라 헤더만 바이트 단위로 만듦. 압축 데이터는 읽지 않으므로 임의의 바이트
+
+def archive_file(data):
+    return CountingFile(io.BytesIO(data))
+
+# 7z
+
+def sevenzip_number(value):
+    # 첫 바이트의 앞쪽 1 비트 수가 뒤따르는 바이트 수
+    for extra in range(8):
+        if value < 1 << (7 * (extra + 1)):
+            first = (0xFF00 >> extra) & 0xFF | value >> (8 * extra)
+            return bytes([first]) + (value & ((1 << (8 * extra)) - 1)).to_bytes(extra, 'little')
+    return b'\xff' + value.to_bytes(8, 'little')
+
+N = sevenzip_number
+
+def sevenzip_bits(flags):
+    data = bytearray()
+    for i in range(0, len(flags), 8):
+        byte = 0
+        for j, flag in enumerate(flags[i:i + 8]):
+            if flag:
+                byte |= 0x80 >> j
+        data.append(byte)
+    return bytes(data)
+
+def sevenzip_folder(coders, bind_pairs=()):
+    # coders: [(코더 ID, 속성)], 모두 입력 1개/출력 1개
+    data = N(len(coders))
+    for coder_id, props in coders:
+        data += bytes([len(coder_id) | (0x20 if props else 0)]) + coder_id
+        if props:
+            data += N(len(props)) + props
+    for in_index, out_index in bind_pairs:
+        data += N(in_index) + N(out_index)
+    return data
+
+def sevenzip_streams(pack_sizes, folders, unpack_sizes, substreams=b'', pack_pos=0):
+    data = N(0x06) + N(pack_pos) + N(len(pack_sizes)) + N(0x09) + b''.join(map(N, pack_sizes)) + N(0x00)
+    data += N(0x07) + N(0x0B) + N(len(folders)) + b'\x00' + b''.join(folders)
+    data += N(0x0C) + b''.join(map(N, unpack_sizes)) + N(0x00)
+    return data + substreams + N(0x00)
+
+def sevenzip_files(files):
+    # files: [(이름, 'file' | 'empty' | 'dir')]
+    data = N(0x05) + N(len(files))
+    empty_stream = [kind != 'file' for _, kind in files]
+    if any(empty_stream):
+        bits = sevenzip_bits(empty_stream)
+        data += N(0x0E) + N(len(bits)) + bits
+        bits = sevenzip_bits([kind == 'empty' for _, kind in files if kind != 'file'])
+        data += N(0x0F) + N(len(bits)) + bits
+    names = b'\x00' + "".join(name + '\0' for name, _ in files).encode('utf-16-le')
+    data += N(0x11) + N(len(names)) + names
+    return data + N(0x00)
+
+def sevenzip_archive(header, packed=b''):
+    tail = struct.pack('<QQI', len(packed), len(header), crc32(header))
+    return SEVENZIP_SIGNATURE + b'\x00\x04' + struct.pack('<I', crc32(tail)) + tail + packed + header
+
+LZMA2_CODER = (SEVENZIP_LZMA2, b'\x10')
+AES_CODER = (SEVENZIP_AES, b'\x00\x00')
+
+# LZMA2 폴더 하나에 파일 두 개, 빈 파일과 폴더가 하나씩 있는 헤더
+PLAIN_HEADER = (
+    N(0x01) + N(0x04)
+    + sevenzip_streams(
+        [10], [sevenzip_folder([LZMA2_CODER])], [12],
+        substreams=N(0x08) + N(0x0D) + N(2) + N(0x09) + N(5) + N(0x0A) + b'\x01' + b'\0' * 8 + N(0x00))
+    + sevenzip_files([('a.txt', 'file'), ('dir/b.txt', 'file'), ('empty.txt', 'empty'), ('dir', 'dir')])
+    + N(0x00))
+
+def test_7z_lists_members_and_sizes():
+    result = inspect_7z(archive_file(sevenzip_archive(PLAIN_HEADER, b'\0' * 10)))
+    assert result['members'] == ['a.txt', 'dir/b.txt', 'empty.txt']
+    assert result['member_sizes'] == [5, 7, 0]
+    assert result['member_count'] == 3
+    assert result['total_size'] == 12
+    assert not result['encrypted']
+    assert not result['header_encrypted']
+
+def test_7z_reads_lzma_compressed_header():
+    compressed = lzma.compress(PLAIN_HEADER, format=lzma.FORMAT_RAW,
+                               filters=[{'id': lzma.FILTER_LZMA2, 'dict_size': 1 << 20}])
+    header = N(0x17) + sevenzip_streams(
+        [len(compressed)], [sevenzip_folder([LZMA2_CODER])], [len(PLAIN_HEADER)], pack_pos=10)
+    result = inspect_7z(archive_file(sevenzip_archive(header, b'\0' * 10 + compressed)))
+    assert result['members'] == ['a.txt', 'dir/b.txt', 'empty.txt']
+    assert result['member_sizes'] == [5, 7, 0]
+
+def test_7z_encrypted_content_uses_unbound_output_size():
+    # LZMA2 <- AES: AES의 출력(1)은 LZMA2의 입력(0)에 연결되고 LZMA2의 출력(0)이 파일 크기
+    header = (N(0x01) + N(0x04)
+              + sevenzip_streams([16], [sevenzip_folder([LZMA2_CODER, AES_CODER], [(0, 1)])], [5, 16])
+              + sevenzip_files([('secret.txt', 'file')])
+              + N(0x00))
+    result = inspect_7z(archive_file(sevenzip_archive(header, b'\0' * 16)))
+    assert result['members'] == ['secret.txt']
+    assert result['member_sizes'] == [5]
+    assert result['encrypted']
+    assert not result['header_encrypted']
+
+def test_7z_encrypted_header():
+    header = N(0x17) + sevenzip_streams(
+        [32], [sevenzip_folder([LZMA2_CODER, AES_CODER], [(0, 1)])], [100, 32])
+    result = inspect_7z(archive_file(sevenzip_archive(header, b'\0' * 32)))
+    assert result['header_encrypted']
+    assert result['encrypted']
+    assert result['members'] == []
+    assert result['member_count'] is None
+    assert result['total_size'] is None
+
+def test_7z_empty_archive():
+    result = inspect_7z(archive_file(sevenzip_archive(b'')))
+    assert result['members'] == []
+    assert result['member_count'] == 0
+
+def test_7z_rejects_other_signature():
+    with pytest.raises(ArchiveError):
+        inspect_7z(archive_file(b'PK\x03\x04' + b'\0' * 40))
+
+@pytest.mark.parametrize('length', range(1, len(sevenzip_archive(PLAIN_HEADER, b'\0' * 10))))
+def test_7z_truncated_file(length):
+    data = sevenzip_archive(PLAIN_HEADER, b'\0' * 10)
+    with pytest.raises(ArchiveError):
+        inspect_7z(archive_file(data[:length]))
+
+@pytest.mark.parametrize('length', range(1, len(PLAIN_HEADER)))
+def test_7z_truncated_header(length):
+    # 시그니처 헤더의 크기도 잘린 헤더에 맞춘 경우
+    with pytest.raises(ArchiveError):
+        inspect_7z(archive_file(sevenzip_archive(PLAIN_HEADER[:length], b'\0' * 10)))
+
+def test_inspect_archive_reads_only_headers(tmp_path):
+    path = tmp_path / 'large.7z'
+    path.write_bytes(sevenzip_archive(PLAIN_HEADER, b'\0' * (1 << 20)))
+    result = inspect_archive(str(path))
+    assert result['members'] == ['a.txt', 'dir/b.txt', 'empty.txt']
+    assert result['bytes_read'] < 1024
+
+# RAR5
+
+def vint(value):
+    data = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if not value:
+            data.append(byte)
+            return bytes(data)
+        data.append(byte | 0x80)
+
+def rar5_block(header_type, fields=b'', extra=b'', data=b''):
+    flags = (0x01 if extra else 0) | (0x02 if data else 0)
+    body = vint(header_type) + vint(flags)
+    if extra:
+        body += vint(len(extra))
+    if data:
+        body += vint(len(data))
+    body += fields + extra
+    size = vint(len(body))
+    return struct.pack('<I', crc32(size + body)) + size + body + data
+
+def rar5_file(name, size, data=b'', directory=False, mtime=None, crc=None, extra=b'', header_type=2):
+    file_flags = (0x01 if directory else 0) | (0x02 if mtime is not None else 0) | (0x04 if crc is not None else 0)
+    fields = vint(file_flags) + vint(size) + vint(0x20)
+    if mtime is not None:
+        fields += struct.pack('<I', mtime)
+    if crc is not None:
+        fields += struct.pack('<I', crc)
+    name = name.encode('utf-8')
+    fields += vint(0) + vint(0) + vint(len(name)) + name
+    return rar5_block(header_type, fields, extra, data)
+
+def rar5_record(record_type, data):
+    body = vint(record_type) + data
+    return vint(len(body)) + body
+
+RAR5_MAIN = rar5_block(1, vint(0))
+RAR5_END = rar5_block(5, vint(0))
+RAR5_FIRST_FILE = rar5_file('a.txt', 300, b'\1' * 10)
+
+def test_rar5_lists_members_and_sizes():
+    data = (RAR5_SIGNATURE + RAR5_MAIN + RAR5_FIRST_FILE
+            + rar5_file('sub', 0, directory=True)
+            + rar5_file('sub/日本語.txt', 70000, b'\2' * 20, mtime=0x5F000000, crc=0x12345678)
+            + rar5_file('CMT', 5, b'\3' * 5, header_type=3)  # 주석 같은 서비스 헤더는 건너뜀
+            + RAR5_END)
+    result = inspect_rar(archive_file(data))
+    assert result['members'] == ['a.txt', 'sub/日本語.txt']
+    assert result['member_sizes'] == [300, 70000]
+    assert result['total_size'] == 70300
+    assert not result['encrypted']
+    assert not result['header_encrypted']
+
+def test_rar5_encrypted_file():
+    encryption = rar5_record(0x01, vint(0) + vint(0) + bytes([15]) + b'\0' * 32)
+    data = (RAR5_SIGNATURE + RAR5_MAIN
+            + rar5_file('secret.txt', 42, b'\0' * 48, extra=encryption)
+            + RAR5_END)
+    result = inspect_rar(archive_file(data))
+    assert result['members'] == ['secret.txt']
+    assert result['member_sizes'] == [42]
+    assert result['encrypted']
+
+def test_rar5_encrypted_header():
+    data = RAR5_SIGNATURE + rar5_block(4, vint(0) + vint(0) + bytes([15]) + b'\0' * 16) + b'\0' * 64
+    result = inspect_rar(archive_file(data))
+    assert result['header_encrypted']
+    assert result['members'] == []
+    assert result['member_count'] is None
+
+@pytest.mark.parametrize('cut', range(1, len(RAR5_FIRST_FILE) - 10))
+def test_rar5_truncated_header(cut):
+    data = RAR5_SIGNATURE + RAR5_MAIN + RAR5_FIRST_FILE
+    with pytest.raises(ArchiveError):
+        inspect_rar(archive_file(data[:len(RAR5_SIGNATURE + RAR5_MAIN) + cut]))
+
+# RAR4
+
+def rar4_block(header_type, flags, fields=b'', data=b''):
+    body = struct.pack('<BHH', header_type, flags, 7 + len(fields)) + fields
+    return struct.pack('<H', crc32(body) & 0xFFFF) + body + data
+
+def rar4_file(name, size, data=b'', flags=0):
+    # 파일 헤더: 압축/원본 크기, OS, CRC, 시각, 버전, 방식, 이름 길이, 속성 [, 상위 32비트 크기], 이름
+    flags |= 0x8000
+    fields = struct.pack('<IIBIIBBHI', len(data) & 0xFFFFFFFF, size & 0xFFFFFFFF, 2, 0, 0, 29, 0x33, len(name), 0x20)
+    if size >> 32:
+        flags |= 0x100
+        fields += struct.pack('<II', len(data) >> 32, size >> 32)
+    return rar4_block(0x74, flags, fields + name, data)
+
+RAR4_MAIN = rar4_block(0x73, 0, b'\0' * 6)
+RAR4_END = rar4_block(0x7B, 0x4000)
+RAR4_FIRST_FILE = rar4_file(b'a.txt', 300, b'\1' * 10)
+
+def test_rar4_lists_members_and_sizes():
+    data = (RAR4_SIGNATURE + RAR4_MAIN + RAR4_FIRST_FILE
+            + rar4_file(b'sub', 0, flags=0xE0)
+            # 유니코드 이름 플래그: 0 뒤의 인코딩된 이름 대신 앞부분을 사용
+            + rar4_file(b'sub\\b.txt\0\x01\x02', 7, b'\2' * 3, flags=0x200)
+            # 0이 없으면 UTF-8 이름
+            + rar4_file('日本語.txt'.encode('utf-8'), 9, b'\3' * 4, flags=0x200)
+            + rar4_file(b'large.bin', 5 << 30, b'\4' * 4)
+            + RAR4_END)
+    result = inspect_rar(archive_file(data))
+    assert result['members'] == ['a.txt', 'sub\\b.txt', '日本語.txt', 'large.bin']
+    assert result['member_sizes'] == [300, 7, 9, 5 << 30]
+    assert not result['encrypted']
+    assert not result['header_encrypted']
+
+def test_rar4_encrypted_file():
+    data = RAR4_SIGNATURE + RAR4_MAIN + rar4_file(b'secret.txt', 42, b'\0' * 48, flags=0x04) + RAR4_END
+    result = inspect_rar(archive_file(data))
+    assert result['members'] == ['secret.txt']
+    assert result['encrypted']
+
+def test_rar4_encrypted_header():
+    data = RAR4_SIGNATURE + rar4_block(0x73, 0x80, b'\0' * 6) + b'\0' * 64
+    result = inspect_rar(archive_file(data))
+    assert result['header_encrypted']
+    assert result['member_count'] is None
+
+def test_rar4_rejects_short_header_size():
+    data = RAR4_SIGNATURE + struct.pack('<HBHH', 0, 0x74, 0x8000, 5) + b'\0' * 32
+    with pytest.raises(ArchiveError):
+        inspect_rar(archive_file(data))
+
+@pytest.mark.parametrize('cut', range(1, len(RAR4_FIRST_FILE) - 10))
+def test_rar4_truncated_header(cut):
+    data = RAR4_SIGNATURE + RAR4_MAIN + RAR4_FIRST_FILE
+    with pytest.raises(ArchiveError):
+        inspect_rar(archive_file(data[:len(RAR4_SIGNATURE + RAR4_MAIN) + cut]))
+
+def test_rar_rejects_other_signature():
+    with pytest.raises(ArchiveError):
+        inspect_rar(archive_file(b'7z\xbc\xaf\x27\x1c' + b'\0' * 40))
@@ -0,0 +1,67 @@
+import json
+import os
+
+import dupe_resolver
+from dupe_resolver import LOG_NAME, move_duplicates
+
+def cross_device(monkeypatch, quarantine):
+    # 격리 폴더가 다른 장치에 있는 것처럼 st_dev를 바꿔 복사 경로를 사용하게 함
+    real_stat = os.stat
+
+    def stat(path, *args, **kwargs):
+        result = real_stat(path, *args, **kwargs)
+        if os.fspath(path) == quarantine:
+            values = list(result[:10])
+            values[2] += 1
+            return os.stat_result(values)
+        return result
+    monkeypatch.setattr(dupe_resolver.os, 'stat', stat)
+
+def make_plan(path, name):
+    return [{'unique_id': 'RJ100001', 'keep': 'keep.zip', 'move': [name],
+             'sizes': {name: os.path.getsize(os.path.join(path, name))}}]
+
+def test_source_cleanup_failure_is_logged_and_reported(tmp_path, monkeypatch):
+    source = tmp_path / 'library'
+    source.mkdir()
+    (source / 'dupe.zip').write_bytes(b'x' * 100)
+    quarantine = str(tmp_path / 'quarantine')
+    os.makedirs(quarantine)
+    cross_device(monkeypatch, quarantine)
+
+    real_remove = dupe_resolver.remove_path
+
+    def remove_path(path):
+        if path == str(source / 'dupe.zip'):
+            raise PermissionError("locked")
+        real_remove(path)
+    monkeypatch.setattr(dupe_resolver, 'remove_path', remove_path)
+
+    result = move_duplicates(str(source), make_plan(str(source), 'dupe.zip'), quarantine)
+    destination = os.path.join(quarantine, 'dupe.zip')
+    assert result['failed'] == []
+    assert result['moved'] == []
+    assert [(name, dst) for name, dst, _ in result['incomplete']] == [('dupe.zip', destination)]
+    assert result['remaining'] == 0
+    assert os.path.getsize(destination) == 100
+
+    with open(os.path.join(quarantine, LOG_NAME), encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 1
+    assert records[0]['destination'] == destination
+    assert records[0]['source_removed'] is False
+
+def test_cross_device_move_logs_and_removes_source(tmp_path, monkeypatch):
+    source = tmp_path / 'library'
+    (source / 'dupe').mkdir(parents=True)
+    (source / 'dupe' / 'game.exe').write_bytes(b'y' * 50)
+    quarantine = str(tmp_path / 'quarantine')
+    os.makedirs(quarantine)
+    cross_device(monkeypatch, quarantine)
+
+    plan = [{'unique_id': 'RJ100001', 'keep': 'keep', 'move': ['dupe'], 'sizes': {'dupe': 50}}]
+    result = move_duplicates(str(source), plan, quarantine)
+    assert result['moved'] == [('dupe', os.path.join(quarantine, 'dupe'))]
+    assert result['incomplete'] == []
+    assert not os.path.exists(source / 'dupe')
+    assert (tmp_path / 'quarantine' / 'dupe' / 'game.exe').read_bytes() == b'y' * 50
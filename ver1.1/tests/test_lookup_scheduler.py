@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+
+# metadata_providers가 bs4를 사용함
+pytest.importorskip('bs4')
+
+from lookup_scheduler import LookupScheduler
+from metrics import metrics
+
+
+class BlockingProvider:
+    # 테스트에서 풀어 줄 때까지 조회를 멈춰 두는 제공자
+    batch_size = 10
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def fetch_many(self, unique_ids):
+        self.started.set()
+        self.release.wait(5)
+        return {unique_id: {'Title': unique_id} for unique_id in unique_ids}
+
+
+def start(provider):
+    return LookupScheduler(lambda platform: provider)
+
+
+def wait_idle(scheduler, platform='DLsite'):
+    worker = scheduler.workers.get(platform)
+    if worker is not None:
+        worker.join(5)
+        assert not worker.is_alive()
+
+
+def test_callback_error_does_not_stop_other_deliveries():
+    # 한 곳의 callback이 예외를 내도 같은 조회를 기다리는 다른 곳과 다음 조회에 결과가 전달됨
+    provider = BlockingProvider()
+    provider.release.set()
+    scheduler = start(provider)
+    received = []
+
+    def broken(key, info):
+        raise RuntimeError("closed window")
+
+    before = metrics.snapshot()['counters'].get("lookup.callback_errors", 0)
+    scheduler.submit('DLsite', 'RJ100001', object(), broken)
+    scheduler.submit('DLsite', 'RJ100001', object(), lambda key, info: received.append(key))
+    scheduler.submit('DLsite', 'RJ100002', object(), lambda key, info: received.append(key))
+    wait_idle(scheduler)
+
+    assert sorted(received) == [('DLsite', 'RJ100001'), ('DLsite', 'RJ100002')]
+    assert metrics.snapshot()['counters']["lookup.callback_errors"] == before + 1
+
+
+def test_cancel_during_fetch_drops_results():
+    # 조회 중에 취소한 곳에는 결과를 전달하지 않고, 남은 곳에는 전달함
+    provider = BlockingProvider()
+    scheduler = start(provider)
+    cancelled, kept = object(), object()
+    received = []
+    scheduler.submit('DLsite', 'RJ100001', cancelled, lambda key, info: received.append('cancelled'))
+    scheduler.submit('DLsite', 'RJ100001', kept, lambda key, info: received.append('kept'))
+    assert provider.started.wait(5)
+
+    scheduler.cancel(cancelled)
+    provider.release.set()
+    wait_idle(scheduler)
+
+    assert received == ['kept']
+
+
+def test_cancel_waits_for_running_callback():
+    # 전달 중인 callback이 끝나야 cancel이 반환되고, 그 뒤에는 같은 곳에 다시 전달하지 않음
+    provider = BlockingProvider()
+    provider.release.set()
+    scheduler = start(provider)
+    owner = object()
+    entered, finish = threading.Event(), threading.Event()
+    calls = []
+
+    def slow(key, info):
+        calls.append(key)
+        entered.set()
+        finish.wait(5)
+
+    scheduler.submit('DLsite', 'RJ100001', owner, slow)
+    scheduler.submit('DLsite', 'RJ100002', owner, slow)
+    assert entered.wait(5)
+
+    returned = threading.Event()
+    canceller = threading.Thread(target=lambda: (scheduler.cancel(owner), returned.set()))
+    canceller.start()
+    assert not returned.wait(0.2)
+    finish.set()
+    canceller.join(5)
+    wait_idle(scheduler)
+
+    assert returned.is_set()
+    assert calls == [('DLsite', 'RJ100001')]
+
+
+def test_cancel_from_own_callback_does_not_block():
+    # callback 안에서 자기 요청을 취소해도 작업 스레드가 멈추지 않음
+    provider = BlockingProvider()
+    provider.release.set()
+    scheduler = start(provider)
+    owner = object()
+    calls = []
+
+    def cancel_self(key, info):
+        calls.append(key)
+        scheduler.cancel(owner)
+
+    scheduler.submit('DLsite', 'RJ100001', owner, cancel_self)
+    scheduler.submit('DLsite', 'RJ100002', owner, cancel_self)
+    wait_idle(scheduler)
+
+    assert calls == [('DLsite', 'RJ100001')]
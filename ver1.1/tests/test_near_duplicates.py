@@ -0,0 +1,24 @@
+import pytest
+
+from near_duplicates import find_near_duplicates
+from utils import validate_name
+
+A1 = "[Circle]-[RJ100001] Summer Memories Island (RPG)_DLsite"
+A2 = "[Circle]-[RJ100001] Summer Memories Island Plus (RPG)_DLsite"
+F = "[Brand]-[d_12345] Summer Memories Island Plus (RPG)_Fanza"
+
+def group_items(names):
+    groups = find_near_duplicates({name: validate_name(name) for name in names}, use_numpy=False)
+    return [set(group['items']) for group in groups]
+
+@pytest.mark.parametrize('names', [[A1, A2, F], [A1, F, A2], [F, A2, A1], [A2, A1, F]])
+def test_grouping_does_not_depend_on_scan_order(names):
+    # A1과 A2는 같은 ID라 서로 연결되지 않지만 F를 통해 한 그룹이 되어야 함
+    assert group_items(names) == [{A1, A2, F}]
+
+# A2와 정규화한 제목이 같고 ID도 같은 항목 (공백만 다름)
+A2_COPY = "[Circle]-[RJ100001] Summer Memories Island  Plus (RPG)_DLsite"
+
+@pytest.mark.parametrize('names', [[A2, A2_COPY, F], [F, A2, A2_COPY], [A2_COPY, F, A2]])
+def test_same_title_members_sharing_an_id_join_the_group(names):
+    assert group_items(names) == [{A2, A2_COPY, F}]
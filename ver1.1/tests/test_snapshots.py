@@ -0,0 +1,21 @@
+import os
+
+import snapshots
+
+
+def test_same_second_saves_keep_both_snapshots(tmp_path, monkeypatch):
+    # 같은 순간에 두 번 저장해도 앞의 스냅샷을 덮어쓰지 않고, 목록에서는 저장한 순서대로 나옴
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    monkeypatch.setattr(snapshots.time, 'time_ns', lambda: 1_700_000_000_123_456_789)
+    library = tmp_path / 'library'
+    library.mkdir()
+    (library / '[Circle]-[RJ100001] Summer Memories (RPG)_DLsite.zip').write_bytes(b'data')
+
+    first, count = snapshots.save_snapshot(str(library), ['.zip'])
+    second, _ = snapshots.save_snapshot(str(library), ['.zip'])
+
+    assert count == 1
+
+    assert first != second
+    assert snapshots.list_snapshots(str(library)) == [first, second]
+    assert os.path.basename(first).endswith('_123456789.snap.gz')
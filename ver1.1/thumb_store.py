@@ -0,0 +1,131 @@
+import io
+import os
+import sqlite3
+import threading
+
+from PIL import Image
+
+from constants import CACHE_DIR
+from metrics import metrics
+
+THUMB_SIZE = (160, 160)
+JPEG_QUALITY = 85
+COMMIT_INTERVAL = 50
+
+def make_thumbnail(data, size=THUMB_SIZE):
+    # 원본 이미지를 목록용 크기로 줄여 JPEG로 저장할 바이트와 크기를 반환
+    with metrics.timer("image.decode"):
+        image = Image.open(io.BytesIO(data))
+        # JPEG는 디코딩할 때 축소하면 전체 해상도로 풀지 않아도 됨
+        image.draft('RGB', (size[0] * 2, size[1] * 2))
+        image = image.convert('RGB')
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=JPEG_QUALITY)
+    return output.getvalue(), image.width, image.height
+
+def decode_thumbnail(data):
+    with metrics.timer("thumbnail.decode"):
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    return image
+
+class ThumbnailStore:
+    # 축소한 이미지를 하나의 파일에 이어 붙여 저장하고 위치는 SQLite 색인으로 관리
+    def __init__(self, store_dir=None):
+        store_dir = store_dir or os.path.join(CACHE_DIR, 'thumbnails')
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.pack_path = os.path.join(store_dir, 'thumbs.pack')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(store_dir, 'thumbs.db'), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                key TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL
+            )
+        """)
+        self.pack = open(self.pack_path, 'a+b')
+        self.pack.seek(0, os.SEEK_END)
+        pack_size = self.pack.tell()
+
+        # 색인은 작아서 모두 메모리에 올려둠. 기록 도중 종료되어 파일에 없는 항목은 무시
+        self.entries = {}
+        for key, offset, length, width, height in self.conn.execute(
+                "SELECT key, offset, length, width, height FROM thumbnails"):
+            if offset + length <= pack_size:
+                self.entries[key] = (offset, length, width, height)
+        self.pending = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        offset, length, _, _ = entry
+        with self.lock:
+            self.pack.seek(offset)
+            data = self.pack.read(length)
+        metrics.increment("thumbnail.store.hits")
+        return data
+
+    def put(self, key, data, width, height):
+        with self.lock:
+            self.pack.seek(0, os.SEEK_END)
+            offset = self.pack.tell()
+            self.pack.write(data)
+            # 색인보다 데이터가 먼저 파일에 기록되도록 함
+            self.pack.flush()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (key, offset, length, width, height) VALUES (?, ?, ?, ?, ?)",
+                (key, offset, len(data), width, height))
+            self.entries[key] = (offset, len(data), width, height)
+            self.pending += 1
+            if self.pending >= COMMIT_INTERVAL:
+                self.conn.commit()
+                self.pending = 0
+        metrics.increment("thumbnail.store.writes")
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+            self.pack.close()
+
+# 같은 파일을 여러 인스턴스가 열면 커밋하지 않은 쓰기 트랜잭션과 팩 파일의 쓰기 위치가 서로 충돌하므로
+# 갤러리 창마다 새로 열지 않고 경로별로 하나의 저장소를 공유함
+_stores = {}  # 경로 -> [저장소, 사용 중인 수]
+_stores_lock = threading.Lock()
+
+def open_store(store_dir=None):
+    store_dir = os.path.abspath(store_dir or os.path.join(CACHE_DIR, 'thumbnails'))
+    with _stores_lock:
+        entry = _stores.get(store_dir)
+        if entry is None:
+            entry = _stores[store_dir] = [ThumbnailStore(store_dir), 0]
+        entry[1] += 1
+        return entry[0]
+
+def release_store(store):
+    # 마지막 사용자가 반환하면 닫음. 그 전에는 기록한 내용만 커밋
+    with _stores_lock:
+        entry = _stores.get(store.store_dir)
+        if entry is None or entry[0] is not store:
+            store.close()
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            store.commit()
+            return
+        del _stores[store.store_dir]
+        store.close()
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+from constants import CACHE_DIR, DEFAULT_EXTENSIONS
+from http_replay import configure_from_env
+from metadata_cache import MetadataCache, has_update
+from metadata_providers import get_provider
+from metrics import metrics
+from utils import scan_items, validate_name
+
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+COMMIT_INTERVAL = 50
+
+def dlsite_items(name_infos):
+    # 고유 ID -> 이름 목록. 같은 작품이 여러 항목에 있어도 한 번만 확인
+    items = {}
+    for name, (is_valid, info) in name_infos.items():
+        if is_valid and info['platform'] == 'DLsite':
+            items.setdefault(info['unique_id'], []).append(name)
+    return items
+
+class UpdateChecker:
+    def __init__(self, name_infos, cache, provider=None, max_age=DEFAULT_MAX_AGE,
+                 limit=None, time_budget=None, progress=None, stop=None):
+        self.items = dlsite_items(name_infos)
+        self.cache = cache
+        self.provider = provider or get_provider('DLsite')
+        self.max_age = max_age  # 이 시간(초) 안에 확인한 항목은 건너뜀
+        self.limit = limit
+        self.time_budget = time_budget
+        self.progress = progress  # progress(완료 수, 전체 수)
+        self.stop = stop or threading.Event()
+
+    def due_items(self, rows, now):
+        # 한 번에 다 확인하지 못하는 큰 라이브러리는 여러 번 실행하며 오래된 것부터 확인
+        due = [unique_id for unique_id in self.items
+               if unique_id not in rows or now - rows[unique_id]['checked_at'] >= self.max_age]
+        due.sort(key=lambda unique_id: rows[unique_id]['checked_at'] if unique_id in rows else 0)
+        return due[:self.limit] if self.limit else due
+
+    def check_one(self, unique_id, row, now):
+        result = self.provider.fetch_conditional(unique_id, row and row['etag'], row and row['last_modified'])
+        if result is None:
+            return 'error', False
+        status, info, (etag, last_modified) = result
+        if status == 'not_modified':
+            row = dict(row, checked_at=now, etag=etag, last_modified=last_modified)
+            self.cache.put('DLsite', unique_id, row)
+            return status, False
+
+        previous = row['info'] if row else None
+        update_seen_at = row['update_seen_at'] if row else None
+        is_new = False
+        if has_update(info):
+            # 처음 업데이트 표시가 생겼거나 표시된 상태에서 작품 정보가 바뀐 경우 새 업데이트로 봄
+            if row is not None and (not has_update(previous) or info != previous):
+                is_new = True
+            if is_new or update_seen_at is None:
+                update_seen_at = now
+        else:
+            update_seen_at = None
+        self.cache.put('DLsite', unique_id, {
+            'etag': etag,
+            'last_modified': last_modified,
+            'info': info,
+            'checked_at': now,
+            'update_seen_at': update_seen_at
+        })
+        return status, is_new
+
+    def run(self):
+        started = time.time()
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        rows = self.cache.load('DLsite', self.items)
+        due = self.due_items(rows, started)
+        counts = {'modified': 0, 'not_modified': 0, 'error': 0}
+        new_updates = set()
+
+        with metrics.timer("update_check"):
+            for done, unique_id in enumerate(due, 1):
+                if self.stop.is_set() or (deadline and time.monotonic() > deadline):
+                    break
+                status, is_new = self.check_one(unique_id, rows.get(unique_id), time.time())
+                counts[status] += 1
+                if is_new:
+                    new_updates.add(unique_id)
+                if done % COMMIT_INTERVAL == 0:
+                    self.cache.commit()
+                if self.progress:
+                    self.progress(done, len(due))
+        self.cache.commit()
+        for status, count in counts.items():
+            metrics.increment(f"update_check.{status}", count)
+
+        checked = sum(counts.values())
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(started)),
+            'items': len(self.items),
+            'due': len(due),
+            'checked': checked,
+            'remaining': len(due) - checked,
+            **counts,
+            'updates': self.report(new_updates)
+        }
+
+    def report(self, new_updates):
+        # 이번에 확인하지 않은 항목도 캐시에 업데이트 표시가 있으면 보고서에 포함
+        updates = []
+        for unique_id, row in self.cache.load('DLsite', self.items).items():
+            if not has_update(row['info']):
+                continue
+            updates.append({
+                'unique_id': unique_id,
+                'title': row['info']['Title'],
+                'names': sorted(self.items[unique_id]),
+                'new': unique_id in new_updates,
+                'update_seen_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(row['update_seen_at']))
+                                  if row['update_seen_at'] else None
+            })
+        updates.sort(key=lambda entry: (not entry['new'], entry['update_seen_at'] or '', entry['unique_id']))
+        return updates
+
+def check_updates(name_infos, cache=None, **options):
+    own_cache = cache is None
+    cache = cache or MetadataCache()
+    try:
+        return UpdateChecker(name_infos, cache, **options).run()
+    finally:
+        if own_cache:
+            cache.close()
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="DLsite 항목의 업데이트 여부를 일괄 확인 (작업 스케줄러/cron으로 예약 실행 가능)")
+    parser.add_argument('path', help="검사할 폴더")
+    parser.add_argument('--max-age-days', type=float, default=7, help="이 기간 안에 확인한 항목은 건너뜀")
+    parser.add_argument('--limit', type=int, help="한 번에 확인할 최대 항목 수")
+    parser.add_argument('--time-budget', type=float, help="한 번 실행할 때 사용할 최대 시간(분)")
+    parser.add_argument('--every', type=float, help="지정하면 이 간격(시간)마다 반복 실행")
+    parser.add_argument('--db', help="메타데이터 캐시 파일 (기본: ~/.giana/metadata_cache.db)")
+    parser.add_argument('--output', default=os.path.join(CACHE_DIR, 'update_report.json'), help="보고서 JSON 파일 경로")
+    args = parser.parse_args(argv)
+
+    configure_from_env()
+
+    while True:
+        names = scan_items(args.path, DEFAULT_EXTENSIONS)
+        name_infos = {name: validate_name(name) for name in names}
+        cache = MetadataCache(args.db)
+        try:
+            report = check_updates(name_infos, cache,
+                                   max_age=args.max_age_days * 24 * 3600,
+                                   limit=args.limit,
+                                   time_budget=args.time_budget * 60 if args.time_budget else None)
+        finally:
+            cache.close()
+        report['path'] = os.path.abspath(args.path)
+        write_report(report, args.output)
+        print(f"{report['checked']}개 확인 (변경 없음 {report['not_modified']}, 오류 {report['error']}, "
+              f"남은 항목 {report['remaining']}), 업데이트 있음 {len(report['updates'])}개 -> {args.output}")
+        if not args.every:
+            break
+        time.sleep(args.every * 3600)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import re
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from constants import VALID_GENRES, MANIFEST_NAME, SIDECAR_SUFFIX
+from metrics import metrics
+
+# 이 개수 미만이면 프로세스 풀 시작 비용이 더 커서 단일 프로세스로 분류
+PARALLEL_THRESHOLD = 50000
+NAME_PARTS = ('creator', 'unique_id', 'game_title', 'genre', 'platform')
+# 조회 결과 필드 -> 이름 구성 요소
+CRAWLED_PARTS = {'Creator': 'creator', 'Title': 'game_title', 'Genre': 'genre'}
+INVALID_CHARS = set('\\/:*?"<>|')
+
+def validate_name(name):
+    patterns = [
+        (r'^\[(.+?)\]-\[([RV]J\d+)\] (.+?) \(([A-Z]+)\)_DLsite.*$', 'DLsite'),
+        (r'^\[(.+?)\]-\[(v\d+)\] (.+?) \(([A-Z]+)\)_VNdb.*$', 'VNdb'),
+        (r'^\[(.+?)\]-\[(\d+)\] (.+?) \(([A-Z]+)\)_Getchu.*$', 'Getchu'),
+        (r'^\[(.+?)\]-\[(.+?)\] (.+?) \(([A-Z]+)\)_Fanza.*$', 'Fanza'),
+        (r'^\[(.+?)\]-\[(.+?)\] (.+?) \(([A-Z]+)\)_Steam.*$', 'Steam')
+    ]
+
+    detailed = metrics.detailed
+    for pattern, platform in patterns:
+        if detailed:
+            start = time.perf_counter()
+            match = re.match(pattern, name)
+            metrics.add_time(f"validate.regex.{platform}", time.perf_counter() - start)
+        else:
+            match = re.match(pattern, name)
+        if match:
+            creator, unique_id, game_title, genre = match.groups()
+
+            if genre not in VALID_GENRES:
+                return False, None
+
+            if platform == 'DLsite' and not unique_id.startswith(('RJ', 'VJ')):
+                return False, None
+
+            if platform == 'VNdb' and not unique_id.startswith('v'):
+                return False, None
+
+            if platform == 'Getchu' and not unique_id.isdigit():
+                return False, None
+
+            return True, {
+                "creator": creator,
+                "unique_id": unique_id,
+                "game_title": game_title,
+                "genre": genre,
+                "platform": platform
+            }
+
+    return False, None
+
+def format_name(info):
+    # validate_name이 인식하는 형식의 이름
+    return f"[{info['creator']}]-[{info['unique_id']}] {info['game_title']} ({info['genre']})_{info['platform']}"
+
+def plan_name(name, info, is_dir, crawled_info=None, overrides=None):
+    # 현재 이름의 구성 요소에 조회 결과와 직접 입력한 값을 반영한 새 이름. (새 이름, 형식 일치 여부, 오류)
+    # 조회 결과의 'N/A'와 장르를 바꾸지 못한 경우의 'ANO'는 사용하지 않고 현재 값을 유지
+    new_info = dict(info or {})
+    for field, part in CRAWLED_PARTS.items():
+        value = crawled_info.get(field) if crawled_info else None
+        if value not in (None, '', 'N/A') and not (part == 'genre' and value == 'ANO'):
+            new_info[part] = value
+    new_info.update((part, value) for part, value in (overrides or {}).items() if part in NAME_PARTS and value)
+    if any(not new_info.get(part) for part in NAME_PARTS):
+        return None, False, "이름 구성 요소가 부족합니다."
+
+    new_name = format_name(new_info)
+    if not is_dir:
+        new_name += os.path.splitext(name)[1]
+    if INVALID_CHARS & set(new_name):
+        return new_name, False, "파일 이름에 사용할 수 없는 문자가 있습니다."
+    return new_name, validate_name(new_name)[0], None
+
+def iter_items(path, extensions):
+    # (이름, {'is_dir', 'size', 'mtime'})을 하나씩 반환. 폴더 크기는 알 수 없으므로 None
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith(MANIFEST_NAME) or SIDECAR_SUFFIX + '.' in entry.name:
+                continue
+            try:
+                if entry.is_file():
+                    if os.path.splitext(entry.name)[1].lower() in extensions or '' in extensions:
+                        stat = entry.stat()
+                        yield entry.name, {'is_dir': False, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+                elif entry.is_dir() and '' in extensions:
+                    stat = entry.stat()
+                    yield entry.name, {'is_dir': True, 'size': None, 'mtime': stat.st_mtime_ns}
+            except OSError:
+                continue
+
+def scan_items(path, extensions):
+    # 이름 -> {'is_dir', 'size', 'mtime'}
+    with metrics.timer("scan"):
+        items = dict(iter_items(path, extensions))
+    metrics.increment("scan.items", len(items))
+    return items
+
+def get_items_in_path(path, extensions):
+    return list(scan_items(path, extensions))
+
+def classify_items(items):
+    with metrics.timer("classify"):
+        result = _classify_items(items)
+    valid_items, invalid_items, duplicate_items = result
+    metrics.increment("classify.items", len(items))
+    metrics.increment("classify.valid", len(valid_items))
+    metrics.increment("classify.invalid", len(invalid_items))
+    metrics.increment("classify.duplicate", len(duplicate_items))
+    return result
+
+def _classify_items(items):
+    valid_items, invalid_items, unique_ids = _group_items(items)
+    duplicate_items = [item for items in unique_ids.values() if len(items) > 1 for item in items]
+    
+    return valid_items, invalid_items, duplicate_items
+
+def _group_items(items):
+    valid_items = []
+    invalid_items = []
+    unique_ids = {}
+    
+    for item in items:
+        is_valid, item_info = validate_name(item)
+        if is_valid:
+            unique_id = item_info['unique_id']
+            if unique_id in unique_ids:
+                unique_ids[unique_id].append(item)
+            else:
+                unique_ids[unique_id] = [item]
+            valid_items.append((item, item_info))
+        else:
+            invalid_items.append(item)
+    
+    return valid_items, invalid_items, unique_ids
+
+def classify_items_parallel(items, workers=None, threshold=PARALLEL_THRESHOLD, chunk_size=None):
+    workers = workers or os.cpu_count() or 1
+    if len(items) < threshold or workers < 2:
+        return classify_items(items)
+
+    # 작업자당 여러 청크를 배분하여 늦게 끝나는 작업자의 영향을 줄임
+    chunk_size = chunk_size or max(1000, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    valid_items = []
+    invalid_items = []
+    unique_ids = {}
+    with metrics.timer("classify.parallel"):
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            # map은 청크 순서대로 결과를 돌려주므로 단일 프로세스와 같은 순서로 병합됨
+            for valid, invalid, groups in executor.map(_group_items, chunks):
+                valid_items.extend(valid)
+                invalid_items.extend(invalid)
+                for unique_id, names in groups.items():
+                    if unique_id in unique_ids:
+                        unique_ids[unique_id].extend(names)
+                    else:
+                        unique_ids[unique_id] = names
+
+    duplicate_items = [item for items in unique_ids.values() if len(items) > 1 for item in items]
+
+    metrics.increment("classify.items", len(items))
+    metrics.increment("classify.valid", len(valid_items))
+    metrics.increment("classify.invalid", len(invalid_items))
+    metrics.increment("classify.duplicate", len(duplicate_items))
+    return valid_items, invalid_items, duplicate_items